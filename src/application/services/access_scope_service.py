@@ -0,0 +1,57 @@
+from domain.entities.access_scope import AccessScope
+from domain.entities.student import Student
+from domain.entities.user import User
+from domain.repositories.user_repository import IUserRepository
+from domain.repositories.student_repository import IStudentRepository
+
+
+class AccessScopeService:
+
+    def __init__(self, user_repo: IUserRepository, student_repo: IStudentRepository, scope_cache=None):
+        self.user_repo = user_repo
+        self.student_repo = student_repo
+
+        # Кеш областей доступа: id пользователя -> AccessScope. Набор учеников считается один раз
+        # и сбрасывается при изменении связей родителя или записей учеников
+        self.scope_cache = scope_cache
+        if scope_cache is not None:
+            self.user_repo.add_change_listener(self._on_user_changed)
+            self.student_repo.add_change_listener(self._on_student_changed)
+
+    def get_scope(self, user: User | None) -> AccessScope:
+        if not user or not user.is_active:
+            return AccessScope(None)
+
+        if user.is_admin():
+            # Администратор видит всех учеников и все предметы
+            return AccessScope(user.id, unrestricted=True)
+
+        if not (user.is_teacher() or user.is_parent() or user.is_student()):
+            return AccessScope(user.id)
+
+        scope = self.scope_cache.get(user.id) if self.scope_cache is not None else None
+        if scope is None:
+            scope = self._build_scope(user)
+            if self.scope_cache is not None:
+                self.scope_cache.set(user.id, scope)
+        return scope
+
+    def can_view(self, user: User | None, student_id: int) -> bool:
+        return self.get_scope(user).allows(student_id)
+
+    def _build_scope(self, user: User) -> AccessScope:
+        if user.is_teacher():
+            # Учитель видит всех учеников, а оценки и посещаемость - по своим предметам.
+            # Учитель без назначений в teacher_subject (старые данные) ограничений по предметам не имеет
+            subject_ids = self.user_repo.get_teacher_subject_ids(user.id)
+            return AccessScope(user.id, unrestricted=True, subject_ids=frozenset(subject_ids) if subject_ids else None)
+        # Родитель - свои дети, школьник - собственный профиль
+        return AccessScope(user.id, student_ids=frozenset(self.user_repo.get_accessible_student_ids(user.id)))
+
+    def _on_user_changed(self, user_id: int, user: User | None):
+        # В том числе создание и удаление связи родитель - ребенок (id родителя)
+        self.scope_cache.invalidate(user_id)
+
+    def _on_student_changed(self, student_id: int, student: Student | None):
+        # Прежний владелец профиля неизвестен, а записи учеников меняются редко - сбрасываем все
+        self.scope_cache.clear()
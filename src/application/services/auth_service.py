@@ -1,21 +1,97 @@
+import logging
+from dataclasses import replace
+from domain.entities.access_scope import AccessScope
+from domain.entities.page import Page
+from domain.entities.password_policy import PasswordPolicy
+from application.services.access_scope_service import AccessScopeService
+from application.services.password_verifier import LoginOverloadedError, PasswordVerifier
 from domain.entities.user import User, UserRole
 from domain.entities.student import Student
 from domain.repositories.user_repository import IUserRepository
 from domain.repositories.student_repository import IStudentRepository
 
+logger = logging.getLogger(__name__)
+
 
 class AuthService:
 
-    def __init__(self, user_repo: IUserRepository, student_repo: IStudentRepository):
+    def __init__(self, user_repo: IUserRepository, student_repo: IStudentRepository, user_cache=None,
+                 password_policy: PasswordPolicy | None = None, password_verifier: PasswordVerifier | None = None,
+                 access_scope: AccessScopeService | None = None):
         self.user_repo = user_repo
         self.student_repo = student_repo
+        self.access_scope = access_scope or AccessScopeService(user_repo, student_repo)
+        self.password_policy = password_policy or PasswordPolicy()
+        # None - пароль проверяется прямо в потоке запроса
+        self.password_verifier = password_verifier
+
+        # Кеш пользователей для user_loader: id пользователя -> (User, профиль ученика)
+        self.user_cache = user_cache
+        self._profile_owners = {}  # id ученика -> id пользователя, чей профиль закеширован
+        if user_cache is not None:
+            self.user_repo.add_change_listener(self._on_user_changed)
+            self.student_repo.add_change_listener(self._on_student_changed)
+
+    def load_user(self, user_id: int) -> User | None:
+        cached = self.user_cache.get(user_id) if self.user_cache is not None else None
+        if cached is None:
+            user = self.user_repo.get_by_id(user_id)
+            if user and user.is_student():
+                # Загружаем профиль студента для пользователей с ролью student
+                user.student_profile = self.student_repo.get_by_user_id(user.id)
+            if user is None or self.user_cache is None:
+                return user
+            cached = user
+            self.user_cache.set(user_id, cached)
+            if user.student_profile:
+                self._profile_owners[user.student_profile.id] = user_id
+
+        # Каждому запросу - своя копия, чтобы изменения current_user не попадали в кеш
+        profile = cached.student_profile
+        return replace(cached, student_profile=replace(profile) if profile else None)
+
+    def _on_user_changed(self, user_id: int, user: User | None):
+        self.user_cache.invalidate(user_id)
+
+    def _on_student_changed(self, student_id: int, student: Student | None):
+        # Сбрасываем и прежнего владельца профиля, и нового
+        owner_id = self._profile_owners.pop(student_id, None)
+        if owner_id is not None:
+            self.user_cache.invalidate(owner_id)
+        if student is not None and student.user_id is not None:
+            self.user_cache.invalidate(student.user_id)
 
     def authenticate_user(self, username: str, password: str) -> User | None:
+        # LoginOverloadedError (очередь проверок заполнена) при проверке пароля передается контроллеру
         user = self.user_repo.get_by_username(username)
-        if user and user.is_active and user.check_password(password):
+        if user and user.is_active and self._check_password(user, password):
+            if self.password_policy.needs_rehash(user.password_hash):
+                self._rehash_password(user, password)
             return user
         return None
 
+    def _rehash_password(self, user: User, password: str):
+        # Пароль известен только при входе - тогда и переводим хеш на текущую политику
+        if self.password_verifier is not None:
+            try:
+                user.password_hash = self.password_verifier.run(self.password_policy.hash, password)
+            except LoginOverloadedError:
+                # Пароль уже проверен: вход не срываем, хеш обновится при следующем входе
+                logger.warning("Перехеширование пароля %s отложено: очередь проверок заполнена", user.username)
+                return
+        else:
+            user.set_password(password, self.password_policy)
+        self.user_repo.update(user)
+
+    def _check_password(self, user: User, password: str) -> bool:
+        if self.password_verifier is None:
+            return user.check_password(password)
+        return self.password_verifier.verify(user.username, user.password_hash, password)
+
+    def change_password(self, user: User, new_password: str) -> User:
+        user.set_password(new_password, self.password_policy)
+        return self.user_repo.update(user)
+
     def register_user(self, username: str, email: str, password: str,
                       first_name: str, last_name: str, role: UserRole) -> tuple[User | None, str | None]:
         # Проверяем, что пользователь с таким username или email не существует
@@ -36,7 +112,7 @@ class AuthService:
             last_name=last_name,
             is_active=True
         )
-        user.set_password(password)
+        user.set_password(password, self.password_policy)
 
         try:
             user = self.user_repo.create(user)
@@ -44,28 +120,12 @@ class AuthService:
         except Exception as e:
             return None, f"Ошибка при создании пользователя: {str(e)}"
 
-    def can_view_student_data(self, user: User, student_id: int) -> bool:
-        if not user or not user.is_active:
-            return False
-
-        if user.is_admin():
-            return True
-
-        if user.is_student():
-            # Школьник может видеть только свои данные
-            student = self.student_repo.get_by_user_id(user.id)
-            return student and student.id == student_id
-
-        if user.is_parent():
-            # Родитель может видеть данные своих детей
-            return True  # DEBUG
-            # return self.user_repo.is_parent_of(user.id, student_id)
-
-        if user.is_teacher():
-            # Учитель может видеть всех учеников
-            return True
+    def get_access_scope(self, user: User) -> AccessScope:
+        return self.access_scope.get_scope(user)
 
-        return False
+    def can_view_student_data(self, user: User, student_id: int) -> bool:
+        # Администратор и учитель видят всех, родитель - своих детей, школьник - только себя
+        return self.access_scope.can_view(user, student_id)
 
     def can_edit_student_data(self, user: User, student_id: int) -> bool:
         if not user or not user.is_active:
@@ -81,30 +141,29 @@ class AuthService:
         return False
 
     def get_user_students(self, user: User) -> list[Student]:
-        if not user or not user.is_active:
-            return []
-
-        if user.is_admin():
-            # Админ видит всех студентов
+        scope = self.access_scope.get_scope(user)
+        if scope.unrestricted:
+            # Админ и учитель видят всех студентов
             return self.student_repo.get_all()
-
-        if user.is_student():
-            # Школьник видит только себя
-            student = self.student_repo.get_by_user_id(user.id)
-            return [student] if student else []
-
-        if user.is_parent():
-            # Родитель видит своих детей
-            children_ids = self.user_repo.get_children_ids(user.id)
-            if children_ids:
-                return []
-            return [self.student_repo.get_by_id(child_id) for child_id in children_ids]
-
-        if user.is_teacher():
-            # Учитель видит всех студентов
-            return self.student_repo.get_all()
-
-        return []
+        if scope.is_empty:
+            return []
+        # Дети родителя (или профиль школьника) одним запросом, в том же порядке, что и полный список
+        students = self.student_repo.get_by_ids(sorted(scope.student_ids))
+        return sorted(students, key=lambda student: student.name)
+
+    def get_user_students_page(self, user: User, limit: int, after: tuple | None = None,
+                               search: str | None = None) -> Page[Student]:
+        scope = self.access_scope.get_scope(user)
+        if scope.is_empty:
+            return Page()
+        # Область доступа применяется в SQL, поэтому страницы и поиск одинаковы для всех ролей
+        return self.student_repo.get_page(limit, after, search, scope)
+
+    def search_parents(self, limit: int, after: tuple | None = None, search: str | None = None) -> Page[User]:
+        return self.user_repo.get_page_by_role(UserRole.PARENT, limit, after, search)
+
+    def search_students(self, limit: int, after: tuple | None = None, search: str | None = None) -> Page[Student]:
+        return self.student_repo.get_page(limit, after, search)
 
     def manage_parent_child_relationship(self, action: str, parent_id: int, child_id: int, admin_user: User = None) -> \
         tuple[bool, str]:
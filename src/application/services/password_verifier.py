@@ -0,0 +1,96 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable
+
+from werkzeug.security import check_password_hash
+
+
+class LoginOverloadedError(Exception):
+
+    def __init__(self, retry_after: int):
+        super().__init__(f'Слишком много одновременных входов, повторите через {retry_after} с')
+        self.retry_after = retry_after
+
+
+class PasswordVerifier:
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, timeout: float = 10.0, retry_after: int = 2,
+                 check: Callable[[str, str], bool] = check_password_hash):
+        # Проверка пароля (pbkdf2/scrypt) отпускает GIL и занимает ядро целиком: отдельный ограниченный пул
+        # не дает всплеску входов занять все ядра, а лимит очереди - все потоки воркера
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-verify')
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.retry_after = retry_after
+        # Проверка (хеш, пароль) -> bool
+        self._check = check
+        # RLock: колбэк завершения может выполниться сразу в add_done_callback, еще под блокировкой
+        self._lock = threading.RLock()
+        self._pending = 0
+        # Повторные попытки того же входа (двойной клик, повтор формы) ждут уже запущенную проверку.
+        # Ключ - имя пользователя и ключевой хеш пароля, сам пароль в памяти не хранится
+        self._in_flight: dict[tuple[str, bytes], Future] = {}
+        self._key = os.urandom(32)
+        self._stats = {
+            'submitted': 0,
+            'deduplicated': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'pending_max': 0,
+        }
+
+    def verify(self, username: str, password_hash: str, password: str) -> bool:
+        key = (username, hashlib.blake2b(password.encode(), key=self._key).digest())
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats['deduplicated'] += 1
+            else:
+                future = self._submit_locked(self._check, password_hash, password)
+                self._in_flight[key] = future
+                future.add_done_callback(lambda _: self._forget(key, future))
+        return self._wait(future)
+
+    def run(self, func: Callable, *args) -> Any:
+        # Другая CPU-тяжелая работа входа (пересчет хеша по новой политике) - под тем же лимитом
+        with self._lock:
+            future = self._submit_locked(func, *args)
+        return self._wait(future)
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'pending': self._pending}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_locked(self, func: Callable, *args) -> Future:
+        if self._pending >= self.max_pending:
+            # Быстрый отказ вместо ожидания в очереди, которая все равно не успеет разойтись
+            self._stats['rejected'] += 1
+            raise LoginOverloadedError(self.retry_after)
+        self._pending += 1
+        self._stats['submitted'] += 1
+        self._stats['pending_max'] = max(self._stats['pending_max'], self._pending)
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+
+    def _forget(self, key: tuple, future: Future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def _wait(self, future: Future) -> Any:
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise LoginOverloadedError(self.retry_after)
@@ -0,0 +1,105 @@
+import csv
+import io
+from datetime import date
+from typing import Any, Iterator
+from domain.entities.access_scope import AccessScope
+from domain.entities.subject import Subject
+from domain.entities.user import User
+from domain.repositories.report_repository import IReportRepository
+from domain.repositories.subject_repository import ISubjectRepository
+from application.services.auth_service import AuthService
+
+
+class ReportService:
+
+    def __init__(self, report_repo: IReportRepository, subject_repo: ISubjectRepository,
+                 auth_service: AuthService):
+        self.report_repo = report_repo
+        self.subject_repo = subject_repo
+        self.auth_service = auth_service
+
+    def can_view_reports(self, user: User) -> bool:
+        return bool(user and user.is_active and (user.is_admin() or user.is_teacher() or user.is_parent()))
+
+    def get_subjects(self, user: User | None = None) -> list[Subject]:
+        subjects = self.subject_repo.get_all()
+        if user is None:
+            return subjects
+        # Учитель с назначенными предметами выбирает отчет только по ним
+        scope = self.auth_service.get_access_scope(user)
+        return [subject for subject in subjects if scope.allows_subject(subject.id)]
+
+    def get_subject_report(self, subject_id: int, current_user: User, start_date: date | None = None,
+                           end_date: date | None = None) -> dict[str, Any] | None:
+        if not self.can_view_reports(current_user):
+            return None
+
+        scope = self._get_report_scope(current_user, subject_id)
+        if scope is None:
+            return None
+        dates = self.report_repo.get_subject_report_dates(subject_id, start_date, end_date, scope)
+        students_data = {}
+        grades = []
+        for student, cells in self.report_repo.iter_subject_report(subject_id, start_date, end_date, scope):
+            students_data[student.id] = {'student': student, 'dates': cells}
+            for cell in cells.values():
+                grades.extend(cell['grades'])
+
+        if not students_data:
+            return None
+
+        return {
+            'dates': dates,
+            'students_data': students_data,
+            # Итоги - по всем оценкам, а не по одной на день
+            'grade_count': len(grades),
+            'mean_grade': round(sum(grades) / len(grades), 2) if grades else None
+        }
+
+    def iter_subject_report_csv(self, subject_id: int, current_user: User, start_date: date | None = None,
+                                end_date: date | None = None) -> Iterator[str] | None:
+        if not self.can_view_reports(current_user):
+            return None
+
+        # Права и список дат вычисляются сразу, строки отдаются уже во время ответа
+        scope = self._get_report_scope(current_user, subject_id)
+        if scope is None:
+            return None
+        dates = self.report_repo.get_subject_report_dates(subject_id, start_date, end_date, scope)
+        return self._generate_csv(subject_id, start_date, end_date, scope, dates)
+
+    def _generate_csv(self, subject_id: int, start_date: date | None, end_date: date | None,
+                      scope: AccessScope, dates: list[date]) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+
+        def flush() -> str:
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return value
+
+        # BOM нужен, чтобы Excel корректно открыл кириллицу
+        header = ['Ученик', 'Класс']
+        for report_date in dates:
+            header.append(f"{report_date.strftime('%d.%m.%Y')} оценка")
+            header.append(f"{report_date.strftime('%d.%m.%Y')} посещаемость")
+        writer.writerow(header)
+        yield '\ufeff' + flush()
+
+        for student, cells in self.report_repo.iter_subject_report(subject_id, start_date, end_date, scope):
+            row = [student.name, student.class_name]
+            for report_date in dates:
+                cell = cells.get(report_date, {})
+                present = cell.get('present')
+                row.append(', '.join(str(grade) for grade in cell.get('grades', ())))
+                row.append('' if present is None else ('присутствовал' if present else 'отсутствовал'))
+            writer.writerow(row)
+            yield flush()
+
+    def _get_report_scope(self, user: User, subject_id: int) -> AccessScope | None:
+        # Строки отчета фильтруются в SQL по области доступа; None - отчет пользователю не виден целиком
+        scope = self.auth_service.get_access_scope(user)
+        if scope.is_empty or not scope.allows_subject(subject_id):
+            return None
+        return scope
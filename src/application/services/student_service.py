@@ -1,84 +1,123 @@
 from typing import Any
-from datetime import date, time
+from datetime import date, datetime, time
+from domain.entities.page import Page
 from domain.entities.student import Student
 from domain.entities.grade import Grade
 from domain.entities.attendance import Attendance
 from domain.entities.schedule import Schedule
 from domain.entities.subject import Subject
+from domain.entities.term import Term, recent_terms, term_by_key, term_for_date
 from domain.repositories.student_repository import IStudentRepository
 from domain.repositories.grade_repository import IGradeRepository
 from domain.repositories.attendance_repository import IAttendanceRepository
 from domain.repositories.schedule_repository import IScheduleRepository
 from domain.repositories.subject_repository import ISubjectRepository
+from domain.repositories.diary_repository import IDiaryRepository, IAsyncDiaryRepository
 from application.services.auth_service import AuthService
 
 
+# Значение параметра периода для всей истории ученика
+ALL_PERIODS = 'all'
+
+
 class StudentService:
 
+    # Записей оценок и посещаемости на одной странице дневника
+    DIARY_PAGE_SIZE = 50
+    # Сколько последних четвертей предлагать в выборе периода
+    DIARY_TERMS_SHOWN = 8
+
     def __init__(self,
                  student_repo: IStudentRepository,
                  grade_repo: IGradeRepository,
                  attendance_repo: IAttendanceRepository,
                  schedule_repo: IScheduleRepository,
                  subject_repo: ISubjectRepository,
-                 auth_service: AuthService):
+                 auth_service: AuthService,
+                 diary_repo: IDiaryRepository,
+                 async_diary_repo: IAsyncDiaryRepository | None = None):
         self.student_repo = student_repo
         self.grade_repo = grade_repo
         self.attendance_repo = attendance_repo
         self.schedule_repo = schedule_repo
         self.subject_repo = subject_repo
         self.auth_service = auth_service
+        self.diary_repo = diary_repo
+        self.async_diary_repo = async_diary_repo
 
     def get_all_students(self, current_user) -> list[Student]:
         if not current_user or not hasattr(current_user, 'id'):
             return []
         return self.auth_service.get_user_students(current_user)
 
+    def get_students_page(self, current_user, limit: int, after: tuple | None = None,
+                          search: str | None = None) -> Page[Student]:
+        if not current_user or not hasattr(current_user, 'id'):
+            return Page()
+        return self.auth_service.get_user_students_page(current_user, limit, after, search)
+
     def get_student_by_id(self, student_id: int) -> Student | None:
         return self.student_repo.get_by_id(student_id)
 
-    def get_student_diary_data(self, student_id: int, current_user) -> dict[str, Any] | None:
+    def get_student_diary_data(self, student_id: int, current_user, period: str | None = None,
+                               grades_after: tuple | None = None,
+                               attendance_after: tuple | None = None) -> dict[str, Any] | None:
         if not current_user or not hasattr(current_user, 'id'):
             return None
 
-        if not self.auth_service.can_view_student_data(current_user, student_id):
-            return None
-
-        student = self.student_repo.get_by_id(student_id)
-        if not student:
+        scope = self.auth_service.get_access_scope(current_user)
+        if not scope.allows(student_id):
             return None
 
-        grades = self.grade_repo.get_by_student(student_id)
-        attendance = self.attendance_repo.get_by_student(student_id)
-        schedule = self.schedule_repo.get_all()
-        subjects = self.subject_repo.get_all()
+        # Весь дневник загружается одним обращением к хранилищу; учитель видит оценки и посещаемость
+        # только по своим предметам
+        term = self._resolve_period(period)
+        data = self.diary_repo.get_student_diary(
+            student_id, self.DIARY_PAGE_SIZE, term.start if term else None, term.end if term else None,
+            grades_after, attendance_after, scope
+        )
+        return self._complete_diary_data(data, term)
 
-        # Создаем словарь предметов для быстрого поиска
-        subjects_dict = {subject.id: subject for subject in subjects}
+    async def get_student_diary_data_async(self, student_id: int, current_user, period: str | None = None,
+                                           grades_after: tuple | None = None,
+                                           attendance_after: tuple | None = None) -> dict[str, Any] | None:
+        if not current_user or not hasattr(current_user, 'id'):
+            return None
 
-        # Добавляем объект предмета к каждой оценке
-        for grade in grades:
-            grade.subject = subjects_dict.get(grade.subject_id)
+        scope = self.auth_service.get_access_scope(current_user)
+        if not scope.allows(student_id):
+            return None
 
-        # Добавляем объект предмета к каждой записи посещаемости
-        for att in attendance:
-            att.subject = subjects_dict.get(att.subject_id)
+        # Оценки, посещаемость, статистика, расписание и предметы читаются параллельно
+        term = self._resolve_period(period)
+        data = await self.async_diary_repo.get_student_diary(
+            student_id, self.DIARY_PAGE_SIZE, term.start if term else None, term.end if term else None,
+            grades_after, attendance_after, scope
+        )
+        return self._complete_diary_data(data, term)
 
-        # Добавляем объект предмета к каждому элементу расписания
-        for sched in schedule:
-            sched.subject = subjects_dict.get(sched.subject_id)
+    @staticmethod
+    def _resolve_period(period: str | None) -> Term | None:
+        # По умолчанию - текущая четверть, 'all' - вся история (постранично)
+        if period == ALL_PERIODS:
+            return None
+        return (term_by_key(period) if period else None) or term_for_date(date.today())
 
-        # Рассчитываем статистику оценок
-        statistics = self.calculate_student_statistics(student_id, current_user)
+    def _complete_diary_data(self, data: dict[str, Any] | None, term: Term | None) -> dict[str, Any] | None:
+        if data is None:
+            return None
 
-        return {
-            'student': student,
-            'grades': grades,
-            'attendance': attendance,
-            'schedule': schedule,
-            'subjects': subjects,
-            'statistics': statistics
-        }
+        grades_page, attendance_page = data['grades'], data['attendance']
+        data['grades'] = grades_page.items
+        data['grades_next_cursor'] = grades_page.next_cursor
+        data['attendance'] = attendance_page.items
+        data['attendance_next_cursor'] = attendance_page.next_cursor
+        # Статистика посчитана SQL-агрегатом за весь период, а не по показанной странице
+        data['statistics'] = self._aggregate_to_statistics(data.pop('grade_statistics'))
+        data['term'] = term
+        data['period'] = term.key if term else ALL_PERIODS
+        data['terms'] = recent_terms(self.DIARY_TERMS_SHOWN)
+        return data
 
     def add_grade(self, student_id: int, subject_id: int, grade: int,
                   comment: str, current_user) -> Grade | None:
@@ -120,7 +159,17 @@ class StudentService:
 
     def get_filtered_schedule(self, day_of_week: int = None, subject_id: int = None,
                               time_start: time = None) -> list[Schedule]:
-        schedule = self.schedule_repo.get_filtered(subject_id, day_of_week, time_start)
+        schedule = self.schedule_repo.get_filtered(day_of_week=day_of_week, subject_id=subject_id,
+                                                   time_start=time_start)
+        return self._attach_subjects(schedule)
+
+    def get_current_lessons(self, moment: datetime | None = None) -> list[Schedule]:
+        # Уроки, идущие в данный момент (по умолчанию - сейчас)
+        moment = moment or datetime.now()
+        now = moment.time().replace(second=0, microsecond=0)
+        return self._attach_subjects(self.schedule_repo.get_overlapping(moment.weekday(), now, now))
+
+    def _attach_subjects(self, schedule: list[Schedule]) -> list[Schedule]:
         subjects = self.subject_repo.get_all()
 
         # Создаем словарь предметов для быстрого поиска
@@ -132,31 +181,34 @@ class StudentService:
 
         return schedule
 
-    def calculate_student_statistics(self, student_id: int, current_user) -> dict[str, Any] | None:
-
-        grades = self.grade_repo.get_by_student(student_id)
-        grade_values = [grade.grade for grade in grades]
+    def calculate_student_statistics(self, student_id: int, current_user, subject_id: int | None = None,
+                                     start_date: date | None = None,
+                                     end_date: date | None = None) -> dict[str, Any] | None:
+        scope = self.auth_service.get_access_scope(current_user)
+        if not scope.allows(student_id):
+            return None
+        # Агрегаты считаются в SQLite, объекты Grade не создаются
+        aggregate = self.grade_repo.get_statistics(student_id, subject_id, start_date, end_date, scope)
+        return self._aggregate_to_statistics(aggregate)
+
+    @staticmethod
+    def _aggregate_to_statistics(aggregate: dict[str, Any]) -> dict[str, Any]:
+        count = aggregate['count']
+        if not count:
+            # У ученика еще нет оценок
+            return {
+                'mean_grade': 0,
+                'median_grade': 0,
+                'total_grades': 0,
+                'grade_distribution': {}
+            }
 
-        total = sum(grade_values)
-        mean_grade = total / len(grade_values)
         # округляем до двух знаков после запятой
-        mean_grade = round(mean_grade, 2)
-
-        sorted_grades = sorted(grade_values)
-        n = len(sorted_grades)
-        if n % 2 == 0:
-            median_grade = (sorted_grades[n // 2 - 1] + sorted_grades[n // 2]) / 2
-        else:
-            median_grade = sorted_grades[n // 2]
-
-        # Распределение оценок
-        grade_distribution = {}
-        for grade_value in grade_values:
-            grade_distribution[grade_value] = grade_distribution.get(grade_value, 0) + 1
+        mean_grade = round(aggregate['sum'] / count, 2)
 
         return {
             'mean_grade': mean_grade,
-            'median_grade': median_grade,
-            'total_grades': len(grades),
-            'grade_distribution': grade_distribution
+            'median_grade': aggregate['median'],
+            'total_grades': count,
+            'grade_distribution': aggregate['distribution']
         }
@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class AccessScope:
+    # Какие ученики видны пользователю: все (администратор, учитель) или конкретный набор id
+    user_id: int | None
+    unrestricted: bool = False
+    student_ids: frozenset[int] = frozenset()
+    # Предметы, оценки и посещаемость которых видны пользователю: None - все,
+    # у учителя с назначениями в teacher_subject - только его предметы
+    subject_ids: frozenset[int] | None = None
+
+    def allows(self, student_id: int) -> bool:
+        return self.unrestricted or student_id in self.student_ids
+
+    def allows_subject(self, subject_id: int) -> bool:
+        return self.subject_ids is None or subject_id in self.subject_ids
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.unrestricted and not self.student_ids
+
+    def __repr__(self):
+        visible = 'all' if self.unrestricted else len(self.student_ids)
+        subjects = 'all' if self.subject_ids is None else len(self.subject_ids)
+        return f'<AccessScope user={self.user_id} students={visible} subjects={subjects}>'
@@ -0,0 +1,62 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Generic, TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T] = field(default_factory=list)
+    # Значения ключа сортировки последней записи страницы; None - страница последняя
+    next_after: tuple | None = None
+
+    @property
+    def next_cursor(self) -> str | None:
+        return encode_cursor(self.next_after) if self.next_after is not None else None
+
+    def __repr__(self):
+        return f'<Page {len(self.items)} items, more={self.next_after is not None}>'
+
+
+def encode_cursor(values: tuple) -> str:
+    # Курсор непрозрачен для клиента: это ключ сортировки последней записи в base64
+    return base64.urlsafe_b64encode(json.dumps(list(values), ensure_ascii=False).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str | None, shape: tuple[type, ...] | None = None) -> tuple[Any, ...] | None:
+    # shape - типы значений ключа сортировки; курсор другой формы считается испорченным
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ValueError('Некорректный курсор страницы')
+    if not isinstance(values, list):
+        raise ValueError('Некорректный курсор страницы')
+    values = tuple(values)
+    return check_cursor(values, shape) if shape is not None else values
+
+
+def check_cursor(values: tuple, shape: tuple[type, ...]) -> tuple:
+    # Ровно столько значений, сколько в ключе, и каждое - скаляр своего типа (bool за int не считается).
+    # Дата в курсоре - строка в ISO-формате, как она хранится в базе
+    if not isinstance(values, (tuple, list)) or len(values) != len(shape):
+        raise ValueError('Некорректный курсор страницы')
+    for value, expected in zip(values, shape):
+        if expected is date:
+            if not isinstance(value, str):
+                raise ValueError('Некорректный курсор страницы')
+            date.fromisoformat(value)
+        elif isinstance(value, bool) or not isinstance(value, expected):
+            raise ValueError('Некорректный курсор страницы')
+    return tuple(values)
+
+
+# Ключи сортировки постраничных списков
+STUDENT_CURSOR = (str, int)  # (name, id)
+USER_CURSOR = (str, str, int)  # (last_name, first_name, id)
+HISTORY_CURSOR = (date, int)  # (date, id) оценки или отметки посещаемости
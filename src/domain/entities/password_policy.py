@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+# Параметры werkzeug по умолчанию для коротких записей метода ('pbkdf2', 'scrypt')
+_DEFAULT_PARAMETERS = {
+    'pbkdf2': f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}',
+    'scrypt': 'scrypt:32768:8:1',
+}
+
+
+def normalize_method(method: str) -> str:
+    # 'pbkdf2' и 'pbkdf2:sha256' - та же стоимость, что и 'pbkdf2:sha256:600000'
+    name = method.split(':', 1)[0]
+    if method == name:
+        return _DEFAULT_PARAMETERS.get(name, method)
+    if name == 'pbkdf2' and method.count(':') == 1:
+        return f'{method}:{DEFAULT_PBKDF2_ITERATIONS}'
+    return method
+
+
+def hash_method(password_hash: str) -> str:
+    # Хеш werkzeug хранит метод и его параметры перед первым '$': 'pbkdf2:sha256:600000$соль$хеш'
+    return normalize_method(password_hash.split('$', 1)[0])
+
+
+@dataclass(frozen=True)
+class PasswordPolicy:
+    # Метод в формате werkzeug: 'pbkdf2:sha256:<итерации>' или 'scrypt:<n>:<r>:<p>'
+    method: str = _DEFAULT_PARAMETERS['pbkdf2']
+    salt_length: int = 16
+
+    def __post_init__(self):
+        if self.method.split(':', 1)[0] not in _DEFAULT_PARAMETERS:
+            raise ValueError(f'Неподдерживаемый метод хеширования паролей: {self.method}')
+        object.__setattr__(self, 'method', normalize_method(self.method))
+
+    def hash(self, password: str) -> str:
+        return generate_password_hash(password, method=self.method, salt_length=self.salt_length)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return check_password_hash(password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        # Хеш с другим методом или стоимостью (дороже или дешевле политики) пересчитывается при входе
+        return hash_method(password_hash) != self.method
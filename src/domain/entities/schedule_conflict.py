@@ -0,0 +1,143 @@
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import time
+from typing import Hashable, Iterable, Mapping, NamedTuple
+from domain.entities.schedule import Schedule
+
+# Виды ресурсов, которые не могут быть заняты двумя уроками одновременно
+CLASSROOM = 'classroom'
+TEACHER = 'teacher'
+
+DAY_NAMES = ('Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье')
+
+
+@dataclass(frozen=True)
+class ScheduleConflict:
+    kind: str
+    # Номер кабинета или имя учителя
+    resource: str
+    day_of_week: int
+    first: Schedule
+    second: Schedule
+
+    def to_dict(self) -> dict:
+        return {
+            'kind': self.kind,
+            'resource': self.resource,
+            'day_of_week': self.day_of_week,
+            'lessons': [_lesson_to_dict(lesson) for lesson in (self.first, self.second)],
+        }
+
+    def __str__(self):
+        place = f'кабинет {self.resource}' if self.kind == CLASSROOM else f'учитель {self.resource}'
+        day = DAY_NAMES[self.day_of_week] if 0 <= self.day_of_week < len(DAY_NAMES) else self.day_of_week
+        return f'{day}, {place}: {_lesson_label(self.first)} и {_lesson_label(self.second)}'
+
+
+class TeacherResource(NamedTuple):
+    # Учитель как ресурс расписания: key сравнивается при поиске пересечений, label выводится в отчете.
+    # key - ('user', id) для учителя из teacher_subject или ('name', текст) из subjects.teacher
+    key: Hashable
+    label: str
+
+
+class ScheduleConflictError(Exception):
+
+    def __init__(self, conflicts: list[ScheduleConflict]):
+        super().__init__('Пересечение в расписании: ' + '; '.join(str(conflict) for conflict in conflicts))
+        self.conflicts = conflicts
+
+
+class _Track:
+    # Уроки одного ресурса в один день по времени начала, параллельные массивы начал (для bisect) и концов
+
+    def __init__(self, lessons: list[Schedule], label: str):
+        self.label = label
+        lessons.sort(key=lambda lesson: (lesson.time_start, lesson.time_end, lesson.id or 0))
+        self.lessons = lessons
+        self.starts = [_seconds(lesson.time_start) for lesson in lessons]
+        self.ends = [_seconds(lesson.time_end) for lesson in lessons]
+        # Урок, начавшийся раньше чем за longest до момента t, к t уже закончился
+        self.longest = max(max(end - start, 0) for start, end in zip(self.starts, self.ends))
+
+    def overlapping(self, time_start: time, time_end: time) -> list[Schedule]:
+        # Полуинтервалы [начало, конец): урок, заканчивающийся в 09:45, не мешает уроку с 09:45
+        start, end = _seconds(time_start), _seconds(time_end)
+        low = bisect_right(self.starts, start - self.longest)
+        high = bisect_left(self.starts, end)
+        return [self.lessons[i] for i in range(low, high) if self.ends[i] > start]
+
+
+class ScheduleConflictDetector:
+
+    def __init__(self, lessons: Iterable[Schedule],
+                 teachers_by_subject: Mapping[int, Iterable[TeacherResource]] | None = None):
+        # teachers_by_subject - кто ведет предмет: урок занимает каждого из учителей предмета;
+        # предметы без учителя проверяются только по кабинету
+        self.teachers_by_subject = teachers_by_subject or {}
+        groups, labels = {}, {}
+        for lesson in lessons:
+            for kind, key, label in self._resources(lesson):
+                groups.setdefault((lesson.day_of_week, kind, key), []).append(lesson)
+                labels[(kind, key)] = label
+        self._tracks = {track_key: _Track(group, labels[track_key[1:]]) for track_key, group in groups.items()}
+
+    def check(self, lesson: Schedule) -> list[ScheduleConflict]:
+        # Проверка одного урока: бинарный поиск в дорожках его кабинета и учителя, O(log n + k)
+        conflicts = []
+        for kind, key, label in self._resources(lesson):
+            track = self._tracks.get((lesson.day_of_week, kind, key))
+            if track is None:
+                continue
+            for other in track.overlapping(lesson.time_start, lesson.time_end):
+                # Изменяемый урок не конфликтует со своей сохраненной версией
+                if other is lesson or (lesson.id is not None and other.id == lesson.id):
+                    continue
+                conflicts.append(ScheduleConflict(kind, label, lesson.day_of_week, other, lesson))
+        return conflicts
+
+    def find_all(self) -> list[ScheduleConflict]:
+        # Заметание по каждой дорожке: уроки по времени начала, в running - еще идущие уроки, упорядоченные
+        # по времени конца. Закончившиеся снимаются с начала списка, новый урок вставляется bisect-ом,
+        # поэтому работа - O(n log n + k) для k пересечений, каждая пара выдается один раз
+        conflicts = []
+        tracks = sorted(self._tracks.items(), key=lambda item: (item[0][0], item[0][1], item[1].label))
+        for (day_of_week, kind, _), track in tracks:
+            running = []  # (конец, номер урока в дорожке)
+            for order, lesson in enumerate(track.lessons):
+                del running[:bisect_right(running, (track.starts[order], len(track.lessons)))]
+                for _, other in running:
+                    conflicts.append(ScheduleConflict(kind, track.label, day_of_week, track.lessons[other], lesson))
+                insort(running, (track.ends[order], order))
+        return conflicts
+
+    def _resources(self, lesson: Schedule) -> list[tuple[str, Hashable, str]]:
+        # (вид, ключ для сравнения, подпись для отчета)
+        resources = []
+        classroom = (lesson.classroom or '').strip()
+        if classroom:
+            resources.append((CLASSROOM, classroom, classroom))
+        for teacher in self.teachers_by_subject.get(lesson.subject_id, ()):
+            resources.append((TEACHER, teacher.key, teacher.label))
+        return resources
+
+
+def _seconds(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _lesson_label(lesson: Schedule) -> str:
+    label = f"{lesson.time_start.strftime('%H:%M')}-{lesson.time_end.strftime('%H:%M')}"
+    subject = getattr(lesson, 'subject', None)
+    name = subject.name if subject is not None else f'предмет {lesson.subject_id}'
+    return f"{label} {name}" + (f" (#{lesson.id})" if lesson.id is not None else '')
+
+
+def _lesson_to_dict(lesson: Schedule) -> dict:
+    return {
+        'id': lesson.id,
+        'subject_id': lesson.subject_id,
+        'time_start': lesson.time_start.strftime('%H:%M'),
+        'time_end': lesson.time_end.strftime('%H:%M'),
+        'classroom': lesson.classroom,
+    }
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from datetime import date
+
+
+# Границы четвертей: (номер, месяц и день начала, месяц и день конца); летние месяцы относятся к 4-й четверти
+QUARTERS = (
+    (1, (9, 1), (10, 31)),
+    (2, (11, 1), (12, 31)),
+    (3, (1, 1), (3, 31)),
+    (4, (4, 1), (8, 31)),
+)
+
+
+@dataclass(frozen=True)
+class Term:
+    school_year: int  # Год начала учебного года
+    quarter: int
+    start: date
+    end: date
+
+    @property
+    def key(self) -> str:
+        return f'{self.school_year}-{self.quarter}'
+
+    @property
+    def name(self) -> str:
+        return f'{self.quarter} четверть {self.school_year}/{self.school_year + 1}'
+
+    def __repr__(self):
+        return f'<Term {self.key}>'
+
+
+def make_term(school_year: int, quarter: int) -> Term:
+    _, (start_month, start_day), (end_month, end_day) = QUARTERS[quarter - 1]
+    # 3-я и 4-я четверти приходятся на следующий календарный год
+    year = school_year if quarter <= 2 else school_year + 1
+    return Term(school_year, quarter, date(year, start_month, start_day), date(year, end_month, end_day))
+
+
+def term_for_date(day: date) -> Term:
+    school_year = day.year if day.month >= 9 else day.year - 1
+    for quarter in range(1, 5):
+        term = make_term(school_year, quarter)
+        if term.start <= day <= term.end:
+            return term
+    raise ValueError(f'Дата вне учебного года: {day}')
+
+
+def term_by_key(key: str) -> Term | None:
+    try:
+        school_year, quarter = (int(part) for part in key.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    if not 1 <= quarter <= 4 or not 1900 < school_year < 3000:
+        return None
+    return make_term(school_year, quarter)
+
+
+def recent_terms(count: int, today: date | None = None) -> list[Term]:
+    # Текущая и предыдущие четверти, от новых к старым
+    term = term_for_date(today or date.today())
+    terms = [term]
+    while len(terms) < count:
+        if term.quarter > 1:
+            term = make_term(term.school_year, term.quarter - 1)
+        else:
+            term = make_term(term.school_year - 1, 4)
+        terms.append(term)
+    return terms
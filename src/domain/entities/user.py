@@ -5,7 +5,10 @@ from datetime import datetime
 from enum import Enum
 
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+
+from .password_policy import PasswordPolicy
+
+DEFAULT_PASSWORD_POLICY = PasswordPolicy()
 
 
 class UserRole(Enum):
@@ -48,11 +51,12 @@ class User(UserMixin):
     def is_admin(self) -> bool:
         return self.role == UserRole.ADMIN
 
-    def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+    def set_password(self, password: str, policy: PasswordPolicy | None = None):
+        self.password_hash = (policy or DEFAULT_PASSWORD_POLICY).hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        # Проверка по методу, записанному в самом хеше, - подходит для хешей любой политики
+        return DEFAULT_PASSWORD_POLICY.verify(self.password_hash, password)
 
     def __repr__(self):
         return f'<User {self.username} ({self.role.value})>'
@@ -1,5 +1,7 @@
 from datetime import date
 from domain.entities.attendance import Attendance
+from domain.entities.access_scope import AccessScope
+from domain.entities.page import Page
 from domain.repositories.base_repository import BaseRepository
 
 
@@ -8,6 +10,16 @@ class IAttendanceRepository(BaseRepository[Attendance]):
     def get_by_student(self, student_id: int) -> list[Attendance]:
         raise NotImplementedError
     
+    def get_by_student_window(self, student_id: int, limit: int, start_date: date | None = None,
+                              end_date: date | None = None, after: tuple | None = None) -> Page[Attendance]:
+        raise NotImplementedError
+    
+    def get_scoped_window(self, scope: AccessScope, limit: int, student_id: int | None = None,
+                          subject_id: int | None = None, start_date: date | None = None,
+                          end_date: date | None = None, after: tuple | None = None) -> Page[Attendance]:
+        # Записи всех учеников, видимых пользователю; правило доступа применяется в SQL
+        raise NotImplementedError
+
     def get_by_student_and_subject(self, student_id: int, subject_id: int) -> list[Attendance]:
         raise NotImplementedError
     
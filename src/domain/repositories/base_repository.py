@@ -1,4 +1,4 @@
-from typing import TypeVar, Generic, Optional, List
+from typing import TypeVar, Generic, Optional, List, Callable
 
 T = TypeVar('T')
 
@@ -8,9 +8,16 @@ class BaseRepository(Generic[T]):
     def create(self, entity: T) -> T:
         raise NotImplementedError
     
+    def create_many(self, entities: List[T]) -> List[T]:
+        raise NotImplementedError
+    
     def get_by_id(self, entity_id: int) -> Optional[T]:
         raise NotImplementedError
     
+    def get_by_ids(self, entity_ids: List[int]) -> List[T]:
+        # Одним запросом (или несколькими для длинных списков) в порядке entity_ids, отсутствующие пропускаются
+        raise NotImplementedError
+    
     def get_all(self) -> List[T]:
         raise NotImplementedError
     
@@ -22,3 +29,15 @@ class BaseRepository(Generic[T]):
     
     def exists(self, entity_id: int) -> bool:
         return self.get_by_id(entity_id) is not None
+    
+    def add_change_listener(self, listener: Callable[[int, Optional[T]], None]):
+        # Подписчики (например, кеши) получают id измененной записи и новое состояние (None при удалении)
+        if not hasattr(self, '_change_listeners'):
+            self._change_listeners = []
+        self._change_listeners.append(listener)
+    
+    def _notify_change(self, entity_id: int | None, entity: Optional[T] = None):
+        if entity_id is None:
+            return
+        for listener in getattr(self, '_change_listeners', []):
+            listener(entity_id, entity)
@@ -0,0 +1,22 @@
+from datetime import date
+from typing import Any
+from domain.entities.access_scope import AccessScope
+
+
+class IDiaryRepository:
+
+    def get_student_diary(self, student_id: int, page_size: int, start_date: date | None = None,
+                          end_date: date | None = None, grades_after: tuple | None = None,
+                          attendance_after: tuple | None = None,
+                          scope: AccessScope | None = None) -> dict[str, Any] | None:
+        # scope - область доступа пользователя: оценки, посещаемость и статистика только по видимым ему предметам
+        raise NotImplementedError
+
+
+class IAsyncDiaryRepository:
+
+    async def get_student_diary(self, student_id: int, page_size: int, start_date: date | None = None,
+                                end_date: date | None = None, grades_after: tuple | None = None,
+                                attendance_after: tuple | None = None,
+                                scope: AccessScope | None = None) -> dict[str, Any] | None:
+        raise NotImplementedError
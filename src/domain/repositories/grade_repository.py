@@ -1,5 +1,8 @@
 from datetime import date
+from typing import Any
 from domain.entities.grade import Grade
+from domain.entities.access_scope import AccessScope
+from domain.entities.page import Page
 from domain.repositories.base_repository import BaseRepository
 
 
@@ -8,8 +11,35 @@ class IGradeRepository(BaseRepository[Grade]):
     def get_by_student(self, student_id: int) -> list[Grade]:
         raise NotImplementedError
     
+    def get_by_student_window(self, student_id: int, limit: int, start_date: date | None = None,
+                              end_date: date | None = None, after: tuple | None = None) -> Page[Grade]:
+        raise NotImplementedError
+    
+    def get_scoped_window(self, scope: AccessScope, limit: int, student_id: int | None = None,
+                          subject_id: int | None = None, start_date: date | None = None,
+                          end_date: date | None = None, after: tuple | None = None) -> Page[Grade]:
+        # Записи всех учеников, видимых пользователю; правило доступа применяется в SQL
+        raise NotImplementedError
+
     def get_by_student_and_subject(self, student_id: int, subject_id: int) -> list[Grade]:
         raise NotImplementedError
     
     def get_by_date_range(self, start_date: date, end_date: date) -> list[Grade]:
         raise NotImplementedError
+
+    def get_statistics(self, student_id: int, subject_id: int | None = None,
+                       start_date: date | None = None, end_date: date | None = None,
+                       scope: AccessScope | None = None) -> dict[str, Any]:
+        # scope - считать только оценки по предметам, видимым пользователю
+        raise NotImplementedError
+
+    def get_statistics_by_subject(self, student_id: int, start_date: date | None = None,
+                                  end_date: date | None = None,
+                                  scope: AccessScope | None = None) -> dict[int, dict[str, Any]]:
+        raise NotImplementedError
+
+    def get_summary(self, student_id: int) -> dict[int, dict[str, Any]]:
+        raise NotImplementedError
+
+    def rebuild_summary(self) -> int:
+        raise NotImplementedError
@@ -0,0 +1,19 @@
+from datetime import date
+from typing import Any, Iterator
+from domain.entities.access_scope import AccessScope
+from domain.entities.student import Student
+
+
+class IReportRepository:
+
+    def get_subject_report_dates(self, subject_id: int, start_date: date | None = None,
+                                 end_date: date | None = None,
+                                 scope: AccessScope | None = None) -> list[date]:
+        raise NotImplementedError
+
+    def iter_subject_report(self, subject_id: int, start_date: date | None = None,
+                            end_date: date | None = None,
+                            scope: AccessScope | None = None
+                            ) -> Iterator[tuple[Student, dict[date, dict[str, Any]]]]:
+        # Ячейка (ученик, дата): {'grades': все оценки за день, 'present': отметка посещаемости или None}
+        raise NotImplementedError
@@ -1,4 +1,5 @@
 from domain.entities.schedule import Schedule
+from domain.entities.schedule_conflict import ScheduleConflict
 from domain.repositories.base_repository import BaseRepository
 from datetime import time
 
@@ -14,3 +15,15 @@ class IScheduleRepository(BaseRepository[Schedule]):
     def get_filtered(self, day_of_week: int = None, subject_id: int = None,
                      time_start: time = None) -> list[Schedule]:
         raise NotImplementedError
+
+    def get_overlapping(self, day_of_week: int, time_from: time, time_to: time) -> list[Schedule]:
+        # Уроки дня, идущие в какой-то момент отрезка [time_from, time_to]
+        raise NotImplementedError
+
+    def find_conflicts(self, schedule: Schedule) -> list[ScheduleConflict]:
+        # Уроки, с которыми новый или измененный урок делит кабинет или учителя в то же время
+        raise NotImplementedError
+
+    def find_all_conflicts(self, schedules: list[Schedule] | None = None) -> list[ScheduleConflict]:
+        # Все пересечения в расписании (по умолчанию - в сохраненном)
+        raise NotImplementedError
@@ -1,3 +1,5 @@
+from domain.entities.access_scope import AccessScope
+from domain.entities.page import Page
 from domain.entities.student import Student
 from domain.repositories.base_repository import BaseRepository
 
@@ -9,3 +11,7 @@ class IStudentRepository(BaseRepository[Student]):
     
     def get_by_user_id(self, user_id: int) -> Student | None:
         raise NotImplementedError
+    
+    def get_page(self, limit: int, after: tuple | None = None, search: str | None = None,
+                 scope: AccessScope | None = None) -> Page[Student]:
+        raise NotImplementedError
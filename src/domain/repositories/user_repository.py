@@ -1,3 +1,4 @@
+from domain.entities.page import Page
 from domain.entities.user import User, UserRole
 from domain.repositories.base_repository import BaseRepository
 
@@ -13,12 +14,23 @@ class IUserRepository(BaseRepository[User]):
     def get_by_role(self, role: UserRole) -> list[User]:
         raise NotImplementedError
 
+    def get_page_by_role(self, role: UserRole, limit: int, after: tuple | None = None,
+                         search: str | None = None) -> Page[User]:
+        raise NotImplementedError
+
     def get_children_ids(self, parent_id: int) -> list[int]:
         raise NotImplementedError
 
     def is_parent_of(self, parent_id: int, child_id: int | str) -> bool:
         raise NotImplementedError
 
+    def get_accessible_student_ids(self, user_id: int) -> list[int]:
+        # Дети пользователя (parent_child) и его собственный профиль ученика (students.user_id)
+        raise NotImplementedError
+
+    def get_teacher_subject_ids(self, teacher_id: int) -> list[int]:
+        raise NotImplementedError
+
     def create_parent_child_relationship(self, parent_id: int, child_id: int, relationship: str = 'parent') -> bool:
         raise NotImplementedError
 
@@ -0,0 +1,45 @@
+import threading
+from typing import Any, Callable, Hashable
+
+
+class VersionedSnapshot:
+
+    def __init__(self, loader: Callable[[], Any], external_version: Callable[[], Hashable] | None = None):
+        self._loader = loader
+        # Версия данных в базе: меняется при записи из любого процесса, не только из этого
+        self._external_version = external_version
+        self._snapshot_external = None
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+        self._snapshot_version = -1
+        self.loads = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self) -> Any:
+        # Быстрый путь без блокировки: снимок неизменяем, ссылку можно читать из любого потока
+        external = self._external_version() if self._external_version else None
+        snapshot, snapshot_version = self._snapshot, self._snapshot_version
+        if snapshot is not None and snapshot_version == self._version and self._snapshot_external == external:
+            return snapshot
+
+        with self._lock:
+            if (self._snapshot is not None and self._snapshot_version == self._version
+                    and self._snapshot_external == external):
+                return self._snapshot
+            version = self._version
+            snapshot = self._loader()
+            self.loads += 1
+            # Если во время загрузки данные изменились, снимок отдаем, но не сохраняем
+            if version == self._version:
+                self._snapshot, self._snapshot_version = snapshot, version
+                self._snapshot_external = external
+            return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
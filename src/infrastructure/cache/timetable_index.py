@@ -0,0 +1,71 @@
+from bisect import bisect_left, bisect_right
+from datetime import time
+from typing import Iterable, NamedTuple
+from domain.entities.schedule import Schedule
+
+
+class _DayTimetable(NamedTuple):
+    # Уроки дня по времени начала и параллельный массив начал в секундах для bisect
+    lessons: tuple[Schedule, ...]
+    starts: tuple[int, ...]
+    # Самый длинный урок дня: урок, начавшийся раньше t - longest, к моменту t уже закончился
+    longest: int
+
+
+class TimetableIndex:
+
+    def __init__(self, lessons: Iterable[Schedule]):
+        by_day = {}
+        for lesson in lessons:
+            by_day.setdefault(lesson.day_of_week, []).append(lesson)
+
+        self._days = {}
+        for day, day_lessons in by_day.items():
+            day_lessons.sort(key=lambda lesson: (lesson.time_start, lesson.time_end, lesson.id))
+            self._days[day] = _DayTimetable(
+                tuple(day_lessons),
+                tuple(_seconds(lesson.time_start) for lesson in day_lessons),
+                max(max(_seconds(lesson.time_end) - _seconds(lesson.time_start), 0) for lesson in day_lessons)
+            )
+        self.days = tuple(sorted(self._days))
+        # Порядок как у ORDER BY day_of_week, time_start
+        self.lessons = tuple(lesson for day in self.days for lesson in self._days[day].lessons)
+
+    def day(self, day_of_week: int) -> tuple[Schedule, ...]:
+        timetable = self._days.get(day_of_week)
+        return timetable.lessons if timetable else ()
+
+    def starting_from(self, day_of_week: int, moment: time) -> tuple[Schedule, ...]:
+        # Уроки, начинающиеся в moment или позже
+        timetable = self._days.get(day_of_week)
+        if timetable is None:
+            return ()
+        return timetable.lessons[bisect_left(timetable.starts, _seconds(moment)):]
+
+    def overlapping(self, day_of_week: int, time_from: time, time_to: time) -> list[Schedule]:
+        # Уроки, идущие в какой-то момент отрезка [time_from, time_to]: начались не позже time_to
+        # и закончились позже time_from. При time_from == time_to - уроки, идущие в этот момент
+        timetable = self._days.get(day_of_week)
+        if timetable is None:
+            return []
+        start_from, start_to = _seconds(time_from), _seconds(time_to)
+        # Кандидаты - только уроки, начавшиеся не раньше чем за longest до time_from
+        low = bisect_right(timetable.starts, start_from - timetable.longest)
+        high = bisect_right(timetable.starts, start_to)
+        return [lesson for lesson in timetable.lessons[low:high] if _seconds(lesson.time_end) > start_from]
+
+    def filter(self, day_of_week: int | None = None, subject_id: int | None = None,
+               time_start: time | None = None) -> list[Schedule]:
+        days = self.days if day_of_week is None else (day_of_week,)
+        lessons = []
+        for day in days:
+            day_lessons = self.starting_from(day, time_start) if time_start is not None else self.day(day)
+            if subject_id is None:
+                lessons.extend(day_lessons)
+            else:
+                lessons.extend(lesson for lesson in day_lessons if lesson.subject_id == subject_id)
+        return lessons
+
+
+def _seconds(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+_MISSING = object()
+
+
+class TTLCache:
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0,
+                 external_version: Callable[[Hashable], Hashable] | None = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        # Версия данных ключа в базе (запись из другого процесса): запись с устаревшей версией
+        # считается промахом, остальные записи кеша не трогаются
+        self._external_version = external_version
+        self._data: OrderedDict[Hashable, tuple[float, Hashable, Any]] = OrderedDict()
+        # Версия, увиденная при промахе: значение, загруженное после него, не новее этой версии
+        self._pending: dict[Hashable, Hashable] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        external = self._external_version(key) if self._external_version else None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= now or item[1] != external:
+                if item is not None:
+                    del self._data[key]
+                if len(self._pending) >= self.max_size:
+                    self._pending.clear()
+                self._pending[key] = external
+                self.misses += 1
+                return default
+            # LRU: недавно использованные записи вытесняются последними
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[2]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            version = self._pending.pop(key, _MISSING)
+        if version is _MISSING:
+            version = self._external_version(key) if self._external_version else None
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
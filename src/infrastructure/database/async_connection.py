@@ -0,0 +1,59 @@
+import asyncio
+import contextvars
+import functools
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from infrastructure.database.connection import DatabaseConnection
+from infrastructure.database.pragmas import pragma_statements
+
+try:
+    import aiosqlite
+except ImportError:  # Необязательная зависимость: без нее запросы выполняются в пуле потоков
+    aiosqlite = None
+
+
+ASYNC_DRIVERS = ('thread', 'aiosqlite')
+
+
+class AsyncDatabaseConnection:
+
+    def __init__(self, db_connection: DatabaseConnection, driver: str = 'thread', max_workers: int = 4):
+        if driver not in ASYNC_DRIVERS:
+            raise ValueError(f'Неизвестный асинхронный драйвер: {driver}')
+        if driver == 'aiosqlite' and aiosqlite is None:
+            raise ValueError('Драйвер aiosqlite не установлен (pip install aiosqlite)')
+        self.db = db_connection
+        self.driver = driver
+        # Общий ограниченный пул потоков: Flask создает цикл событий на каждый запрос,
+        # и у каждого цикла был бы свой исполнитель по умолчанию
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='async-db')
+
+    async def run_sync(self, func: Callable, *args, **kwargs) -> Any:
+        # Контекст копируется, чтобы запросы попали в сборщик текущего HTTP-запроса
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def execute_query(self, query: str, params: tuple = ()) -> list:
+        if self.driver == 'thread':
+            return await self.run_sync(self.db.execute_query, query, params)
+
+        # Отдельное соединение на запрос: одно соединение aiosqlite выполняет запросы по очереди,
+        # а параллельным чтениям в WAL нужны разные соединения
+        async with aiosqlite.connect(self.db.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            for statement in pragma_statements(self.db.pragmas):
+                await conn.execute(statement)
+            if self.db.trace_statements:
+                await conn.set_trace_callback(self.db.notify_statement)
+            started = time.perf_counter()
+            async with conn.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+            self.db.record_query(query, params, started, len(rows))
+            return rows
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -1,47 +1,232 @@
+import contextvars
+import logging
 import sqlite3
 import os
+import threading
+import time
 
 from contextlib import contextmanager
+from typing import Iterator
+
+from infrastructure.database.instrumentation import QueryCollector, QueryRecord, describe_params, normalize_statement
+from infrastructure.database.pool import ConnectionPool
+from infrastructure.database.pragmas import apply_pragmas
+from infrastructure.database.search import casefold
+
+logger = logging.getLogger(__name__)
 
 
 class DatabaseConnection:
-    
-    def __init__(self, db_path: str = "instance/diary.db"):
+
+    def __init__(self, db_path: str = "instance/diary.db", pool_size: int = 0,
+                 pool_idle_timeout: float = 300.0, pool_health_check_interval: float = 30.0,
+                 pool_acquire_timeout: float = 10.0, pragmas: dict | None = None,
+                 trace_statements: bool = False, slow_query_threshold_ms: float | None = None,
+                 explain_slow_queries: bool = False):
         self.db_path = db_path
+        # None - журнал медленных запросов отключен
+        self.slow_query_threshold_ms = slow_query_threshold_ms
+        self.explain_slow_queries = explain_slow_queries
+        self.pragmas = pragmas or {}
+        self.trace_statements = trace_statements
+        self._statement_listeners = []
         self._ensure_db_directory()
-    
+
+        # pool_size = 0 - прежний режим: новое соединение на каждый запрос
+        self._pool = None
+        self._local = threading.local()
+        # Сборщик запросов хранится в контексте, а не в потоке: он виден и в потоках, куда асинхронный
+        # слой переносит запросы (контекст копируется вместе с задачей)
+        self._collector = contextvars.ContextVar(f'query_collector_{id(self)}', default=None)
+        if pool_size > 0:
+            self._pool = ConnectionPool(
+                self._create_connection,
+                max_size=pool_size,
+                idle_timeout=pool_idle_timeout,
+                health_check_interval=pool_health_check_interval,
+                acquire_timeout=pool_acquire_timeout
+            )
+
     def _ensure_db_directory(self):
         db_dir = os.path.dirname(self.db_path)
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir)
-    
+
+    def _create_connection(self) -> sqlite3.Connection:
+        # Соединение из пула может перейти в другой поток, но используется только одним потоком за раз
+        conn = sqlite3.connect(self.db_path, check_same_thread=self._pool is None)
+        conn.row_factory = sqlite3.Row  # Для доступа к колонкам по имени
+        # PRAGMA применяются один раз при открытии, в пуле - один раз на соединение
+        apply_pragmas(conn, self.pragmas)
+        conn.create_function('casefold', 1, casefold, deterministic=True)
+        if self.trace_statements:
+            # Трассировка видит все выполненные SQLite выражения, включая запросы мимо execute_*
+            conn.set_trace_callback(self.notify_statement)
+        return conn
+
+    def create_dedicated_connection(self) -> sqlite3.Connection:
+        # Отдельное соединение вне пула (например, для отслеживания PRAGMA data_version)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def add_statement_listener(self, listener):
+        self._statement_listeners.append(listener)
+
+    def remove_statement_listener(self, listener):
+        self._statement_listeners.remove(listener)
+
+    def notify_statement(self, statement: str):
+        for listener in self._statement_listeners:
+            listener(statement)
+
     @contextmanager
     def get_connection(self):
-        conn = None
+        # Вложенные вызовы в том же потоке используют уже выданное соединение
+        if getattr(self._local, 'conn', None) is not None:
+            yield self._local.conn
+            return
+
+        conn = self._pool.acquire() if self._pool is not None else self._create_connection()
+        self._local.conn = conn
+        discard = False
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Для доступа к колонкам по имени
             yield conn
         except Exception as e:
-            if conn:
+            try:
                 conn.rollback()
+            except sqlite3.Error:
+                discard = True
             raise e
         finally:
-            if conn:
+            self._local.conn = None
+            if self._pool is not None:
+                self._pool.release(conn, discard=discard)
+            else:
                 conn.close()
-    
+
+    @contextmanager
+    def transaction(self):
+        # Все запросы внутри блока (в том же потоке) выполняются в одной транзакции
+        with self.get_connection() as conn:
+            if getattr(self._local, 'in_transaction', False):
+                yield conn
+                return
+
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.in_transaction = True
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._local.in_transaction = False
+
+    def get_pool_stats(self) -> dict[str, float] | None:
+        if self._pool is None:
+            return None
+        return self._pool.get_stats()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+
+    def start_collecting(self) -> QueryCollector:
+        # Сборщик привязан к контексту текущего HTTP-запроса
+        collector = QueryCollector()
+        self._collector.set(collector)
+        return collector
+
+    def stop_collecting(self) -> QueryCollector | None:
+        collector = self._collector.get()
+        self._collector.set(None)
+        return collector
+
     def execute_query(self, query: str, params: tuple = ()) -> list:
         with self.get_connection() as conn:
+            started = time.perf_counter()
             cursor = conn.execute(query, params)
-            return cursor.fetchall()
-    
+            rows = cursor.fetchall()
+            self.record_query(query, params, started, len(rows), conn)
+            return rows
+
+    def iter_query(self, query: str, params: tuple = (), fetch_size: int = 500) -> Iterator:
+        # Строки читаются порциями, соединение удерживается до конца итерации
+        with self.get_connection() as conn:
+            started = time.perf_counter()
+            cursor = conn.execute(query, params)
+            row_count = 0
+            try:
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    row_count += len(rows)
+                    yield from rows
+            finally:
+                self.record_query(query, params, started, row_count, conn)
+
     def execute_update(self, query: str, params: tuple = ()) -> int:
         with self.get_connection() as conn:
+            started = time.perf_counter()
             cursor = conn.execute(query, params)
-            conn.commit()
+            self._commit(conn)
+            self.record_query(query, params, started, cursor.rowcount, conn)
             return cursor.lastrowid
-    
+
     def execute_many(self, query: str, params_list: list) -> None:
+        params_list = list(params_list)
         with self.get_connection() as conn:
-            conn.executemany(query, params_list)
+            started = time.perf_counter()
+            cursor = conn.executemany(query, params_list)
+            self._commit(conn)
+            self.record_query(query, params_list[0] if params_list else (), started, cursor.rowcount, conn)
+
+    def insert_many(self, query: str, params_list: list) -> list[int]:
+        params_list = list(params_list)
+        if not params_list:
+            return []
+        with self.transaction() as conn:
+            started = time.perf_counter()
+            cursor = conn.executemany(query, params_list)
+            self.record_query(query, params_list[0], started, cursor.rowcount, conn)
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        # Внутри одной пишущей транзакции AUTOINCREMENT выдает идентификаторы подряд
+        first_id = last_id - len(params_list) + 1
+        return list(range(first_id, last_id + 1))
+
+    def _commit(self, conn: sqlite3.Connection):
+        # Внутри transaction() фиксация выполняется один раз при выходе из блока
+        if not getattr(self._local, 'in_transaction', False):
             conn.commit()
+
+    def record_query(self, query: str, params, started: float, rows: int, conn: sqlite3.Connection | None = None):
+        collector = self._collector.get()
+        threshold = self.slow_query_threshold_ms
+        if collector is None and threshold is None:
+            return
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        record = QueryRecord(normalize_statement(query), describe_params(params), duration_ms, rows)
+
+        if threshold is not None and duration_ms >= threshold:
+            if self.explain_slow_queries and conn is not None:
+                record.plan = self._explain(conn, query, params)
+            logger.warning('Медленный запрос %.1f мс (%s строк, параметры %s): %s%s',
+                           duration_ms, rows, record.params_shape, record.statement,
+                           ''.join(f'\n    {line}' for line in record.plan or []))
+
+        if collector is not None:
+            collector.add(record)
+
+    def _explain(self, conn: sqlite3.Connection, query: str, params) -> list[str]:
+        try:
+            rows = conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+        except sqlite3.Error as e:
+            return [f'EXPLAIN QUERY PLAN недоступен: {e}']
+        return [row['detail'] for row in rows]
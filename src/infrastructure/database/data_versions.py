@@ -0,0 +1,92 @@
+import sqlite3
+import threading
+import time
+
+from infrastructure.database.connection import DatabaseConnection
+
+
+class DataVersionTracker:
+
+    def __init__(self, db_connection: DatabaseConnection, poll_interval: float = 0.2):
+        self.db = db_connection
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._conn = None
+        self._data_version = None
+        self._versions: dict[str, int] = {}
+        # Журнал data_changes: (таблица, id пользователя) -> номер последнего изменения
+        self._row_versions: dict[tuple[str, int], int] = {}
+        self._change_seq = None
+        # Если журнал успели обрезать раньше, чем процесс его дочитал, - все записи считаются измененными
+        self._change_floor = 0
+        self._polled_at = float('-inf')
+        self.reads = 0
+
+    def version(self, name: str) -> int:
+        self._poll()
+        return self._versions.get(name, 0)
+
+    def versions(self, *names: str) -> tuple[int, ...]:
+        self._poll()
+        return tuple(self._versions.get(name, 0) for name in names)
+
+    def row_version(self, row_id: int, *names: str) -> int:
+        # Версия данных одного пользователя в перечисленных таблицах
+        self._poll()
+        return max([self._change_floor] + [self._row_versions.get((name, row_id), 0) for name in names])
+
+    def refresh(self):
+        self._poll(force=True)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _poll(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._polled_at < self.poll_interval:
+            return
+
+        with self._lock:
+            if not force and now - self._polled_at < self.poll_interval:
+                return
+            try:
+                if self._conn is None:
+                    self._conn = self.db.create_dedicated_connection()
+                # PRAGMA data_version меняется, только если другое соединение (в любом процессе) что-то
+                # зафиксировало - тогда читаем таблицу версий, иначе не обращаемся к ней вовсе
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                if force or data_version != self._data_version:
+                    rows = self._conn.execute("SELECT name, version FROM data_versions").fetchall()
+                    self._versions = {row['name']: row['version'] for row in rows}
+                    self._read_changes()
+                    self._data_version = data_version
+                    self.reads += 1
+            except sqlite3.Error:
+                # При сбое соединения пересоздаем его при следующей проверке
+                if self._conn is not None:
+                    self._conn.close()
+                self._conn = None
+                raise
+            finally:
+                self._polled_at = now
+
+    def _read_changes(self):
+        if self._change_seq is None:
+            # Изменения до запуска процесса кешам не нужны - начинаем с конца журнала
+            self._change_seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM data_changes").fetchone()[0]
+            return
+        rows = self._conn.execute(
+            "SELECT seq, name, row_id FROM data_changes WHERE seq > ? ORDER BY seq", (self._change_seq,)
+        ).fetchall()
+        if not rows:
+            return
+        if rows[0]['seq'] > self._change_seq + 1:
+            # Часть журнала уже удалена: какие пользователи менялись, неизвестно
+            self._change_floor = rows[0]['seq']
+            self._row_versions.clear()
+        for row in rows:
+            self._row_versions[(row['name'], row['row_id'])] = row['seq']
+        self._change_seq = rows[-1]['seq']
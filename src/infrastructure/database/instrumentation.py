@@ -0,0 +1,56 @@
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class QueryRecord:
+    statement: str
+    params_shape: str
+    duration_ms: float
+    rows: int
+    plan: list[str] | None = None
+
+    def __repr__(self):
+        return f'<QueryRecord {self.duration_ms:.2f} ms, {self.rows} rows>'
+
+
+@dataclass
+class QueryCollector:
+    records: list[QueryRecord] = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def add(self, record: QueryRecord):
+        self.records.append(record)
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def total_duration_ms(self) -> float:
+        return sum(record.duration_ms for record in self.records)
+
+    def repeated_statements(self, min_repeats: int) -> dict[str, int]:
+        # Один и тот же текст запроса много раз за запрос - признак N+1
+        counts = {}
+        for record in self.records:
+            counts[record.statement] = counts.get(record.statement, 0) + 1
+        return {statement: count for statement, count in counts.items() if count >= min_repeats}
+
+    def server_timing(self) -> str:
+        total_ms = (time.perf_counter() - self.started_at) * 1000
+        return (f'db;dur={self.total_duration_ms:.2f};desc="{self.count} queries", '
+                f'app;dur={total_ms:.2f}')
+
+
+def normalize_statement(query: str) -> str:
+    return ' '.join(query.split())
+
+
+def describe_params(params) -> str:
+    # В лог попадают только типы параметров, значения могут содержать персональные данные
+    if not params:
+        return '()'
+    if isinstance(params, dict):
+        return '{' + ', '.join(f'{name}: {type(value).__name__}' for name, value in params.items()) + '}'
+    return '(' + ', '.join(type(value).__name__ for value in params) + ')'
@@ -0,0 +1,151 @@
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+
+from infrastructure.database.connection import DatabaseConnection
+from infrastructure.database.schema import (CREATE_TABLES_SQL, INDEXES_SQL, TRIGGERS_SQL, REBUILD_GRADE_SUMMARY_SQL,
+                                            DATA_VERSIONS_SQL, DROP_GRADE_VERSIONS_SQL, DATA_CHANGES_SQL)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    duration_ms REAL
+)
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+    # per_statement - каждое выражение в своей транзакции. Это не онлайн-построение: CREATE INDEX
+    # держит блокировку записи, пока строится индекс, но только на время одного выражения, а не всей
+    # миграции - между выражениями успевают пройти записи приложения. На большой базе такую миграцию
+    # лучше выполнить заранее командой manage.py migrate, а не при старте приложения.
+    # Выражения должны быть идемпотентными (IF NOT EXISTS / IF EXISTS) - после сбоя миграция повторяется целиком
+    per_statement: bool = False
+
+
+# Номера только растут, выпущенную миграцию не меняют - изменения схемы добавляются новой миграцией.
+# Первые миграции повторяют прежний executescript при старте и идемпотентны, поэтому базы, созданные
+# до появления schema_version, догоняют их без ручных действий
+MIGRATIONS = (
+    Migration(1, 'initial_schema', CREATE_TABLES_SQL),
+    Migration(2, 'grade_summary_triggers', TRIGGERS_SQL + REBUILD_GRADE_SUMMARY_SQL),
+    Migration(3, 'composite_indexes', INDEXES_SQL, per_statement=True),
+    Migration(4, 'data_versions', DATA_VERSIONS_SQL),
+    Migration(5, 'user_data_changes', DROP_GRADE_VERSIONS_SQL + DATA_CHANGES_SQL),
+)
+
+
+def split_statements(script: str) -> list[str]:
+    # executescript сам фиксирует открытую транзакцию, поэтому скрипт выполняется по выражениям.
+    # complete_statement учитывает точки с запятой внутри BEGIN ... END триггеров
+    statements = []
+    buffer = ''
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ''
+    return statements
+
+
+class MigrationRunner:
+
+    def __init__(self, db_connection: DatabaseConnection, migrations: tuple = MIGRATIONS,
+                 statement_pause: float = 0.05):
+        self.db = db_connection
+        self.migrations = sorted(migrations, key=lambda migration: migration.version)
+        # Пауза после долгого выражения per_statement-миграции, чтобы ожидающие записи получили блокировку
+        self.statement_pause = statement_pause
+
+    @property
+    def latest_version(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def current_version(self) -> int:
+        # Единственный запрос на старте, когда схема актуальна
+        with self.db.get_connection() as conn:
+            try:
+                row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+            except sqlite3.OperationalError:
+                # Таблицы еще нет - новая база или база, созданная до появления миграций
+                return 0
+        return row[0] or 0
+
+    def applied(self) -> list[dict]:
+        with self.db.get_connection() as conn:
+            try:
+                rows = conn.execute(
+                    "SELECT version, name, applied_at, duration_ms FROM schema_version ORDER BY version"
+                ).fetchall()
+            except sqlite3.OperationalError:
+                return []
+        return [dict(row) for row in rows]
+
+    def pending(self, current: int | None = None) -> list[Migration]:
+        current = self.current_version() if current is None else current
+        return [migration for migration in self.migrations if migration.version > current]
+
+    def migrate(self, target: int | None = None) -> list[Migration]:
+        pending = [migration for migration in self.pending()
+                   if target is None or migration.version <= target]
+        if not pending:
+            return []
+
+        with self.db.get_connection() as conn:
+            conn.execute(SCHEMA_VERSION_SQL)
+            conn.commit()
+
+        applied = []
+        for migration in pending:
+            if self._apply(migration):
+                applied.append(migration)
+        return applied
+
+    def _apply(self, migration: Migration) -> bool:
+        started = time.perf_counter()
+        statements = split_statements(migration.sql)
+
+        if migration.per_statement:
+            for statement in statements:
+                if self._is_applied(migration.version):
+                    return False
+                statement_started = time.perf_counter()
+                with self.db.transaction() as conn:
+                    conn.execute(statement)
+                if time.perf_counter() - statement_started > self.statement_pause:
+                    time.sleep(self.statement_pause)
+            statements = []
+
+        with self.db.transaction() as conn:
+            # Несколько процессов могут стартовать одновременно: BEGIN IMMEDIATE упорядочивает их,
+            # а повторная проверка версии внутри транзакции не дает применить миграцию дважды
+            if self._is_applied(migration.version):
+                return False
+            for statement in statements:
+                conn.execute(statement)
+            duration_ms = (time.perf_counter() - started) * 1000
+            conn.execute(
+                "INSERT INTO schema_version (version, name, duration_ms) VALUES (?, ?, ?)",
+                (migration.version, migration.name, duration_ms)
+            )
+
+        if migration.per_statement:
+            # Обновляем статистику планировщика для новых индексов
+            with self.db.get_connection() as conn:
+                conn.execute("PRAGMA optimize")
+        logger.info("Применена миграция %s_%s за %.0f мс", migration.version, migration.name, duration_ms)
+        return True
+
+    def _is_applied(self, version: int) -> bool:
+        with self.db.get_connection() as conn:
+            row = conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone()
+        return row is not None
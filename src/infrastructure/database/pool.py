@@ -0,0 +1,164 @@
+import sqlite3
+import threading
+import time
+
+from typing import Callable
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+
+    def __init__(self, factory: Callable[[], sqlite3.Connection], max_size: int = 5,
+                 idle_timeout: float = 300.0, health_check_interval: float = 30.0,
+                 acquire_timeout: float = 10.0):
+        self._factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        # Свободные соединения хранятся стеком: последнее возвращенное - самое "теплое"
+        self._idle: list[tuple[sqlite3.Connection, float]] = []
+        self._size = 0  # Всего открытых соединений (свободные + выданные)
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'evicted': 0,
+            'discarded': 0,
+            'health_check_failures': 0,
+            'timeouts': 0,
+            'acquired': 0,
+            'waited': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    def acquire(self) -> sqlite3.Connection:
+        started = time.monotonic()
+        conn = None
+        released_at = None
+        waited = False
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('Пул соединений закрыт')
+            self._evict_idle_locked(started)
+            while True:
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Резервируем место, само соединение открываем вне блокировки
+                    self._size += 1
+                    break
+                remaining = self.acquire_timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f'Не удалось получить соединение за {self.acquire_timeout} с '
+                        f'(размер пула {self.max_size})'
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+        if conn is not None and not self._is_healthy(conn, released_at):
+            self._close_quietly(conn)
+            conn = None
+            with self._cond:
+                self._stats['health_check_failures'] += 1
+
+        reused = conn is not None
+        if conn is None:
+            try:
+                conn = self._factory()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        wait_time = time.monotonic() - started
+        with self._cond:
+            self._stats['acquired'] += 1
+            self._stats['reused' if reused else 'created'] += 1
+            if waited:
+                self._stats['waited'] += 1
+            self._stats['wait_time_total'] += wait_time
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], wait_time)
+        return conn
+
+    def release(self, conn: sqlite3.Connection, discard: bool = False):
+        if not discard and conn.in_transaction:
+            # Незавершенная транзакция не должна достаться следующему потребителю
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+                self._stats['discarded'] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._close_quietly(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def get_stats(self) -> dict[str, float]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['max_size'] = self.max_size
+        acquired = stats['acquired']
+        stats['wait_time_avg'] = stats['wait_time_total'] / acquired if acquired else 0.0
+        return stats
+
+    def _evict_idle_locked(self, now: float):
+        if self.idle_timeout is None or self.idle_timeout <= 0:
+            return
+        # Стек упорядочен по времени возврата, самые старые соединения - в начале
+        expired = 0
+        while expired < len(self._idle) and now - self._idle[expired][1] > self.idle_timeout:
+            expired += 1
+        if not expired:
+            return
+        stale, self._idle = self._idle[:expired], self._idle[expired:]
+        self._size -= expired
+        self._stats['evicted'] += expired
+        for conn, _ in stale:
+            self._close_quietly(conn)
+
+    def _is_healthy(self, conn: sqlite3.Connection, released_at: float) -> bool:
+        if time.monotonic() - released_at < self.health_check_interval:
+            return True
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
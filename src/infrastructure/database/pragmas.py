@@ -0,0 +1,57 @@
+import sqlite3
+
+
+# Порядок важен: busy_timeout ставим первым, чтобы смена journal_mode ждала блокировку, а не падала
+PRAGMA_PROFILES = {
+    # Настройки SQLite по умолчанию (rollback journal)
+    'default': {},
+    # Читатели не блокируют писателей и наоборот; NORMAL в WAL не теряет целостность при сбое
+    'wal': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,  # 16 МБ (отрицательное значение - в килобайтах)
+        'mmap_size': 134217728,  # 128 МБ
+        'temp_store': 'MEMORY',
+    },
+    # WAL с fsync на каждый коммит - для серверов без ИБП
+    'wal_durable': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16000,
+        'mmap_size': 134217728,
+        'temp_store': 'MEMORY',
+    },
+}
+
+ALLOWED_PRAGMAS = {'busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store',
+                   'foreign_keys', 'wal_autocheckpoint'}
+
+
+def resolve_pragmas(profile: str | None = None, overrides: dict | None = None) -> dict:
+    if profile and profile not in PRAGMA_PROFILES:
+        raise ValueError(f'Неизвестный профиль PRAGMA: {profile}')
+    pragmas = dict(PRAGMA_PROFILES.get(profile or 'default'))
+    if overrides:
+        pragmas.update(overrides)
+    return pragmas
+
+
+def pragma_statements(pragmas: dict) -> list[str]:
+    statements = []
+    for name, value in pragmas.items():
+        if name not in ALLOWED_PRAGMAS:
+            raise ValueError(f'Недопустимая PRAGMA: {name}')
+        if isinstance(value, bool):
+            value = int(value)
+        # Значения подставляются в текст запроса, поэтому допускаем только числа и идентификаторы
+        if not isinstance(value, (int, str)) or (isinstance(value, str) and not value.isalnum()):
+            raise ValueError(f'Недопустимое значение PRAGMA {name}: {value!r}')
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: dict):
+    for statement in pragma_statements(pragmas):
+        conn.execute(statement)
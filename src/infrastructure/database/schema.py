@@ -1,3 +1,5 @@
+# Схема применяется миграциями (infrastructure/database/migrations.py): после выпуска константы не меняются,
+# изменения схемы добавляются новой миграцией
 CREATE_TABLES_SQL = """
 -- Таблица пользователей
 CREATE TABLE IF NOT EXISTS users (
@@ -85,25 +87,207 @@ CREATE TABLE IF NOT EXISTS teacher_subject (
     FOREIGN KEY (teacher_id) REFERENCES users(id),
     FOREIGN KEY (subject_id) REFERENCES subjects(id)
 );
+
+-- Сводка оценок по ученику и предмету, поддерживается триггерами (TRIGGERS_SQL)
+CREATE TABLE IF NOT EXISTS grade_summary (
+    student_id INTEGER NOT NULL,
+    subject_id INTEGER NOT NULL,
+    grade_count INTEGER NOT NULL DEFAULT 0,
+    grade_sum INTEGER NOT NULL DEFAULT 0,
+    count_1 INTEGER NOT NULL DEFAULT 0,
+    count_2 INTEGER NOT NULL DEFAULT 0,
+    count_3 INTEGER NOT NULL DEFAULT 0,
+    count_4 INTEGER NOT NULL DEFAULT 0,
+    count_5 INTEGER NOT NULL DEFAULT 0,
+    last_date DATE,
+    PRIMARY KEY (student_id, subject_id),
+    FOREIGN KEY (student_id) REFERENCES students(id),
+    FOREIGN KEY (subject_id) REFERENCES subjects(id)
+);
 """
 
 INDEXES_SQL = """
--- Индексы для оптимизации запросов
-CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
-CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
-CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
-CREATE INDEX IF NOT EXISTS idx_students_class ON students(class_name);
+-- Индексы подобраны под запросы репозиториев: сначала колонки равенства из WHERE,
+-- затем колонка сортировки или диапазона, чтобы SQLite не строил временное B-дерево.
+-- Проверка планов всех запросов: python manage.py index-advisor
+
+-- Заменены составными индексами ниже или дублируют автоматические индексы UNIQUE
+DROP INDEX IF EXISTS idx_users_username;
+DROP INDEX IF EXISTS idx_users_email;
+DROP INDEX IF EXISTS idx_users_role;
+DROP INDEX IF EXISTS idx_students_class;
+DROP INDEX IF EXISTS idx_grades_student;
+DROP INDEX IF EXISTS idx_grades_student_date_grade;
+DROP INDEX IF EXISTS idx_grades_subject;
+DROP INDEX IF EXISTS idx_attendance_student;
+DROP INDEX IF EXISTS idx_attendance_subject;
+DROP INDEX IF EXISTS idx_schedule_day;
+DROP INDEX IF EXISTS idx_schedule_subject;
+DROP INDEX IF EXISTS idx_parent_child_parent;
+DROP INDEX IF EXISTS idx_teacher_subject_teacher;
+
+-- users: список по роли (get_by_role) и постраничный список по роли (get_page_by_role)
+CREATE INDEX IF NOT EXISTS idx_users_role_created ON users(role, created_at);
+CREATE INDEX IF NOT EXISTS idx_users_role_name ON users(role, last_name, first_name);
+
+-- students: класс в алфавитном порядке, поиск по пользователю, постраничный список (id - неявный rowid)
+CREATE INDEX IF NOT EXISTS idx_students_class_name ON students(class_name, name);
 CREATE INDEX IF NOT EXISTS idx_students_user_id ON students(user_id);
-CREATE INDEX IF NOT EXISTS idx_grades_student ON grades(student_id);
-CREATE INDEX IF NOT EXISTS idx_grades_subject ON grades(subject_id);
+CREATE INDEX IF NOT EXISTS idx_students_name ON students(name);
+
+CREATE INDEX IF NOT EXISTS idx_subjects_name ON subjects(name);
+
+-- grades: история ученика за период (порядок date, id берется из индекса с неявным rowid),
+-- оценки по предмету, отчет по предмету за период.
+-- grade в конце делает индекс по предмету покрывающим для статистики (GROUP BY grade без чтения таблицы)
+CREATE INDEX IF NOT EXISTS idx_grades_student_date ON grades(student_id, date);
+CREATE INDEX IF NOT EXISTS idx_grades_student_subject_date ON grades(student_id, subject_id, date, grade);
+CREATE INDEX IF NOT EXISTS idx_grades_subject_date ON grades(subject_id, date);
 CREATE INDEX IF NOT EXISTS idx_grades_date ON grades(date);
-CREATE INDEX IF NOT EXISTS idx_attendance_student ON attendance(student_id);
-CREATE INDEX IF NOT EXISTS idx_attendance_subject ON attendance(subject_id);
+
+CREATE INDEX IF NOT EXISTS idx_attendance_student_date ON attendance(student_id, date);
+CREATE INDEX IF NOT EXISTS idx_attendance_student_subject_date ON attendance(student_id, subject_id, date);
+CREATE INDEX IF NOT EXISTS idx_attendance_subject_date ON attendance(subject_id, date);
 CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance(date);
-CREATE INDEX IF NOT EXISTS idx_schedule_day ON schedule(day_of_week);
-CREATE INDEX IF NOT EXISTS idx_schedule_subject ON schedule(subject_id);
-CREATE INDEX IF NOT EXISTS idx_parent_child_parent ON parent_child(parent_id);
+
+-- schedule: день по времени, предмет (и предмет в конкретный день) по дню и времени
+CREATE INDEX IF NOT EXISTS idx_schedule_day_time ON schedule(day_of_week, time_start);
+CREATE INDEX IF NOT EXISTS idx_schedule_subject_day_time ON schedule(subject_id, day_of_week, time_start);
+
+-- Связи: покрывающие индексы для поиска в обе стороны
+CREATE INDEX IF NOT EXISTS idx_parent_child_parent_child ON parent_child(parent_id, child_id);
 CREATE INDEX IF NOT EXISTS idx_parent_child_child ON parent_child(child_id);
-CREATE INDEX IF NOT EXISTS idx_teacher_subject_teacher ON teacher_subject(teacher_id);
+CREATE INDEX IF NOT EXISTS idx_teacher_subject_teacher_subject ON teacher_subject(teacher_id, subject_id);
 CREATE INDEX IF NOT EXISTS idx_teacher_subject_subject ON teacher_subject(subject_id);
 """
+
+# Триггеры держат grade_summary в актуальном состоянии при любой записи в grades,
+# в том числе при массовой вставке и прямых SQL-запросах
+_SUMMARY_ADD_SQL = """
+    INSERT OR IGNORE INTO grade_summary (student_id, subject_id) VALUES (NEW.student_id, NEW.subject_id);
+    UPDATE grade_summary
+    SET grade_count = grade_count + 1,
+        grade_sum = grade_sum + NEW.grade,
+        count_1 = count_1 + (NEW.grade = 1),
+        count_2 = count_2 + (NEW.grade = 2),
+        count_3 = count_3 + (NEW.grade = 3),
+        count_4 = count_4 + (NEW.grade = 4),
+        count_5 = count_5 + (NEW.grade = 5),
+        last_date = CASE WHEN last_date IS NULL OR NEW.date > last_date THEN NEW.date ELSE last_date END
+    WHERE student_id = NEW.student_id AND subject_id = NEW.subject_id;
+"""
+
+_SUMMARY_REMOVE_SQL = """
+    UPDATE grade_summary
+    SET grade_count = grade_count - 1,
+        grade_sum = grade_sum - OLD.grade,
+        count_1 = count_1 - (OLD.grade = 1),
+        count_2 = count_2 - (OLD.grade = 2),
+        count_3 = count_3 - (OLD.grade = 3),
+        count_4 = count_4 - (OLD.grade = 4),
+        count_5 = count_5 - (OLD.grade = 5),
+        last_date = (SELECT MAX(date) FROM grades
+                     WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id)
+    WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id;
+    DELETE FROM grade_summary
+    WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id AND grade_count <= 0;
+"""
+
+TRIGGERS_SQL = f"""
+CREATE TRIGGER IF NOT EXISTS trg_grades_summary_insert AFTER INSERT ON grades
+BEGIN
+{_SUMMARY_ADD_SQL}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_grades_summary_delete AFTER DELETE ON grades
+BEGIN
+{_SUMMARY_REMOVE_SQL}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_grades_summary_update AFTER UPDATE OF student_id, subject_id, grade, date ON grades
+BEGIN
+{_SUMMARY_REMOVE_SQL}
+{_SUMMARY_ADD_SQL}
+END;
+"""
+
+REBUILD_GRADE_SUMMARY_SQL = """
+DELETE FROM grade_summary;
+INSERT INTO grade_summary (student_id, subject_id, grade_count, grade_sum,
+                           count_1, count_2, count_3, count_4, count_5, last_date)
+SELECT student_id, subject_id, COUNT(*), SUM(grade),
+       SUM(grade = 1), SUM(grade = 2), SUM(grade = 3), SUM(grade = 4), SUM(grade = 5), MAX(date)
+FROM grades
+GROUP BY student_id, subject_id;
+"""
+
+# Версии данных для согласования кешей между процессами (воркерами gunicorn).
+# Любая запись в таблицу увеличивает ее версию, воркеры сравнивают версии вместо перечитывания данных.
+# Список - как в выпущенной миграции 4; версию grades никто не читал, ее триггеры убирает миграция 5
+DATA_VERSION_TABLES = ('users', 'students', 'subjects', 'schedule', 'parent_child', 'teacher_subject', 'grades')
+
+DATA_VERSIONS_SQL = """
+CREATE TABLE IF NOT EXISTS data_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+""" + "".join(f"""
+INSERT OR IGNORE INTO data_versions (name) VALUES ('{table}');
+""" + "".join(f"""
+CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{operation.lower()} AFTER {operation} ON {table}
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+END;
+""" for operation in ('INSERT', 'UPDATE', 'DELETE')) for table in DATA_VERSION_TABLES)
+
+DROP_GRADE_VERSIONS_SQL = "".join(f"""
+DROP TRIGGER IF EXISTS trg_grades_version_{operation.lower()};
+""" for operation in ('insert', 'update', 'delete')) + """
+DELETE FROM data_versions WHERE name = 'grades';
+"""
+
+# Журнал изменений по пользователям: кеши пользователей и областей доступа сверяют версию каждой
+# записи отдельно, поэтому запись одного пользователя в другом процессе сбрасывает только его записи.
+# row_id - id затронутого пользователя; при изменении связи пишутся и прежний, и новый владелец
+USER_CHANGE_COLUMNS = {
+    'users': 'id',
+    'students': 'user_id',
+    'parent_child': 'parent_id',
+    'teacher_subject': 'teacher_id',
+}
+# Сколько последних изменений хранится; отставший сильнее процесс сбрасывает кеши целиком
+DATA_CHANGES_KEEP = 10000
+
+DATA_CHANGES_SQL = f"""
+CREATE TABLE IF NOT EXISTS data_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(50) NOT NULL,
+    row_id INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_data_changes_prune AFTER INSERT ON data_changes
+WHEN NEW.seq % 100 = 0
+BEGIN
+    DELETE FROM data_changes WHERE seq <= NEW.seq - {DATA_CHANGES_KEEP};
+END;
+""" + "".join(f"""
+CREATE TRIGGER IF NOT EXISTS trg_{table}_change_insert AFTER INSERT ON {table}
+WHEN NEW.{column} IS NOT NULL
+BEGIN
+    INSERT INTO data_changes (name, row_id) VALUES ('{table}', NEW.{column});
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_{table}_change_update AFTER UPDATE ON {table}
+BEGIN
+    INSERT INTO data_changes (name, row_id)
+    SELECT '{table}', OLD.{column} WHERE OLD.{column} IS NOT NULL;
+    INSERT INTO data_changes (name, row_id)
+    SELECT '{table}', NEW.{column} WHERE NEW.{column} IS NOT NULL AND NEW.{column} IS NOT OLD.{column};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_{table}_change_delete AFTER DELETE ON {table}
+WHEN OLD.{column} IS NOT NULL
+BEGIN
+    INSERT INTO data_changes (name, row_id) VALUES ('{table}', OLD.{column});
+END;
+""" for table, column in USER_CHANGE_COLUMNS.items())
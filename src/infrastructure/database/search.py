@@ -0,0 +1,15 @@
+# Поиск по подстроке без учета регистра. Встроенные LIKE и lower() в SQLite понимают регистр
+# только для латиницы, поэтому для кириллицы соединения регистрируют функцию casefold
+LIKE_ESCAPE = '\\'
+
+
+def casefold(value: str | None) -> str | None:
+    return value.casefold() if value is not None else None
+
+
+def contains_pattern(term: str) -> str:
+    escaped = (term.casefold()
+               .replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+               .replace('%', LIKE_ESCAPE + '%')
+               .replace('_', LIKE_ESCAPE + '_'))
+    return f'%{escaped}%'
@@ -0,0 +1,38 @@
+from domain.entities.access_scope import AccessScope
+
+# Ученики пользователя прямо в SQL: дети по parent_child и собственный профиль по students.user_id
+ACCESSIBLE_STUDENTS_SQL = """
+SELECT child_id AS student_id FROM parent_child WHERE parent_id = ?
+UNION
+SELECT id AS student_id FROM students WHERE user_id = ?
+"""
+
+# Предметы учителя по teacher_subject
+TEACHER_SUBJECTS_SQL = "SELECT subject_id FROM teacher_subject WHERE teacher_id = ?"
+
+
+def access_scope_filter(column: str, scope: AccessScope | None) -> tuple[str | None, tuple]:
+    # Условие видимости для WHERE списка: база возвращает только разрешенные строки, поэтому
+    # LIMIT и курсор страницы считаются уже после фильтрации. None - ограничений нет
+    if scope is None or scope.unrestricted:
+        return None, ()
+    if scope.user_id is None:
+        return "0", ()
+    return f"{column} IN ({ACCESSIBLE_STUDENTS_SQL})", (scope.user_id, scope.user_id)
+
+
+def record_scope_filter(alias: str, scope: AccessScope | None, subject_index: bool = True) -> tuple[list[str], tuple]:
+    # Условия для оценок и посещаемости: ученик из области доступа и, для учителя
+    # с назначенными предметами, предмет из teacher_subject.
+    # subject_index=False не дает выбрать индекс по предмету: для ленты последних записей быстрее
+    # идти по индексу даты и отбрасывать чужие предметы, чем сортировать все записи предметов учителя
+    conditions, params = [], ()
+    student_condition, student_params = access_scope_filter(f"{alias}.student_id", scope)
+    if student_condition is not None:
+        conditions.append(student_condition)
+        params += student_params
+    if scope is not None and scope.subject_ids is not None:
+        column = f"{alias}.subject_id" if subject_index else f"+{alias}.subject_id"
+        conditions.append(f"{column} IN ({TEACHER_SUBJECTS_SQL})")
+        params += (scope.user_id,)
+    return conditions, params
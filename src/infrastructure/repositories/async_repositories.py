@@ -0,0 +1,75 @@
+import asyncio
+import functools
+from datetime import date
+from typing import Any
+from domain.entities.access_scope import AccessScope
+from domain.repositories.diary_repository import IAsyncDiaryRepository
+from infrastructure.database.async_connection import AsyncDatabaseConnection
+from infrastructure.repositories.diary_repository import (DiaryRowMapper, STUDENT_SQL, SUBJECTS_SQL, SCHEDULE_SQL,
+                                                          history_page_sql)
+
+
+class AsyncRepository:
+
+    def __init__(self, repository, async_db: AsyncDatabaseConnection):
+        # Асинхронный вариант любого репозитория: те же методы интерфейса, выполняемые в пуле потоков
+        self.repository = repository
+        self.async_db = async_db
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.repository, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def call(*args, **kwargs):
+            return await self.async_db.run_sync(attribute, *args, **kwargs)
+
+        return call
+
+
+class AsyncDiaryRepository(IAsyncDiaryRepository, DiaryRowMapper):
+
+    def __init__(self, async_db: AsyncDatabaseConnection, grade_repo: AsyncRepository,
+                 subject_repo: AsyncRepository | None = None, schedule_repo: AsyncRepository | None = None):
+        self.db = async_db
+        self.grade_repo = grade_repo
+        self.subject_repo = subject_repo
+        self.schedule_repo = schedule_repo
+
+    async def get_student_diary(self, student_id: int, page_size: int, start_date: date | None = None,
+                                end_date: date | None = None, grades_after: tuple | None = None,
+                                attendance_after: tuple | None = None,
+                                scope: AccessScope | None = None) -> dict[str, Any] | None:
+        # Независимые чтения выполняются одновременно на разных соединениях
+        student_rows, subjects, grade_rows, attendance_rows, grade_statistics, schedule = await asyncio.gather(
+            self.db.execute_query(STUDENT_SQL, (student_id,)),
+            self._get_subjects(),
+            self.db.execute_query(
+                *history_page_sql('grades', student_id, page_size, start_date, end_date, grades_after, scope)),
+            self.db.execute_query(
+                *history_page_sql('attendance', student_id, page_size, start_date, end_date, attendance_after, scope)),
+            self.grade_repo.get_statistics(student_id, None, start_date, end_date, scope),
+            self._get_schedule()
+        )
+        if not student_rows:
+            return None
+
+        return {
+            'student': self._row_to_student(student_rows[0]),
+            'grades': self._rows_to_page(grade_rows, self._row_to_grade, page_size),
+            'attendance': self._rows_to_page(attendance_rows, self._row_to_attendance, page_size),
+            'grade_statistics': grade_statistics,
+            'schedule': schedule,
+            'subjects': subjects
+        }
+
+    async def _get_subjects(self) -> list:
+        if self.subject_repo is not None:
+            return await self.subject_repo.get_all()
+        return [self._row_to_subject(row) for row in await self.db.execute_query(SUBJECTS_SQL)]
+
+    async def _get_schedule(self) -> list:
+        if self.schedule_repo is not None:
+            return await self.schedule_repo.get_all()
+        return [self._row_to_schedule(row) for row in await self.db.execute_query(SCHEDULE_SQL)]
@@ -1,7 +1,12 @@
 from datetime import date
 from domain.entities.attendance import Attendance
+from domain.entities.access_scope import AccessScope
+from domain.entities.page import Page
 from domain.repositories.attendance_repository import IAttendanceRepository
 from infrastructure.database.connection import DatabaseConnection
+from infrastructure.repositories.batch import select_by_ids
+from infrastructure.repositories.history_window import (HISTORY_ORDER, history_next_after, history_window_filter,
+                                                         scoped_history_filter)
 
 
 class AttendanceRepository(IAttendanceRepository):
@@ -22,18 +27,53 @@ class AttendanceRepository(IAttendanceRepository):
         attendance.id = attendance_id
         return attendance
     
+    def create_many(self, attendance_list: list[Attendance]) -> list[Attendance]:
+        query = """
+        INSERT INTO attendance (student_id, subject_id, date, present, reason)
+        VALUES (?, ?, ?, ?, ?)
+        """
+        attendance_ids = self.db.insert_many(
+            query,
+            [(attendance.student_id, attendance.subject_id, attendance.date,
+              attendance.present, attendance.reason) for attendance in attendance_list]
+        )
+        for attendance, attendance_id in zip(attendance_list, attendance_ids):
+            attendance.id = attendance_id
+        return attendance_list
+    
     def get_by_id(self, attendance_id: int) -> Attendance | None:
         query = "SELECT * FROM attendance WHERE id = ?"
         rows = self.db.execute_query(query, (attendance_id,))
         if rows:
             return self._row_to_attendance(rows[0])
         return None
+
+    def get_by_ids(self, attendance_ids: list[int]) -> list[Attendance]:
+        query = "SELECT * FROM attendance WHERE id IN ({placeholders})"
+        return select_by_ids(self.db, query, attendance_ids, self._row_to_attendance)
     
     def get_by_student(self, student_id: int) -> list[Attendance]:
         query = "SELECT * FROM attendance WHERE student_id = ? ORDER BY date DESC"
         rows = self.db.execute_query(query, (student_id,))
         return [self._row_to_attendance(row) for row in rows]
     
+    def get_by_student_window(self, student_id: int, limit: int, start_date: date | None = None,
+                              end_date: date | None = None, after: tuple | None = None) -> Page[Attendance]:
+        where_clause, params = history_window_filter('t', student_id, start_date, end_date, after)
+        query = f"SELECT * FROM attendance t WHERE {where_clause} {HISTORY_ORDER.format(alias='t')} LIMIT ?"
+        rows = self.db.execute_query(query, params + (limit + 1,))
+        items = [self._row_to_attendance(row) for row in rows[:limit]]
+        return Page(items, history_next_after(items, limit, len(rows)))
+
+    def get_scoped_window(self, scope: AccessScope, limit: int, student_id: int | None = None,
+                          subject_id: int | None = None, start_date: date | None = None,
+                          end_date: date | None = None, after: tuple | None = None) -> Page[Attendance]:
+        where_clause, params = scoped_history_filter('t', scope, student_id, subject_id, start_date, end_date, after)
+        query = f"SELECT * FROM attendance t WHERE {where_clause} {HISTORY_ORDER.format(alias='t')} LIMIT ?"
+        rows = self.db.execute_query(query, params + (limit + 1,))
+        items = [self._row_to_attendance(row) for row in rows[:limit]]
+        return Page(items, history_next_after(items, limit, len(rows)))
+    
     def get_by_student_and_subject(self, student_id: int, subject_id: int) -> list[Attendance]:
         query = """
         SELECT * FROM attendance 
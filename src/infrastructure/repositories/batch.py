@@ -0,0 +1,30 @@
+from typing import Callable, Iterable, Iterator
+
+from infrastructure.database.connection import DatabaseConnection
+
+# Параметров в одном IN (...): старые сборки SQLite ограничивают запрос 999 переменными
+IN_CHUNK_SIZE = 500
+
+
+def unique_ids(entity_ids: Iterable[int]) -> list[int]:
+    # Порядок первого появления сохраняется, повторы и None отбрасываются
+    return list(dict.fromkeys(entity_id for entity_id in entity_ids if entity_id is not None))
+
+
+def chunked(values: list, size: int = IN_CHUNK_SIZE) -> Iterator[list]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def select_by_ids(db: DatabaseConnection, query: str, entity_ids: Iterable[int], row_to_entity: Callable,
+                  key: Callable = lambda entity: entity.id) -> list:
+    # query содержит {placeholders} на месте списка IN; результат - в порядке запрошенных id,
+    # отсутствующие записи пропускаются
+    ids = unique_ids(entity_ids)
+    found = {}
+    for chunk in chunked(ids):
+        rows = db.execute_query(query.format(placeholders=', '.join('?' * len(chunk))), tuple(chunk))
+        for row in rows:
+            entity = row_to_entity(row)
+            found[key(entity)] = entity
+    return [found[entity_id] for entity_id in ids if entity_id in found]
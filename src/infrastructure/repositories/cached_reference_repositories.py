@@ -0,0 +1,165 @@
+import copy
+from datetime import time
+from types import MappingProxyType
+from domain.entities.schedule import Schedule
+from domain.entities.schedule_conflict import ScheduleConflict
+from domain.entities.subject import Subject
+from domain.repositories.schedule_repository import IScheduleRepository
+from domain.repositories.subject_repository import ISubjectRepository
+from infrastructure.cache.snapshot import VersionedSnapshot
+from infrastructure.cache.timetable_index import TimetableIndex
+from infrastructure.database.data_versions import DataVersionTracker
+
+
+class CachedSubjectRepository(ISubjectRepository):
+
+    def __init__(self, repository: ISubjectRepository, data_versions: DataVersionTracker | None = None):
+        self.repository = repository
+        self.snapshot = VersionedSnapshot(
+            self._load, (lambda: data_versions.version('subjects')) if data_versions else None
+        )
+
+    def _load(self) -> MappingProxyType:
+        subjects = tuple(self.repository.get_all())
+        return MappingProxyType({
+            'all': subjects,
+            'by_id': MappingProxyType({subject.id: subject for subject in subjects}),
+            'by_name': MappingProxyType({subject.name: subject for subject in subjects}),
+        })
+
+    def create(self, subject: Subject) -> Subject:
+        subject = self.repository.create(subject)
+        self._invalidate(subject.id, subject)
+        return subject
+
+    def create_many(self, subjects: list[Subject]) -> list[Subject]:
+        subjects = self.repository.create_many(subjects)
+        # Снимок сбрасывается один раз на всю пачку, подписчики узнают о каждой записи
+        self.snapshot.invalidate()
+        for subject in subjects:
+            self._notify_change(subject.id, subject)
+        return subjects
+
+    def get_by_id(self, subject_id: int) -> Subject | None:
+        return _copy(self.snapshot.get()['by_id'].get(subject_id))
+
+    def get_by_ids(self, subject_ids: list[int]) -> list[Subject]:
+        return _copy_many(self.snapshot.get()['by_id'], subject_ids)
+
+    def get_all(self) -> list[Subject]:
+        # Снимок общий для всех потоков, наружу отдаются копии
+        return [_copy(subject) for subject in self.snapshot.get()['all']]
+
+    def get_by_name(self, name: str) -> Subject | None:
+        return _copy(self.snapshot.get()['by_name'].get(name))
+
+    def update(self, subject: Subject) -> Subject:
+        subject = self.repository.update(subject)
+        self._invalidate(subject.id, subject)
+        return subject
+
+    def delete(self, subject_id: int) -> bool:
+        result = self.repository.delete(subject_id)
+        self._invalidate(subject_id)
+        return result
+
+    def _invalidate(self, subject_id: int, subject: Subject | None = None):
+        self.snapshot.invalidate()
+        self._notify_change(subject_id, subject)
+
+
+class CachedScheduleRepository(IScheduleRepository):
+
+    def __init__(self, repository: IScheduleRepository, subject_repo: ISubjectRepository,
+                 data_versions: DataVersionTracker | None = None):
+        self.repository = repository
+        self.subject_repo = subject_repo
+        self.snapshot = VersionedSnapshot(
+            self._load, (lambda: data_versions.versions('schedule', 'subjects')) if data_versions else None
+        )
+        # В снимке к урокам привязаны предметы, поэтому изменение предмета тоже сбрасывает расписание
+        subject_repo.add_change_listener(lambda subject_id, subject: self.snapshot.invalidate())
+
+    def _load(self) -> MappingProxyType:
+        subjects = {subject.id: subject for subject in self.subject_repo.get_all()}
+        lessons = tuple(self.repository.get_all())
+        for lesson in lessons:
+            lesson.subject = subjects.get(lesson.subject_id)
+        # Индекс по дням и времени начала: фильтры расписания и "что идет сейчас" - bisect без SQL
+        timetable = TimetableIndex(lessons)
+        return MappingProxyType({
+            'all': timetable.lessons,
+            'by_id': MappingProxyType({lesson.id: lesson for lesson in lessons}),
+            'timetable': timetable,
+        })
+
+    def create(self, schedule: Schedule) -> Schedule:
+        schedule = self.repository.create(schedule)
+        self._invalidate(schedule.id, schedule)
+        return schedule
+
+    def create_many(self, schedules: list[Schedule]) -> list[Schedule]:
+        schedules = self.repository.create_many(schedules)
+        self.snapshot.invalidate()
+        for schedule in schedules:
+            self._notify_change(schedule.id, schedule)
+        return schedules
+
+    def get_by_id(self, schedule_id: int) -> Schedule | None:
+        return _copy(self.snapshot.get()['by_id'].get(schedule_id))
+
+    def get_by_ids(self, schedule_ids: list[int]) -> list[Schedule]:
+        return _copy_many(self.snapshot.get()['by_id'], schedule_ids)
+
+    def get_all(self) -> list[Schedule]:
+        return [_copy(lesson) for lesson in self.snapshot.get()['all']]
+
+    def get_by_day(self, day_of_week: int) -> list[Schedule]:
+        return [_copy(lesson) for lesson in self.snapshot.get()['timetable'].day(day_of_week)]
+
+    def get_by_subject(self, subject_id: int) -> list[Schedule]:
+        return [_copy(lesson) for lesson in self.snapshot.get()['all'] if lesson.subject_id == subject_id]
+
+    def get_filtered(self, day_of_week: int = None, subject_id: int = None,
+                     time_start: time = None) -> list[Schedule]:
+        timetable = self.snapshot.get()['timetable']
+        return [_copy(lesson) for lesson in timetable.filter(day_of_week, subject_id, time_start)]
+
+    def get_overlapping(self, day_of_week: int, time_from: time, time_to: time) -> list[Schedule]:
+        timetable = self.snapshot.get()['timetable']
+        return [_copy(lesson) for lesson in timetable.overlapping(day_of_week, time_from, time_to)]
+
+    def find_conflicts(self, schedule: Schedule) -> list[ScheduleConflict]:
+        return self.repository.find_conflicts(schedule)
+
+    def find_all_conflicts(self, schedules: list[Schedule] | None = None) -> list[ScheduleConflict]:
+        return self.repository.find_all_conflicts(self.get_all() if schedules is None else schedules)
+
+    def update(self, schedule: Schedule) -> Schedule:
+        schedule = self.repository.update(schedule)
+        self._invalidate(schedule.id, schedule)
+        return schedule
+
+    def delete(self, schedule_id: int) -> bool:
+        result = self.repository.delete(schedule_id)
+        self._invalidate(schedule_id)
+        return result
+
+    def _invalidate(self, schedule_id: int, schedule: Schedule | None = None):
+        self.snapshot.invalidate()
+        self._notify_change(schedule_id, schedule)
+
+
+def _copy(entity):
+    if entity is None:
+        return None
+    entity = copy.copy(entity)
+    # Привязанный к уроку предмет тоже копируется: иначе изменение у вызывающего испортит общий снимок
+    subject = getattr(entity, 'subject', None)
+    if subject is not None:
+        entity.subject = copy.copy(subject)
+    return entity
+
+
+def _copy_many(by_id, entity_ids: list[int]) -> list:
+    return [_copy(by_id[entity_id]) for entity_id in dict.fromkeys(entity_ids) if entity_id in by_id]
@@ -0,0 +1,159 @@
+from datetime import date, datetime, time
+from typing import Any
+from domain.entities.access_scope import AccessScope
+from domain.entities.attendance import Attendance
+from domain.entities.grade import Grade
+from domain.entities.schedule import Schedule
+from domain.entities.student import Student
+from domain.entities.subject import Subject
+from domain.entities.page import Page
+from domain.repositories.diary_repository import IDiaryRepository
+from domain.repositories.grade_repository import IGradeRepository
+from domain.repositories.schedule_repository import IScheduleRepository
+from domain.repositories.subject_repository import ISubjectRepository
+from infrastructure.database.connection import DatabaseConnection
+from infrastructure.repositories.grade_repository import GradeRepository
+from infrastructure.repositories.history_window import HISTORY_ORDER, history_next_after, scoped_history_filter
+
+
+STUDENT_SQL = "SELECT * FROM students WHERE id = ?"
+
+SUBJECTS_SQL = "SELECT * FROM subjects ORDER BY name"
+
+
+def history_page_sql(table: str, student_id: int, page_size: int, start_date: date | None = None,
+                     end_date: date | None = None, after: tuple | None = None,
+                     scope: AccessScope | None = None) -> tuple[str, tuple]:
+    # Одна страница оценок или посещаемости за период, названия предметов подтягиваются JOIN-ом.
+    # Правило доступа (предметы учителя) входит в WHERE, поэтому страница не теряет видимых записей
+    where_clause, params = scoped_history_filter('h', scope, student_id, None, start_date, end_date, after)
+    query = f"""
+    SELECT h.*, s.name AS subject_name, s.teacher AS subject_teacher
+    FROM {table} h
+    LEFT JOIN subjects s ON s.id = h.subject_id
+    WHERE {where_clause}
+    {HISTORY_ORDER.format(alias='h')}
+    LIMIT ?
+    """
+    return query, params + (page_size + 1,)
+
+
+SCHEDULE_SQL = """
+SELECT sc.*, s.name AS subject_name, s.teacher AS subject_teacher
+FROM schedule sc
+LEFT JOIN subjects s ON s.id = sc.subject_id
+ORDER BY sc.day_of_week, sc.time_start
+"""
+
+
+class DiaryRowMapper:
+
+    def _rows_to_page(self, rows, row_to_item, page_size: int) -> Page:
+        items = [row_to_item(row) for row in rows[:page_size]]
+        return Page(items, history_next_after(items, page_size, len(rows)))
+
+    def _joined_subject(self, row) -> Subject | None:
+        if row['subject_name'] is None:
+            return None
+        return Subject(id=row['subject_id'], name=row['subject_name'], teacher=row['subject_teacher'])
+
+    def _row_to_student(self, row) -> Student:
+        return Student(
+            id=row['id'],
+            name=row['name'],
+            class_name=row['class_name'],
+            user_id=row['user_id'],
+            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
+        )
+
+    def _row_to_subject(self, row) -> Subject:
+        return Subject(
+            id=row['id'],
+            name=row['name'],
+            teacher=row['teacher']
+        )
+
+    def _row_to_grade(self, row) -> Grade:
+        grade = Grade(
+            id=row['id'],
+            student_id=row['student_id'],
+            subject_id=row['subject_id'],
+            grade=row['grade'],
+            date=date.fromisoformat(row['date']),
+            comment=row['comment']
+        )
+        grade.subject = self._joined_subject(row)
+        return grade
+
+    def _row_to_attendance(self, row) -> Attendance:
+        attendance = Attendance(
+            id=row['id'],
+            student_id=row['student_id'],
+            subject_id=row['subject_id'],
+            date=date.fromisoformat(row['date']),
+            present=bool(row['present']),
+            reason=row['reason']
+        )
+        attendance.subject = self._joined_subject(row)
+        return attendance
+
+    def _row_to_schedule(self, row) -> Schedule:
+        schedule = Schedule(
+            id=row['id'],
+            subject_id=row['subject_id'],
+            day_of_week=row['day_of_week'],
+            time_start=time.fromisoformat(row['time_start']),
+            time_end=time.fromisoformat(row['time_end']),
+            classroom=row['classroom']
+        )
+        schedule.subject = self._joined_subject(row)
+        return schedule
+
+
+class DiaryRepository(IDiaryRepository, DiaryRowMapper):
+
+    def __init__(self, db_connection: DatabaseConnection, subject_repo: ISubjectRepository | None = None,
+                 schedule_repo: IScheduleRepository | None = None, grade_repo: IGradeRepository | None = None):
+        self.db = db_connection
+        # Кешированные справочники: предметы и расписание тогда не читаются из БД
+        self.subject_repo = subject_repo
+        self.schedule_repo = schedule_repo
+        self.grade_repo = grade_repo or GradeRepository(db_connection)
+
+    def get_student_diary(self, student_id: int, page_size: int, start_date: date | None = None,
+                          end_date: date | None = None, grades_after: tuple | None = None,
+                          attendance_after: tuple | None = None,
+                          scope: AccessScope | None = None) -> dict[str, Any] | None:
+        # Все данные дневника читаются через одно соединение. Оценки и посещаемость - одной страницей
+        # за период, поэтому объем страницы не зависит от длины истории ученика
+        with self.db.get_connection():
+            rows = self.db.execute_query(STUDENT_SQL, (student_id,))
+            if not rows:
+                return None
+            student = self._row_to_student(rows[0])
+
+            if self.subject_repo is not None:
+                subjects = self.subject_repo.get_all()
+            else:
+                subjects = [self._row_to_subject(row) for row in self.db.execute_query(SUBJECTS_SQL)]
+
+            grade_rows = self.db.execute_query(
+                *history_page_sql('grades', student_id, page_size, start_date, end_date, grades_after, scope))
+            attendance_rows = self.db.execute_query(
+                *history_page_sql('attendance', student_id, page_size, start_date, end_date, attendance_after, scope))
+            # Статистика - по всем оценкам периода, а не только по показанной странице
+            grade_statistics = self.grade_repo.get_statistics(student_id, None, start_date, end_date, scope)
+
+            if self.schedule_repo is not None:
+                schedule = self.schedule_repo.get_all()
+            else:
+                schedule = [self._row_to_schedule(row) for row in self.db.execute_query(SCHEDULE_SQL)]
+
+        return {
+            'student': student,
+            'grades': self._rows_to_page(grade_rows, self._row_to_grade, page_size),
+            'attendance': self._rows_to_page(attendance_rows, self._row_to_attendance, page_size),
+            'grade_statistics': grade_statistics,
+            'schedule': schedule,
+            'subjects': subjects
+        }
@@ -1,7 +1,15 @@
 from datetime import date
+from typing import Any
 from domain.entities.grade import Grade
+from domain.entities.access_scope import AccessScope
+from domain.entities.page import Page
 from domain.repositories.grade_repository import IGradeRepository
 from infrastructure.database.connection import DatabaseConnection
+from infrastructure.database.schema import REBUILD_GRADE_SUMMARY_SQL
+from infrastructure.repositories.access_scope_filter import record_scope_filter
+from infrastructure.repositories.batch import select_by_ids
+from infrastructure.repositories.history_window import (HISTORY_ORDER, history_next_after, history_window_filter,
+                                                         scoped_history_filter)
 
 
 class GradeRepository(IGradeRepository):
@@ -21,18 +29,52 @@ class GradeRepository(IGradeRepository):
         grade.id = grade_id
         return grade
     
+    def create_many(self, grades: list[Grade]) -> list[Grade]:
+        query = """
+        INSERT INTO grades (student_id, subject_id, grade, date, comment)
+        VALUES (?, ?, ?, ?, ?)
+        """
+        grade_ids = self.db.insert_many(
+            query,
+            [(grade.student_id, grade.subject_id, grade.grade, grade.date, grade.comment) for grade in grades]
+        )
+        for grade, grade_id in zip(grades, grade_ids):
+            grade.id = grade_id
+        return grades
+    
     def get_by_id(self, grade_id: int) -> Grade | None:
         query = "SELECT * FROM grades WHERE id = ?"
         rows = self.db.execute_query(query, (grade_id,))
         if rows:
             return self._row_to_grade(rows[0])
         return None
+
+    def get_by_ids(self, grade_ids: list[int]) -> list[Grade]:
+        query = "SELECT * FROM grades WHERE id IN ({placeholders})"
+        return select_by_ids(self.db, query, grade_ids, self._row_to_grade)
     
     def get_by_student(self, student_id: int) -> list[Grade]:
         query = "SELECT * FROM grades WHERE student_id = ? ORDER BY date DESC"
         rows = self.db.execute_query(query, (student_id,))
         return [self._row_to_grade(row) for row in rows]
     
+    def get_by_student_window(self, student_id: int, limit: int, start_date: date | None = None,
+                              end_date: date | None = None, after: tuple | None = None) -> Page[Grade]:
+        where_clause, params = history_window_filter('t', student_id, start_date, end_date, after)
+        query = f"SELECT * FROM grades t WHERE {where_clause} {HISTORY_ORDER.format(alias='t')} LIMIT ?"
+        rows = self.db.execute_query(query, params + (limit + 1,))
+        items = [self._row_to_grade(row) for row in rows[:limit]]
+        return Page(items, history_next_after(items, limit, len(rows)))
+
+    def get_scoped_window(self, scope: AccessScope, limit: int, student_id: int | None = None,
+                          subject_id: int | None = None, start_date: date | None = None,
+                          end_date: date | None = None, after: tuple | None = None) -> Page[Grade]:
+        where_clause, params = scoped_history_filter('t', scope, student_id, subject_id, start_date, end_date, after)
+        query = f"SELECT * FROM grades t WHERE {where_clause} {HISTORY_ORDER.format(alias='t')} LIMIT ?"
+        rows = self.db.execute_query(query, params + (limit + 1,))
+        items = [self._row_to_grade(row) for row in rows[:limit]]
+        return Page(items, history_next_after(items, limit, len(rows)))
+    
     def get_by_student_and_subject(self, student_id: int, subject_id: int) -> list[Grade]:
         query = """
         SELECT * FROM grades 
@@ -68,6 +110,137 @@ class GradeRepository(IGradeRepository):
         self.db.execute_update(query, (grade_id,))
         return True
     
+    def get_statistics(self, student_id: int, subject_id: int | None = None,
+                       start_date: date | None = None, end_date: date | None = None,
+                       scope: AccessScope | None = None) -> dict[str, Any]:
+        if start_date is None and end_date is None:
+            summary = self._scoped_summary(student_id, scope)
+            if subject_id is not None:
+                summary = {subject_id: summary[subject_id]} if subject_id in summary else {}
+            if all(self._summary_is_complete(item) for item in summary.values()):
+                distribution = {}
+                for item in summary.values():
+                    for grade, grade_count in item['distribution'].items():
+                        distribution[grade] = distribution.get(grade, 0) + grade_count
+                return self._distribution_to_statistics(dict(sorted(distribution.items(), reverse=True)))
+
+        where_clause, params = self._statistics_filter(student_id, subject_id, start_date, end_date, scope)
+        query = f"""
+        SELECT grade, COUNT(*) AS count
+        FROM grades
+        WHERE {where_clause}
+        GROUP BY grade
+        ORDER BY grade DESC
+        """
+        rows = self.db.execute_query(query, params)
+        return self._distribution_to_statistics({row['grade']: row['count'] for row in rows})
+
+    def get_statistics_by_subject(self, student_id: int, start_date: date | None = None,
+                                  end_date: date | None = None,
+                                  scope: AccessScope | None = None) -> dict[int, dict[str, Any]]:
+        if start_date is None and end_date is None:
+            summary = self._scoped_summary(student_id, scope)
+            if all(self._summary_is_complete(item) for item in summary.values()):
+                return {subject_id: self._distribution_to_statistics(item['distribution'])
+                        for subject_id, item in summary.items()}
+
+        where_clause, params = self._statistics_filter(student_id, None, start_date, end_date, scope)
+        query = f"""
+        SELECT subject_id, grade, COUNT(*) AS count
+        FROM grades
+        WHERE {where_clause}
+        GROUP BY subject_id, grade
+        ORDER BY subject_id, grade DESC
+        """
+        rows = self.db.execute_query(query, params)
+        distributions = {}
+        for row in rows:
+            distributions.setdefault(row['subject_id'], {})[row['grade']] = row['count']
+        return {subject_id: self._distribution_to_statistics(distribution)
+                for subject_id, distribution in distributions.items()}
+
+    def get_summary(self, student_id: int) -> dict[int, dict[str, Any]]:
+        # Сводка читается за O(число предметов), таблица grades не сканируется
+        query = "SELECT * FROM grade_summary WHERE student_id = ? ORDER BY subject_id"
+        rows = self.db.execute_query(query, (student_id,))
+        return {row['subject_id']: self._row_to_summary(row) for row in rows}
+
+    def _scoped_summary(self, student_id: int, scope: AccessScope | None) -> dict[int, dict[str, Any]]:
+        # Сводка хранится по предметам, поэтому правило доступа к предметам применяется к ее строкам
+        summary = self.get_summary(student_id)
+        if scope is None:
+            return summary
+        return {subject_id: item for subject_id, item in summary.items() if scope.allows_subject(subject_id)}
+
+    def rebuild_summary(self) -> int:
+        with self.db.get_connection() as conn:
+            conn.executescript("BEGIN;" + REBUILD_GRADE_SUMMARY_SQL + "COMMIT;")
+            return conn.execute("SELECT COUNT(*) FROM grade_summary").fetchone()[0]
+
+    def _row_to_summary(self, row) -> dict[str, Any]:
+        distribution = {}
+        for grade in range(5, 0, -1):
+            if row[f'count_{grade}']:
+                distribution[grade] = row[f'count_{grade}']
+        return {
+            'count': row['grade_count'],
+            'sum': row['grade_sum'],
+            'distribution': distribution,
+            'last_date': date.fromisoformat(row['last_date']) if row['last_date'] else None
+        }
+
+    @staticmethod
+    def _summary_is_complete(item: dict[str, Any]) -> bool:
+        # Гистограмма сводки хранит только оценки 1-5, иначе считаем по таблице grades
+        return sum(item['distribution'].values()) == item['count']
+
+    def _statistics_filter(self, student_id: int, subject_id: int | None, start_date: date | None,
+                           end_date: date | None, scope: AccessScope | None = None) -> tuple[str, list]:
+        conditions, scope_params = record_scope_filter('grades', scope)
+        conditions.append("student_id = ?")
+        params = [*scope_params, student_id]
+
+        if subject_id is not None:
+            conditions.append("subject_id = ?")
+            params.append(subject_id)
+
+        if start_date is not None:
+            conditions.append("date >= ?")
+            params.append(start_date)
+
+        if end_date is not None:
+            conditions.append("date <= ?")
+            params.append(end_date)
+
+        return " AND ".join(conditions), params
+
+    @staticmethod
+    def _distribution_to_statistics(distribution: dict[int, int]) -> dict[str, Any]:
+        # Медиана берется из распределения: значений оценок единицы, строк могут быть тысячи
+        count = sum(distribution.values())
+        total = sum(grade * grade_count for grade, grade_count in distribution.items())
+
+        median = None
+        if count:
+            lower_index, upper_index = (count - 1) // 2, count // 2
+            lower = upper = None
+            seen = 0
+            for grade in sorted(distribution):
+                seen += distribution[grade]
+                if lower is None and seen > lower_index:
+                    lower = grade
+                if seen > upper_index:
+                    upper = grade
+                    break
+            median = upper if lower == upper else (lower + upper) / 2
+
+        return {
+            'count': count,
+            'sum': total,
+            'median': median,
+            'distribution': distribution
+        }
+
     def _row_to_grade(self, row) -> Grade:
         return Grade(
             id=row['id'],
@@ -0,0 +1,57 @@
+from datetime import date
+
+from domain.entities.access_scope import AccessScope
+from domain.entities.page import HISTORY_CURSOR, check_cursor
+from infrastructure.repositories.access_scope_filter import record_scope_filter
+
+
+def history_window_filter(alias: str, student_id: int, start_date: date | None = None,
+                          end_date: date | None = None, after: tuple | None = None) -> tuple[str, tuple]:
+    # Условие для истории ученика (оценок или посещаемости) от новых записей к старым.
+    # after - (date, id) последней показанной записи: следующая страница начинается строго после нее,
+    # индекс (student_id, date) отдает строки уже в нужном порядке
+    conditions = [f"{alias}.student_id = ?"]
+    params = [student_id]
+    _add_range_conditions(alias, conditions, params, start_date, end_date, after)
+    return " AND ".join(conditions), tuple(params)
+
+
+def scoped_history_filter(alias: str, scope: AccessScope | None, student_id: int | None = None,
+                          subject_id: int | None = None, start_date: date | None = None,
+                          end_date: date | None = None, after: tuple | None = None) -> tuple[str, tuple]:
+    # То же окно истории, но по всем записям, видимым пользователю: правило доступа входит в WHERE,
+    # поэтому LIMIT и курсор работают с уже отфильтрованными строками
+    subject_index = student_id is not None or subject_id is not None
+    conditions, scope_params = record_scope_filter(alias, scope, subject_index)
+    params = list(scope_params)
+    if student_id is not None:
+        conditions.append(f"{alias}.student_id = ?")
+        params.append(student_id)
+    if subject_id is not None:
+        conditions.append(f"{alias}.subject_id = ?")
+        params.append(subject_id)
+    _add_range_conditions(alias, conditions, params, start_date, end_date, after)
+    return " AND ".join(conditions) or "1", tuple(params)
+
+
+def _add_range_conditions(alias: str, conditions: list[str], params: list, start_date: date | None,
+                          end_date: date | None, after: tuple | None):
+    if start_date is not None:
+        conditions.append(f"{alias}.date >= ?")
+        params.append(start_date.isoformat())
+    if end_date is not None:
+        conditions.append(f"{alias}.date <= ?")
+        params.append(end_date.isoformat())
+    if after is not None:
+        conditions.append(f"({alias}.date, {alias}.id) < (?, ?)")
+        params.extend(check_cursor(after, HISTORY_CURSOR))
+
+
+HISTORY_ORDER = "ORDER BY {alias}.date DESC, {alias}.id DESC"
+
+
+def history_next_after(items: list, limit: int, fetched: int) -> tuple | None:
+    # Запрашивается limit + 1 строк: лишняя строка означает, что есть более ранняя страница
+    if fetched <= limit or not items:
+        return None
+    return items[-1].date.isoformat(), items[-1].id
@@ -0,0 +1,91 @@
+from datetime import date, datetime
+from typing import Any, Iterator
+from domain.entities.access_scope import AccessScope
+from domain.entities.student import Student
+from domain.repositories.report_repository import IReportRepository
+from infrastructure.database.connection import DatabaseConnection
+from infrastructure.repositories.access_scope_filter import record_scope_filter
+
+
+class ReportRepository(IReportRepository):
+
+    FETCH_SIZE = 500
+
+    def __init__(self, db_connection: DatabaseConnection):
+        self.db = db_connection
+
+    def get_subject_report_dates(self, subject_id: int, start_date: date | None = None,
+                                 end_date: date | None = None,
+                                 scope: AccessScope | None = None) -> list[date]:
+        events_sql, params = self._events_sql(subject_id, start_date, end_date, scope)
+        query = f"SELECT DISTINCT date FROM ({events_sql}) ORDER BY date"
+        rows = self.db.execute_query(query, params)
+        return [date.fromisoformat(row['date']) for row in rows]
+
+    def iter_subject_report(self, subject_id: int, start_date: date | None = None,
+                            end_date: date | None = None,
+                            scope: AccessScope | None = None
+                            ) -> Iterator[tuple[Student, dict[date, dict[str, Any]]]]:
+        events_sql, params = self._events_sql(subject_id, start_date, end_date, scope)
+        # Оценки и посещаемость сводятся в одну строку на (ученик, дата).
+        # Все оценки за день сохраняются списком, из нескольких отметок - отсутствие важнее присутствия
+        query = f"""
+        SELECT s.id, s.name, s.class_name, s.user_id, s.created_at,
+               e.date, GROUP_CONCAT(e.grade) AS grades, MIN(e.present) AS present
+        FROM ({events_sql}) e
+        JOIN students s ON s.id = e.student_id
+        GROUP BY s.id, e.date
+        ORDER BY s.name, s.id, e.date
+        """
+
+        # Строки читаются порциями и отдаются по ученику, полная матрица в памяти не собирается
+        student = None
+        cells = {}
+        for row in self.db.iter_query(query, params, self.FETCH_SIZE):
+            if student is None or student.id != row['id']:
+                if student is not None:
+                    yield student, cells
+                student = self._row_to_student(row)
+                cells = {}
+            cells[date.fromisoformat(row['date'])] = {
+                'grades': [int(grade) for grade in row['grades'].split(',')] if row['grades'] else [],
+                'present': bool(row['present']) if row['present'] is not None else None
+            }
+        if student is not None:
+            yield student, cells
+
+    def _events_sql(self, subject_id: int, start_date: date | None, end_date: date | None,
+                    scope: AccessScope | None) -> tuple[str, list]:
+        conditions = ["e.subject_id = ?"]
+        params = [subject_id]
+
+        if start_date is not None:
+            conditions.append("e.date >= ?")
+            params.append(start_date)
+
+        if end_date is not None:
+            conditions.append("e.date <= ?")
+            params.append(end_date)
+
+        # Правило доступа (дети родителя, профиль школьника, предметы учителя) - в том же WHERE,
+        # база не возвращает чужих строк
+        scope_conditions, scope_params = record_scope_filter('e', scope)
+        conditions.extend(scope_conditions)
+        params.extend(scope_params)
+
+        where_clause = " AND ".join(conditions)
+        events_sql = f"""
+            SELECT e.student_id, e.date, e.grade, NULL AS present FROM grades e WHERE {where_clause}
+            UNION ALL
+            SELECT e.student_id, e.date, NULL AS grade, e.present FROM attendance e WHERE {where_clause}
+        """
+        return events_sql, params + params
+
+    def _row_to_student(self, row) -> Student:
+        return Student(
+            id=row['id'],
+            name=row['name'],
+            class_name=row['class_name'],
+            user_id=row['user_id'],
+            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
+        )
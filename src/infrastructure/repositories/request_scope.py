@@ -0,0 +1,86 @@
+import contextvars
+import copy
+from contextlib import contextmanager
+
+from infrastructure.repositories.batch import unique_ids
+
+
+class RequestScope:
+
+    def __init__(self):
+        # Память загруженных сущностей живет в контексте одного HTTP-запроса, как и сборщик SQL-запросов
+        self._memo = contextvars.ContextVar(f'request_scope_{id(self)}', default=None)
+
+    def start(self):
+        self._memo.set({})
+
+    def stop(self):
+        self._memo.set(None)
+
+    @contextmanager
+    def activate(self):
+        token = self._memo.set({})
+        try:
+            yield
+        finally:
+            self._memo.reset(token)
+
+    def memo(self, name: str) -> dict | None:
+        # None - вне запроса: репозиторий работает без запоминания
+        memo = self._memo.get()
+        if memo is None:
+            return None
+        return memo.setdefault(name, {})
+
+
+class RequestScopedRepository:
+
+    def __init__(self, repository, scope: RequestScope, name: str):
+        # Повторные get_by_id одной сущности за запрос (проверка прав, сервис, контроллер) обращаются
+        # к базе один раз, get_by_ids загружает только недостающие id одним запросом.
+        # Остальные методы репозитория вызываются напрямую
+        self.repository = repository
+        self.scope = scope
+        self.name = name
+        repository.add_change_listener(self._on_change)
+
+    def __getattr__(self, name: str):
+        return getattr(self.repository, name)
+
+    def get_by_id(self, entity_id: int):
+        memo = self.scope.memo(self.name)
+        if memo is None:
+            return self.repository.get_by_id(entity_id)
+        if entity_id not in memo:
+            memo[entity_id] = self.repository.get_by_id(entity_id)
+        return _copy(memo[entity_id])
+
+    def get_by_ids(self, entity_ids: list[int]) -> list:
+        memo = self.scope.memo(self.name)
+        if memo is None:
+            return self.repository.get_by_ids(entity_ids)
+        ids = unique_ids(entity_ids)
+        missing = [entity_id for entity_id in ids if entity_id not in memo]
+        if missing:
+            found = {entity.id: entity for entity in self.repository.get_by_ids(missing)}
+            for entity_id in missing:
+                # Отсутствующие id тоже запоминаются, чтобы не искать их повторно
+                memo[entity_id] = found.get(entity_id)
+        return [_copy(memo[entity_id]) for entity_id in ids if memo[entity_id] is not None]
+
+    def prime(self, entity_ids: list[int]):
+        # Предзагрузка перед циклом, в котором сущности запрашиваются по одной
+        self.get_by_ids(entity_ids)
+
+    def exists(self, entity_id: int) -> bool:
+        return self.get_by_id(entity_id) is not None
+
+    def _on_change(self, entity_id: int, entity=None):
+        memo = self.scope.memo(self.name)
+        if memo is not None:
+            memo.pop(entity_id, None)
+
+
+def _copy(entity):
+    # Каждому вызывающему - своя копия, изменения не попадают в память запроса
+    return copy.copy(entity) if entity is not None else None
@@ -1,28 +1,61 @@
+import re
+from contextlib import nullcontext
 from datetime import time
 from domain.entities.schedule import Schedule
+from domain.entities.schedule_conflict import (ScheduleConflict, ScheduleConflictDetector, ScheduleConflictError,
+                                              TeacherResource)
+from domain.entities.user import UserRole
 from domain.repositories.schedule_repository import IScheduleRepository
 from infrastructure.database.connection import DatabaseConnection
+from infrastructure.repositories.batch import select_by_ids, unique_ids
 
 
 class ScheduleRepository(IScheduleRepository):
 
-    def __init__(self, db_connection: DatabaseConnection):
+    def __init__(self, db_connection: DatabaseConnection, check_conflicts: bool = False):
         self.db = db_connection
+        # Не сохранять уроки, занимающие кабинет или учителя, уже занятых в это время
+        self.check_conflicts = check_conflicts
 
     def create(self, schedule: Schedule) -> Schedule:
         query = """
         INSERT INTO schedule (subject_id, day_of_week, time_start, time_end, classroom)
         VALUES (?, ?, ?, ?, ?)
         """
-        schedule_id = self.db.execute_update(
-            query,
-            (schedule.subject_id, schedule.day_of_week,
-             schedule.time_start.strftime('%H:%M'), schedule.time_end.strftime('%H:%M'),
-             schedule.classroom)
-        )
+        with self._checked_write():
+            self._ensure_no_conflicts(schedule)
+            schedule_id = self.db.execute_update(
+                query,
+                (schedule.subject_id, schedule.day_of_week,
+                 schedule.time_start.strftime('%H:%M'), schedule.time_end.strftime('%H:%M'),
+                 schedule.classroom)
+            )
         schedule.id = schedule_id
         return schedule
 
+    def create_many(self, schedules: list[Schedule]) -> list[Schedule]:
+        query = """
+        INSERT INTO schedule (subject_id, day_of_week, time_start, time_end, classroom)
+        VALUES (?, ?, ?, ?, ?)
+        """
+        with self._checked_write():
+            if self.check_conflicts:
+                # Импорт проверяется целиком: пересечения новых уроков между собой и с сохраненными
+                new_lessons = {id(schedule) for schedule in schedules}
+                conflicts = [conflict for conflict in self.find_all_conflicts(self.get_all() + list(schedules))
+                             if id(conflict.first) in new_lessons or id(conflict.second) in new_lessons]
+                if conflicts:
+                    raise ScheduleConflictError(conflicts)
+            schedule_ids = self.db.insert_many(
+                query,
+                [(schedule.subject_id, schedule.day_of_week,
+                  schedule.time_start.strftime('%H:%M'), schedule.time_end.strftime('%H:%M'),
+                  schedule.classroom) for schedule in schedules]
+            )
+        for schedule, schedule_id in zip(schedules, schedule_ids):
+            schedule.id = schedule_id
+        return schedules
+
     def get_by_id(self, schedule_id: int) -> Schedule | None:
         query = "SELECT * FROM schedule WHERE id = ?"
         rows = self.db.execute_query(query, (schedule_id,))
@@ -30,6 +63,10 @@ class ScheduleRepository(IScheduleRepository):
             return self._row_to_schedule(rows[0])
         return None
 
+    def get_by_ids(self, schedule_ids: list[int]) -> list[Schedule]:
+        query = "SELECT * FROM schedule WHERE id IN ({placeholders})"
+        return select_by_ids(self.db, query, schedule_ids, self._row_to_schedule)
+
     def get_all(self) -> list[Schedule]:
         query = "SELECT * FROM schedule ORDER BY day_of_week, time_start"
         rows = self.db.execute_query(query)
@@ -51,12 +88,14 @@ class ScheduleRepository(IScheduleRepository):
         SET subject_id = ?, day_of_week = ?, time_start = ?, time_end = ?, classroom = ?
         WHERE id = ?
         """
-        self.db.execute_update(
-            query,
-            (schedule.subject_id, schedule.day_of_week,
-             schedule.time_start.strftime('%H:%M'), schedule.time_end.strftime('%H:%M'),
-             schedule.classroom, schedule.id)
-        )
+        with self._checked_write():
+            self._ensure_no_conflicts(schedule)
+            self.db.execute_update(
+                query,
+                (schedule.subject_id, schedule.day_of_week,
+                 schedule.time_start.strftime('%H:%M'), schedule.time_end.strftime('%H:%M'),
+                 schedule.classroom, schedule.id)
+            )
         return schedule
 
     def delete(self, schedule_id: int) -> bool:
@@ -81,12 +120,106 @@ class ScheduleRepository(IScheduleRepository):
             conditions.append("time_start >= ?")
             params.append(time_start.strftime('%H:%M'))
 
-        where_clause = " WHERE " + " AND ".join(conditions)
+        # Без фильтров - все расписание
+        where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
 
         query = f"SELECT * FROM schedule{where_clause} ORDER BY day_of_week, time_start"
         rows = self.db.execute_query(query, params)
         return [self._row_to_schedule(row) for row in rows]
 
+    def get_overlapping(self, day_of_week: int, time_from: time, time_to: time) -> list[Schedule]:
+        query = """
+        SELECT * FROM schedule
+        WHERE day_of_week = ? AND time_start <= ? AND time_end > ?
+        ORDER BY time_start
+        """
+        rows = self.db.execute_query(query, (day_of_week, time_to.strftime('%H:%M'), time_from.strftime('%H:%M')))
+        return [self._row_to_schedule(row) for row in rows]
+
+    def find_conflicts(self, schedule: Schedule) -> list[ScheduleConflict]:
+        # Кандидаты - уроки того же дня, пересекающиеся по времени (поиск по индексу день + начало),
+        # среди них детектор выбирает занимающие тот же кабинет или того же учителя
+        query = """
+        SELECT * FROM schedule
+        WHERE day_of_week = ? AND time_start < ? AND time_end > ?
+        """
+        rows = self.db.execute_query(query, (schedule.day_of_week, schedule.time_end.strftime('%H:%M'),
+                                             schedule.time_start.strftime('%H:%M')))
+        lessons = [self._row_to_schedule(row) for row in rows]
+        if not lessons:
+            return []
+        teachers = self._teachers_by_subject([schedule.subject_id] + [lesson.subject_id for lesson in lessons])
+        return ScheduleConflictDetector(lessons, teachers).check(schedule)
+
+    def find_all_conflicts(self, schedules: list[Schedule] | None = None) -> list[ScheduleConflict]:
+        lessons = self.get_all() if schedules is None else schedules
+        teachers = self._teachers_by_subject([lesson.subject_id for lesson in lessons])
+        return ScheduleConflictDetector(lessons, teachers).find_all()
+
+    def _checked_write(self):
+        # Проверка и запись в одной пишущей транзакции (BEGIN IMMEDIATE): параллельная запись не проскочит
+        # между ними. Без проверки блокировка заранее не берется - запись идет обычным путем
+        return self.db.transaction() if self.check_conflicts else nullcontext()
+
+    def _ensure_no_conflicts(self, schedule: Schedule):
+        if not self.check_conflicts:
+            return
+        conflicts = self.find_conflicts(schedule)
+        if conflicts:
+            raise ScheduleConflictError(conflicts)
+
+    def _teachers_by_subject(self, subject_ids: list[int]) -> dict[int, tuple[TeacherResource, ...]]:
+        # Учителя урока - все основные учителя предмета из teacher_subject, а если назначений нет - учитель,
+        # записанный текстом в самом предмете и по возможности сопоставленный с пользователем-учителем.
+        # Сравнение по id пользователя: предметы одного человека, назначенные и записанные текстом,
+        # проверяются вместе. Несопоставленный текст сравнивается как нормализованная строка
+        ids = unique_ids(subject_ids)
+        if not ids:
+            return {}
+        placeholders = ', '.join('?' * len(ids))
+        rows = self.db.execute_query(
+            f"""
+            SELECT ts.subject_id, u.id, u.username, u.first_name, u.last_name
+            FROM teacher_subject ts JOIN users u ON u.id = ts.teacher_id
+            WHERE ts.is_primary = 1 AND ts.subject_id IN ({placeholders})
+            """,
+            tuple(ids)
+        )
+        assigned = {}
+        for row in rows:
+            assigned.setdefault(row['subject_id'], {})[row['id']] = _teacher_resource(row)
+
+        teachers, named = {}, {}
+        for row in self.db.execute_query(f"SELECT id, teacher FROM subjects WHERE id IN ({placeholders})", tuple(ids)):
+            if row['id'] in assigned:
+                teachers[row['id']] = tuple(assigned[row['id']].values())
+            elif row['teacher'] and row['teacher'].strip():
+                named[row['id']] = row['teacher'].strip()
+
+        if named:
+            by_name = self._teachers_by_name()
+            for subject_id, text in named.items():
+                key = _name_key(text)
+                teachers[subject_id] = (by_name.get(key) or TeacherResource(('name', key), text),)
+        return teachers
+
+    def _teachers_by_name(self) -> dict[str, TeacherResource]:
+        # Как учителя записывают в subjects.teacher: логин, "Фамилия Имя", "Имя Фамилия", "Фамилия И.О.".
+        # Запись, подходящая нескольким учителям, ни с кем не сопоставляется
+        rows = self.db.execute_query(
+            "SELECT id, username, first_name, last_name FROM users WHERE role = ?", (UserRole.TEACHER.value,)
+        )
+        candidates = {}
+        for row in rows:
+            resource = _teacher_resource(row)
+            first_name, last_name = (row['first_name'] or '').strip(), (row['last_name'] or '').strip()
+            names = {row['username'], f'{last_name} {first_name}', f'{first_name} {last_name}'}
+            if first_name and last_name:
+                names.add(f'{last_name} {first_name[0]}.')
+            for name in names:
+                candidates.setdefault(_name_key(name), set()).add(resource)
+        return {name: next(iter(found)) for name, found in candidates.items() if len(found) == 1}
+
     def _row_to_schedule(self, row) -> Schedule:
         return Schedule(
             id=row['id'],
@@ -96,3 +229,17 @@ class ScheduleRepository(IScheduleRepository):
             time_end=time.fromisoformat(row['time_end']),
             classroom=row['classroom']
         )
+
+
+def _teacher_resource(row) -> TeacherResource:
+    name = ' '.join(part for part in (row['last_name'], row['first_name']) if part)
+    return TeacherResource(('user', row['id']), f"{name} ({row['username']})" if name else row['username'])
+
+
+def _name_key(text: str) -> str:
+    # Регистр, "ё" и пробелы не различаются; "Фамилия И.О." сводится к "фамилия и." - отчества у
+    # пользователей нет
+    words = text.casefold().replace('ё', 'е').split()
+    if len(words) == 2 and re.fullmatch(r'(\w\.)+', words[1]):
+        return f'{words[0]} {words[1][:2]}'
+    return ' '.join(words)
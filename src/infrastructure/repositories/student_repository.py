@@ -1,7 +1,12 @@
 from datetime import datetime
+from domain.entities.access_scope import AccessScope
+from domain.entities.page import STUDENT_CURSOR, Page, check_cursor
 from domain.entities.student import Student
 from domain.repositories.student_repository import IStudentRepository
 from infrastructure.database.connection import DatabaseConnection
+from infrastructure.database.search import LIKE_ESCAPE, contains_pattern
+from infrastructure.repositories.access_scope_filter import access_scope_filter
+from infrastructure.repositories.batch import select_by_ids
 
 
 class StudentRepository(IStudentRepository):
@@ -21,18 +26,64 @@ class StudentRepository(IStudentRepository):
         student.id = student_id
         return student
     
+    def create_many(self, students: list[Student]) -> list[Student]:
+        query = """
+        INSERT INTO students (name, class_name, user_id, created_at)
+        VALUES (?, ?, ?, ?)
+        """
+        now = datetime.utcnow()
+        student_ids = self.db.insert_many(
+            query,
+            [(student.name, student.class_name, student.user_id, now) for student in students]
+        )
+        for student, student_id in zip(students, student_ids):
+            student.id = student_id
+        return students
+    
     def get_by_id(self, student_id: int) -> Student | None:
         query = "SELECT * FROM students WHERE id = ?"
         rows = self.db.execute_query(query, (student_id,))
         if rows:
             return self._row_to_student(rows[0])
         return None
+
+    def get_by_ids(self, student_ids: list[int]) -> list[Student]:
+        query = "SELECT * FROM students WHERE id IN ({placeholders})"
+        return select_by_ids(self.db, query, student_ids, self._row_to_student)
     
     def get_all(self) -> list[Student]:
         query = "SELECT * FROM students ORDER BY name"
         rows = self.db.execute_query(query)
         return [self._row_to_student(row) for row in rows]
     
+    def get_page(self, limit: int, after: tuple | None = None, search: str | None = None,
+                 scope: AccessScope | None = None) -> Page[Student]:
+        # Keyset-пагинация: следующая страница начинается сразу после (name, id) последней записи,
+        # поэтому стоимость не растет с номером страницы, в отличие от OFFSET
+        conditions = []
+        params = []
+        scope_condition, scope_params = access_scope_filter("id", scope)
+        if scope_condition:
+            conditions.append(scope_condition)
+            params.extend(scope_params)
+        if after is not None:
+            conditions.append("(name, id) > (?, ?)")
+            params.extend(check_cursor(after, STUDENT_CURSOR))
+        if search:
+            conditions.append(f"(casefold(name) LIKE ? ESCAPE '{LIKE_ESCAPE}' "
+                              f"OR casefold(class_name) LIKE ? ESCAPE '{LIKE_ESCAPE}')")
+            params.extend([contains_pattern(search)] * 2)
+
+        query = "SELECT * FROM students"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY name, id LIMIT ?"
+        rows = self.db.execute_query(query, tuple(params) + (limit + 1,))
+
+        students = [self._row_to_student(row) for row in rows[:limit]]
+        next_after = (students[-1].name, students[-1].id) if len(rows) > limit else None
+        return Page(students, next_after)
+    
     def get_by_class(self, class_name: str) -> list[Student]:
         query = "SELECT * FROM students WHERE class_name = ? ORDER BY name"
         rows = self.db.execute_query(query, (class_name,))
@@ -55,11 +106,13 @@ class StudentRepository(IStudentRepository):
             query,
             (student.name, student.class_name, student.user_id, student.id)
         )
+        self._notify_change(student.id, student)
         return student
     
     def delete(self, student_id: int) -> bool:
         query = "DELETE FROM students WHERE id = ?"
         self.db.execute_update(query, (student_id,))
+        self._notify_change(student_id)
         return True
     
     def _row_to_student(self, row) -> Student:
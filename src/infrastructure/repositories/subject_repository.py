@@ -1,6 +1,7 @@
 from domain.entities.subject import Subject
 from domain.repositories.subject_repository import ISubjectRepository
 from infrastructure.database.connection import DatabaseConnection
+from infrastructure.repositories.batch import select_by_ids
 
 
 class SubjectRepository(ISubjectRepository):
@@ -14,12 +15,23 @@ class SubjectRepository(ISubjectRepository):
         subject.id = subject_id
         return subject
     
+    def create_many(self, subjects: list[Subject]) -> list[Subject]:
+        query = "INSERT INTO subjects (name, teacher) VALUES (?, ?)"
+        subject_ids = self.db.insert_many(query, [(subject.name, subject.teacher) for subject in subjects])
+        for subject, subject_id in zip(subjects, subject_ids):
+            subject.id = subject_id
+        return subjects
+    
     def get_by_id(self, subject_id: int) -> Subject | None:
         query = "SELECT * FROM subjects WHERE id = ?"
         rows = self.db.execute_query(query, (subject_id,))
         if rows:
             return self._row_to_subject(rows[0])
         return None
+
+    def get_by_ids(self, subject_ids: list[int]) -> list[Subject]:
+        query = "SELECT * FROM subjects WHERE id IN ({placeholders})"
+        return select_by_ids(self.db, query, subject_ids, self._row_to_subject)
     
     def get_all(self) -> list[Subject]:
         query = "SELECT * FROM subjects ORDER BY name"
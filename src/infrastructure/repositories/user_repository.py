@@ -1,7 +1,11 @@
 from datetime import datetime
+from domain.entities.page import USER_CURSOR, Page, check_cursor
 from domain.entities.user import User, UserRole
 from domain.repositories.user_repository import IUserRepository
 from infrastructure.database.connection import DatabaseConnection
+from infrastructure.database.search import LIKE_ESCAPE, contains_pattern
+from infrastructure.repositories.access_scope_filter import ACCESSIBLE_STUDENTS_SQL, TEACHER_SUBJECTS_SQL
+from infrastructure.repositories.batch import select_by_ids
 
 
 class UserRepository(IUserRepository):
@@ -22,6 +26,21 @@ class UserRepository(IUserRepository):
         user.id = user_id
         return user
 
+    def create_many(self, users: list[User]) -> list[User]:
+        query = """
+        INSERT INTO users (username, email, password_hash, role, first_name, last_name, is_active, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        now = datetime.utcnow()
+        user_ids = self.db.insert_many(
+            query,
+            [(user.username, user.email, user.password_hash, user.role.value,
+              user.first_name, user.last_name, user.is_active, now) for user in users]
+        )
+        for user, user_id in zip(users, user_ids):
+            user.id = user_id
+        return users
+
     def get_by_id(self, user_id: int) -> User | None:
         query = "SELECT * FROM users WHERE id = ?"
         rows = self.db.execute_query(query, (user_id,))
@@ -29,6 +48,10 @@ class UserRepository(IUserRepository):
             return self._row_to_user(rows[0])
         return None
 
+    def get_by_ids(self, user_ids: list[int]) -> list[User]:
+        query = "SELECT * FROM users WHERE id IN ({placeholders})"
+        return select_by_ids(self.db, query, user_ids, self._row_to_user)
+
     def get_by_username(self, username: str) -> User | None:
         query = "SELECT * FROM users WHERE username = ?"
         rows = self.db.execute_query(query, (username,))
@@ -53,6 +76,34 @@ class UserRepository(IUserRepository):
         rows = self.db.execute_query(query, (role.value,))
         return [self._row_to_user(row) for row in rows]
 
+    def get_page_by_role(self, role: UserRole, limit: int, after: tuple | None = None,
+                         search: str | None = None) -> Page[User]:
+        # Keyset-пагинация по (last_name, first_name, id), см. StudentRepository.get_page
+        conditions = ["role = ?"]
+        params = [role.value]
+        if after is not None:
+            conditions.append("(last_name, first_name, id) > (?, ?, ?)")
+            params.extend(check_cursor(after, USER_CURSOR))
+        if search:
+            conditions.append(f"(casefold(last_name) LIKE ? ESCAPE '{LIKE_ESCAPE}' "
+                              f"OR casefold(first_name) LIKE ? ESCAPE '{LIKE_ESCAPE}' "
+                              f"OR casefold(username) LIKE ? ESCAPE '{LIKE_ESCAPE}')")
+            params.extend([contains_pattern(search)] * 3)
+
+        query = f"""
+        SELECT * FROM users
+        WHERE {" AND ".join(conditions)}
+        ORDER BY last_name, first_name, id
+        LIMIT ?
+        """
+        rows = self.db.execute_query(query, tuple(params) + (limit + 1,))
+
+        users = [self._row_to_user(row) for row in rows[:limit]]
+        next_after = None
+        if len(rows) > limit:
+            next_after = (users[-1].last_name, users[-1].first_name, users[-1].id)
+        return Page(users, next_after)
+
     def update(self, user: User) -> User:
         query = """
         UPDATE users 
@@ -65,11 +116,13 @@ class UserRepository(IUserRepository):
             (user.username, user.email, user.password_hash, user.role.value,
              user.first_name, user.last_name, user.is_active, user.id)
         )
+        self._notify_change(user.id, user)
         return user
 
     def delete(self, user_id: int) -> bool:
         query = "DELETE FROM users WHERE id = ?"
         self.db.execute_update(query, (user_id,))
+        self._notify_change(user_id)
         return True
 
     def get_children_ids(self, parent_id: int) -> list[int]:
@@ -82,21 +135,32 @@ class UserRepository(IUserRepository):
         rows = self.db.execute_query(query)
         return rows[0]['count'] > 0 if rows else False
 
+    def get_accessible_student_ids(self, user_id: int) -> list[int]:
+        rows = self.db.execute_query(ACCESSIBLE_STUDENTS_SQL, (user_id, user_id))
+        return [row['student_id'] for row in rows]
+
+    def get_teacher_subject_ids(self, teacher_id: int) -> list[int]:
+        rows = self.db.execute_query(TEACHER_SUBJECTS_SQL, (teacher_id,))
+        return [row['subject_id'] for row in rows]
+
     def create_parent_child_relationship(self, parent_id: int, child_id: int, relationship: str = 'parent') -> bool:
         try:
             query = "INSERT INTO parent_child (parent_id, child_id, relationship) VALUES (?, ?, ?)"
             self.db.execute_update(query, (parent_id, child_id, relationship))
-            return True
         except:
             return False
+        # Подписчики (кеш областей доступа) сбрасывают данные родителя
+        self._notify_change(parent_id)
+        return True
 
     def remove_parent_child_relationship(self, parent_id: int, child_id: int) -> bool:
         try:
             query = "DELETE FROM parent_child WHERE parent_id = ? AND child_id = ?"
             self.db.execute_update(query, (parent_id, child_id))
-            return True
         except:
             return False
+        self._notify_change(parent_id)
+        return True
 
     def _row_to_user(self, row) -> User:
         return User(
@@ -0,0 +1,67 @@
+import threading
+import time
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Callable
+
+
+class LazyRegistry(Mapping):
+
+    def __init__(self, factories: dict[str, Callable] | None = None):
+        # Объект создается при первом обращении по имени: процессы, которым не нужен веб-слой
+        # (manage.py, init_data.py), не импортируют и не собирают его
+        self._factories = dict(factories or {})
+        self._instances = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable):
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def __getitem__(self, name: str):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                # RLock: фабрика может запросить другой объект реестра (сервис отчетов - сервис авторизации)
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def built(self) -> list[str]:
+        return [name for name in self._factories if name in self._instances]
+
+
+class StartupTimer:
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+
+    def add(self, name: str, duration_ms: float):
+        self.phases[name] = self.phases.get(name, 0.0) + duration_ms
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.phases.values())
+
+    def report(self) -> dict[str, float]:
+        return {**{name: round(duration, 2) for name, duration in self.phases.items()},
+                'total': round(self.total_ms, 2)}
+
+    def format(self) -> str:
+        return ', '.join(f'{name} {duration:.1f} мс' for name, duration in self.report().items())
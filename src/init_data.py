@@ -1,8 +1,11 @@
+import argparse
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date, time
 
-from run import create_app
+from run import CleanArchitectureApp
+from domain.entities.password_policy import PasswordPolicy
 from domain.entities.user import User, UserRole
 from domain.entities.student import Student
 from domain.entities.subject import Subject
@@ -17,16 +20,20 @@ def load_seed_data():
         return json.load(f)
 
 
-def init_database():
-    app = create_app()
+def hash_passwords(passwords: list[str], policy: PasswordPolicy, workers: int | None = None) -> list[str]:
+    # Хеширование - самая дорогая часть создания пользователя, распараллеливаем по процессам
+    if len(passwords) < 2 or workers == 1:
+        return [policy.hash(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(policy.hash, passwords, chunksize=16))
+
+
+def init_database(bulk: bool = False, workers: int | None = None):
+    # Одно приложение без веб-слоя: схема проверяется один раз, репозитории берутся из него же
+    app_factory = CleanArchitectureApp()
+    app = app_factory.create_app(web=False)
     
     with app.app_context():
-        # Получаем репозитории из контекста приложения
-        from run import CleanArchitectureApp
-        app_factory = CleanArchitectureApp()
-        app_factory._init_database()
-        app_factory._init_repositories()
-        
         user_repo = app_factory.repositories['user']
         student_repo = app_factory.repositories['student']
         subject_repo = app_factory.repositories['subject']
@@ -40,6 +47,12 @@ def init_database():
             return
         
         seed_data = load_seed_data()
+
+        if bulk:
+            seed_bulk(app_factory, seed_data, workers)
+            print("✅ База данных инициализирована с данными из seed.json (пакетный режим)")
+            print_credentials()
+            return
         
         # Создаем пользователей
         users_dict = {}
@@ -55,7 +68,7 @@ def init_database():
                 is_active=True,
                 created_at=datetime.utcnow()
             )
-            user.set_password(user_data['password'])
+            user.set_password(user_data['password'], app_factory.create_password_policy())
             user = user_repo.create(user)
             users_dict[user_data['username']] = user
         
@@ -139,6 +152,93 @@ def init_database():
         print_credentials()
 
 
+def seed_bulk(app_factory, seed_data: dict, workers: int | None = None):
+    repositories = app_factory.repositories
+    users_data = seed_data['users']
+    password_hashes = hash_passwords([user_data['password'] for user_data in users_data],
+                                     app_factory.create_password_policy(), workers)
+
+    users = [
+        User(
+            id=None,
+            username=user_data['username'],
+            email=user_data['email'],
+            password_hash=password_hash,
+            role=UserRole(user_data['role']),
+            first_name=user_data['first_name'],
+            last_name=user_data['last_name'],
+            is_active=True,
+            created_at=datetime.utcnow()
+        )
+        for user_data, password_hash in zip(users_data, password_hashes)
+    ]
+
+    # Все вставки выполняются одной транзакцией через executemany
+    with app_factory.db_connection.transaction():
+        users_dict = {user.username: user for user in repositories['user'].create_many(users)}
+
+        # Связь студент-пользователь известна заранее, поэтому user_id проставляется сразу при вставке
+        student_users = {}
+        for su_data in seed_data.get('relationships', {}).get('student_user', []):
+            user = users_dict.get(su_data['user_username'])
+            if user:
+                student_users[su_data['student_name']] = user.id
+
+        students = [
+            Student(
+                id=None,
+                name=student_data['name'],
+                class_name=student_data['class_name'],
+                user_id=student_users.get(student_data['name']),
+                created_at=datetime.utcnow()
+            )
+            for student_data in seed_data['students']
+        ]
+        students_dict = {student.name: student for student in repositories['student'].create_many(students)}
+
+        subjects = [
+            Subject(id=None, name=subject_data['name'], teacher=subject_data['teacher'])
+            for subject_data in seed_data['subjects']
+        ]
+        subjects_dict = {subject.name: subject for subject in repositories['subject'].create_many(subjects)}
+
+        repositories['schedule'].create_many([
+            Schedule(
+                id=None,
+                subject_id=subjects_dict[schedule_data['subject_name']].id,
+                day_of_week=schedule_data['day_of_week'],
+                time_start=time.fromisoformat(schedule_data['time_start']),
+                time_end=time.fromisoformat(schedule_data['time_end']),
+                classroom=schedule_data['classroom']
+            )
+            for schedule_data in seed_data['schedule']
+        ])
+
+        repositories['grade'].create_many([
+            Grade(
+                id=None,
+                student_id=students_dict[grade_data['student_name']].id,
+                subject_id=subjects_dict[grade_data['subject_name']].id,
+                grade=grade_data['grade'],
+                date=date.fromisoformat(grade_data['date']),
+                comment=grade_data.get('comment', '')
+            )
+            for grade_data in seed_data['grades']
+        ])
+
+        repositories['attendance'].create_many([
+            Attendance(
+                id=None,
+                student_id=students_dict[attendance_data['student_name']].id,
+                subject_id=subjects_dict[attendance_data['subject_name']].id,
+                date=date.fromisoformat(attendance_data['date']),
+                present=attendance_data['present'],
+                reason=attendance_data.get('reason', '')
+            )
+            for attendance_data in seed_data['attendance']
+        ])
+
+
 def print_credentials():
     print("\n" + "="*50)
     print("ТЕСТОВЫЕ УЧЕТНЫЕ ДАННЫЕ")
@@ -162,4 +262,10 @@ def print_credentials():
 
 
 if __name__ == '__main__':
-    init_database()
+    parser = argparse.ArgumentParser(description='Заполнение базы данными из seed.json')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Пакетная вставка одной транзакцией и хеширование паролей в пуле процессов')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Число процессов для хеширования паролей (по умолчанию - число ядер)')
+    args = parser.parse_args()
+    init_database(bulk=args.bulk, workers=args.workers)
@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import sys
+
+from run import CleanArchitectureApp
+
+
+def create_app_factory(args, config: dict | None = None) -> CleanArchitectureApp:
+    app_config = {'DATABASE_PATH': args.db} if args.db else {}
+    app_config.update(config or {})
+    app_factory = CleanArchitectureApp()
+    app_factory.create_app(app_config, web=False)
+    return app_factory
+
+
+def migrate(args):
+    from infrastructure.database.connection import DatabaseConnection
+    from infrastructure.database.migrations import MigrationRunner
+    from infrastructure.database.pragmas import resolve_pragmas
+
+    # Без создания приложения: оно может отказаться стартовать на устаревшей схеме
+    db_connection = DatabaseConnection(args.db or 'instance/diary.db',
+                                       pragmas=resolve_pragmas(os.environ.get('DATABASE_PRAGMA_PROFILE') or 'wal'))
+    runner = MigrationRunner(db_connection)
+
+    if args.status:
+        applied = {item['version']: item for item in runner.applied()}
+        for migration in runner.migrations:
+            item = applied.get(migration.version)
+            state = f"применена {item['applied_at']}" if item else 'не применена'
+            print(f"  {migration.version:>3} {migration.name}: {state}")
+        return
+
+    applied = runner.migrate(args.target)
+    for migration in applied:
+        print(f"✅ Миграция {migration.version} {migration.name} применена")
+    print(f"Версия схемы: {runner.current_version()} (последняя {runner.latest_version})")
+
+
+def startup_report(args):
+    # Импорты считаются один раз на процесс, поэтому первый запуск показывает холодный старт воркера
+    app_config = {'DATABASE_PATH': args.db} if args.db else {}
+    reports = []
+    for _ in range(args.repeat):
+        app_factory = CleanArchitectureApp()
+        app_factory.create_app(app_config, web=not args.no_web)
+        reports.append(app_factory.startup.report())
+        if app_factory.data_versions:
+            app_factory.data_versions.close()
+        app_factory.db_connection.close()
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+        return
+    for number, report in enumerate(reports, 1):
+        print(f"Запуск {number}:")
+        for phase, duration in report.items():
+            print(f"  {phase:<14} {duration:>9.2f} мс")
+
+
+def rebuild_grade_summary(args):
+    app_factory = create_app_factory(args)
+    rows = app_factory.repositories['grade'].rebuild_summary()
+    print(f"✅ Сводка оценок пересчитана: {rows} строк в grade_summary")
+
+
+def generate_school(args):
+    from tools.school_generator import SchoolGenerator, SchoolParameters, SYNTHETIC_PASSWORD
+
+    db_path = args.db or 'instance/diary.db'
+    if os.path.exists(db_path):
+        if not args.force:
+            sys.exit(f"База {db_path} уже существует, используйте --force для перезаписи")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    params = SchoolParameters(
+        classes=args.classes,
+        students_per_class=args.students,
+        subjects=args.subjects,
+        years=args.years,
+        grades_per_week=args.grades_per_week,
+        attendance_per_week=args.attendance_per_week,
+        seed=args.seed
+    )
+    app_factory = create_app_factory(args, {'DATABASE_PATH': db_path})
+    counts = SchoolGenerator(app_factory, params).generate()
+
+    print(f"✅ Синтетическая школа записана в {db_path}")
+    for name, count in counts.items():
+        print(f"  {name}: {count}")
+    print(f"Пароль всех пользователей: {SYNTHETIC_PASSWORD} (admin1, teacher1, parent1, student1, ...)")
+
+
+def benchmark(args):
+    from tools.benchmark import DiaryBenchmark
+
+    db_path = args.db or 'instance/diary.db'
+    report = DiaryBenchmark(db_path, iterations=args.iterations, seed=args.seed, warmup=args.warmup).run()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"✅ Результаты записаны в {args.output}")
+    else:
+        print(output)
+
+
+def login_benchmark(args):
+    from tools.login_benchmark import LoginBenchmark, DEFAULT_METHODS
+
+    db_path = args.db or 'instance/diary.db'
+    report = LoginBenchmark(db_path, methods=tuple(args.methods or DEFAULT_METHODS), logins=args.logins).run()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"✅ Результаты записаны в {args.output}")
+    else:
+        print(output)
+
+
+def index_advisor(args):
+    from tools.index_advisor import IndexAdvisor
+
+    db_path = args.db or 'instance/diary.db'
+    try:
+        report = IndexAdvisor(db_path).run()
+    except RuntimeError as e:
+        sys.exit(str(e))
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        for item in report['flagged']:
+            print(f"⚠️  {item['method']}: {', '.join(item['issues'])}")
+            print(f"    {item['statement']}")
+            for line in item['plan']:
+                print(f"      {line}")
+        if args.verbose:
+            for item in report['allowed']:
+                print(f"ℹ️  {item['method']}: {', '.join(item['issues'])} - {item['reason']}")
+        for method in report['uncovered_methods']:
+            print(f"❔ {method}: нет в нагрузке советника, запросы не проверены")
+        print(f"Проверено запросов: {report['statements']}, проблемных: {len(report['flagged'])}, "
+              f"ожидаемых: {len(report['allowed'])}, непроверенных методов: {len(report['uncovered_methods'])}")
+
+    # Ненулевой код выхода позволяет ловить регрессии индексов в CI
+    if report['flagged'] or report['uncovered_methods']:
+        sys.exit(1)
+
+
+def schedule_conflicts(args):
+    from tools.schedule_conflicts import find_timetable_conflicts
+
+    app_factory = create_app_factory(args)
+    try:
+        conflicts = find_timetable_conflicts(app_factory.repositories['schedule'], app_factory.repositories['subject'],
+                                             args.file, args.merge)
+    except (OSError, ValueError, KeyError) as e:
+        sys.exit(f"Не удалось прочитать расписание: {e}")
+
+    if args.json:
+        print(json.dumps([conflict.to_dict() for conflict in conflicts], ensure_ascii=False, indent=2))
+    else:
+        for conflict in conflicts:
+            print(f"⚠️  {conflict}")
+        print(f"Пересечений: {len(conflicts)}")
+
+    # Как и index-advisor: ненулевой код выхода останавливает импорт в скриптах
+    if conflicts:
+        sys.exit(1)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Служебные команды электронного дневника')
+    parser.add_argument('--db', default=os.environ.get('DATABASE_PATH'),
+                        help='Путь к базе SQLite (по умолчанию instance/diary.db)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migration = subparsers.add_parser('migrate', help='Применить недостающие миграции схемы')
+    migration.add_argument('--target', type=int, help='Применить миграции только до этой версии')
+    migration.add_argument('--status', action='store_true', help='Показать примененные и ожидающие миграции')
+    migration.set_defaults(handler=migrate)
+
+    startup = subparsers.add_parser('startup-report', help='Показать время запуска приложения по фазам')
+    startup.add_argument('--repeat', type=int, default=1, help='Сколько раз создать приложение в одном процессе')
+    startup.add_argument('--no-web', action='store_true', help='Без веб-слоя, как служебные команды')
+    startup.add_argument('--json', action='store_true', help='Вывести отчет в JSON')
+    startup.set_defaults(handler=startup_report)
+
+    rebuild = subparsers.add_parser('rebuild-grade-summary',
+                                    help='Пересчитать таблицу grade_summary по всем оценкам')
+    rebuild.set_defaults(handler=rebuild_grade_summary)
+
+    generate = subparsers.add_parser('generate-school', help='Создать базу с синтетической школой')
+    generate.add_argument('--classes', type=int, default=4, help='Число классов')
+    generate.add_argument('--students', type=int, default=25, help='Учеников в классе')
+    generate.add_argument('--subjects', type=int, default=8, help='Число предметов')
+    generate.add_argument('--years', type=int, default=1, help='Учебных лет с оценками и посещаемостью')
+    generate.add_argument('--grades-per-week', type=int, default=1,
+                          help='Оценок в неделю у ученика по каждому предмету')
+    generate.add_argument('--attendance-per-week', type=int, default=1,
+                          help='Отметок посещаемости в неделю у ученика по каждому предмету')
+    generate.add_argument('--seed', type=int, default=42, help='Зерно генератора случайных чисел')
+    generate.add_argument('--force', action='store_true', help='Перезаписать существующую базу')
+    generate.set_defaults(handler=generate_school)
+
+    bench = subparsers.add_parser('benchmark', help='Замерить задержки основных страниц через тестовый клиент')
+    bench.add_argument('--iterations', type=int, default=50, help='Запросов на сценарий')
+    bench.add_argument('--warmup', type=int, default=3, help='Прогревочных запросов на сценарий')
+    bench.add_argument('--seed', type=int, default=42, help='Зерно выбора учеников и предметов')
+    bench.add_argument('--output', help='Файл для JSON-результатов (по умолчанию - stdout)')
+    bench.set_defaults(handler=benchmark)
+
+    logins = subparsers.add_parser('login-benchmark',
+                                   help='Замерить число входов в секунду на ядро для политик хеширования паролей')
+    logins.add_argument('--methods', nargs='+',
+                        help='Методы werkzeug, например pbkdf2:sha256:260000 scrypt:32768:8:1')
+    logins.add_argument('--logins', type=int, default=20, help='Входов на метод')
+    logins.add_argument('--output', help='Файл для JSON-результатов (по умолчанию - stdout)')
+    logins.set_defaults(handler=login_benchmark)
+
+    advisor = subparsers.add_parser('index-advisor',
+                                    help='Проверить планы всех запросов репозиториев через EXPLAIN QUERY PLAN')
+    advisor.add_argument('--json', action='store_true', help='Вывести полный отчет в JSON')
+    advisor.add_argument('--verbose', action='store_true', help='Показать и ожидаемые проходы с причинами')
+    advisor.set_defaults(handler=index_advisor)
+
+    conflicts = subparsers.add_parser('schedule-conflicts',
+                                      help='Найти уроки, занимающие один кабинет или учителя в одно время')
+    conflicts.add_argument('--file', help='JSON с импортируемым расписанием (формат seed.json)')
+    conflicts.add_argument('--merge', action='store_true', help='Проверять файл вместе с сохраненным расписанием')
+    conflicts.add_argument('--json', action='store_true', help='Вывести пересечения в JSON')
+    conflicts.set_defaults(handler=schedule_conflicts)
+
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
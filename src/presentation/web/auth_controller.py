@@ -1,12 +1,17 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required
 from application.services.auth_service import AuthService
+from application.services.password_verifier import LoginOverloadedError
+from domain.entities.page import STUDENT_CURSOR, USER_CURSOR, decode_cursor
 from domain.entities.user import UserRole
 from presentation.forms.auth_forms import LoginForm, RegisterForm, ChangePasswordForm, SetupRelationshipsForm
 
 
 class AuthController:
 
+    # Вариантов в списках формы связей и в одном ответе поиска
+    OPTIONS_PAGE_SIZE = 20
+
     def __init__(self, auth_service: AuthService):
         self.auth_service = auth_service
         self.bp = Blueprint('auth', __name__)
@@ -18,7 +23,13 @@ class AuthController:
         def login():
             form = LoginForm()
             if form.validate_on_submit():
-                user = self.auth_service.authenticate_user(form.username.data, form.password.data)
+                try:
+                    user = self.auth_service.authenticate_user(form.username.data, form.password.data)
+                except LoginOverloadedError as e:
+                    # Быстрый отказ при всплеске входов: потоки воркера остаются для остальных страниц
+                    flash(f'Сервер перегружен входами, повторите попытку через {e.retry_after} с', 'error')
+                    return (render_template('auth/login.html', form=form), 503,
+                            {'Retry-After': str(e.retry_after)})
                 if user:
                     from flask_login import login_user
                     login_user(user, remember=form.remember_me.data)
@@ -69,8 +80,7 @@ class AuthController:
                 if not current_user.check_password(form.current_password.data):
                     flash('Неверный текущий пароль', 'error')
                 else:
-                    current_user.set_password(form.new_password.data)
-                    # TODO: Обновить в репозитории
+                    self.auth_service.change_password(current_user, form.new_password.data)
                     flash('Пароль успешно изменен', 'success')
                     return redirect(url_for('auth.profile'))
 
@@ -92,14 +102,20 @@ class AuthController:
                 flash(message, 'success' if not success else 'error')
                 return redirect(url_for('auth.setup_relationships'))
 
-                # Получаем данные для формы
-            all_parents = self.auth_service.user_repo.get_by_role(UserRole.PARENT)
-            all_students = self.auth_service.student_repo.get_all()
-
+            # В списки попадает только первая страница, остальные варианты подгружаются поиском
             form = SetupRelationshipsForm()
-            form.parent_id.choices = [(parent.id, f"{parent.get_full_name()} ({parent.username})") for parent in
-                                      all_parents]
-            form.child_id.choices = [(student.id, f"{student.name} ({student.class_name})") for student in all_students]
+            parents = self.auth_service.search_parents(self.OPTIONS_PAGE_SIZE).items
+            students = self.auth_service.search_students(self.OPTIONS_PAGE_SIZE).items
+            if form.is_submitted():
+                # Выбранные через поиск варианты могут не входить в первую страницу
+                parent = self.auth_service.user_repo.get_by_id(_int_or_none(form.parent_id.raw_data))
+                student = self.auth_service.student_repo.get_by_id(_int_or_none(form.child_id.raw_data))
+                if parent and parent.is_parent() and parent.id not in {p.id for p in parents}:
+                    parents.insert(0, parent)
+                if student and student.id not in {s.id for s in students}:
+                    students.insert(0, student)
+            form.parent_id.choices = [(parent.id, _parent_label(parent)) for parent in parents]
+            form.child_id.choices = [(student.id, _student_label(student)) for student in students]
 
             # Обработка создания связи
             if form.validate_on_submit():
@@ -110,5 +126,44 @@ class AuthController:
 
             return render_template('auth/setup_relationships.html', form=form, user=current_user)
 
+        @self.bp.route('/relationship_options/<kind>')
+        @login_required
+        def relationship_options(kind):
+            from flask_login import current_user
+            if not current_user.is_admin():
+                return jsonify({'error': 'forbidden'}), 403
+
+            search = request.args.get('q', '').strip() or None
+            shapes = {'parents': USER_CURSOR, 'students': STUDENT_CURSOR}
+            if kind not in shapes:
+                return jsonify({'error': 'unknown kind'}), 404
+            try:
+                after = decode_cursor(request.args.get('after'), shapes[kind])
+            except ValueError:
+                return jsonify({'error': 'invalid cursor'}), 400
+
+            if kind == 'parents':
+                page = self.auth_service.search_parents(self.OPTIONS_PAGE_SIZE, after, search)
+                items = [{'id': parent.id, 'label': _parent_label(parent)} for parent in page.items]
+            else:
+                page = self.auth_service.search_students(self.OPTIONS_PAGE_SIZE, after, search)
+                items = [{'id': student.id, 'label': _student_label(student)} for student in page.items]
+            return jsonify({'items': items, 'next_cursor': page.next_cursor})
+
     def get_blueprint(self):
         return self.bp
+
+
+def _parent_label(parent) -> str:
+    return f"{parent.get_full_name()} ({parent.username})"
+
+
+def _student_label(student) -> str:
+    return f"{student.name} ({student.class_name})"
+
+
+def _int_or_none(raw_data) -> int | None:
+    try:
+        return int(raw_data[0]) if raw_data else None
+    except (TypeError, ValueError):
+        return None
@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, redirect, url_for
+from flask import Blueprint, render_template, redirect, request, url_for
 from application.services.student_service import StudentService
+from domain.entities.page import STUDENT_CURSOR, decode_cursor
 
 
 class MainController:
     
+    # Учеников на одной странице главной
+    PAGE_SIZE = 48
+    
     def __init__(self, student_service: StudentService):
         self.student_service = student_service
         self.bp = Blueprint('main', __name__)
@@ -17,8 +21,14 @@ class MainController:
             if not current_user.is_authenticated:
                 return redirect(url_for('auth.login'))
             
-            students = self.student_service.get_all_students(current_user)
-            return render_template('index.html', students=students)
+            search = request.args.get('q', '').strip() or None
+            try:
+                after = decode_cursor(request.args.get('after'), STUDENT_CURSOR)
+            except ValueError:
+                after = None
+            page = self.student_service.get_students_page(current_user, self.PAGE_SIZE, after, search)
+            return render_template('index.html', students=page.items, next_cursor=page.next_cursor,
+                                   is_first_page=after is None, search=search or '')
     
     def get_blueprint(self):
         return self.bp
@@ -1,12 +1,15 @@
-from flask import Blueprint, render_template
+from datetime import date
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response
 from flask_login import login_required
 from application.services.student_service import StudentService
+from application.services.report_service import ReportService
 
 
 class ReportsController:
     
-    def __init__(self, student_service: StudentService):
+    def __init__(self, student_service: StudentService, report_service: ReportService):
         self.student_service = student_service
+        self.report_service = report_service
         self.bp = Blueprint('reports', __name__)
         self._register_routes()
     
@@ -17,10 +20,50 @@ class ReportsController:
         def reports():
             from flask_login import current_user
             
-            # Получаем всех студентов для отчетов
-            students = self.student_service.get_all_students(current_user)
-            
-            return render_template('reports.html', students=students)
+            # Строки отчета отбираются в SQL по области доступа, список учеников целиком не загружается
+            subjects = self.report_service.get_subjects(current_user)
+
+            subject_id = request.args.get('subject_id', type=int)
+            start_date, end_date = self._parse_period()
+            selected_subject = next((subject for subject in subjects if subject.id == subject_id), None)
+
+            report_data = None
+            if selected_subject:
+                report_data = self.report_service.get_subject_report(
+                    selected_subject.id, current_user, start_date, end_date
+                )
+
+            return render_template('reports.html', subjects=subjects,
+                                   selected_subject=selected_subject, report_data=report_data,
+                                   start_date=start_date, end_date=end_date)
+
+        @self.bp.route('/reports/export_csv')
+        @login_required
+        def export_csv():
+            from flask_login import current_user
+
+            subject_id = request.args.get('subject_id', type=int)
+            start_date, end_date = self._parse_period()
+            rows = self.report_service.iter_subject_report_csv(subject_id, current_user, start_date, end_date) \
+                if subject_id else None
+            if rows is None:
+                flash('У вас нет прав для выгрузки отчета', 'error')
+                return redirect(url_for('reports.reports'))
+
+            # Ответ отдается по мере чтения строк из базы
+            return Response(rows, mimetype='text/csv', headers={
+                'Content-Disposition': f'attachment; filename=report_subject_{subject_id}.csv'
+            })
+
+    def _parse_period(self) -> tuple[date | None, date | None]:
+        period = []
+        for name in ('start_date', 'end_date'):
+            value = request.args.get(name)
+            try:
+                period.append(date.fromisoformat(value) if value else None)
+            except ValueError:
+                period.append(None)
+        return period[0], period[1]
     
     def get_blueprint(self):
         return self.bp
@@ -2,44 +2,38 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required
 from datetime import time
 from application.services.student_service import StudentService
+from domain.entities.page import HISTORY_CURSOR, decode_cursor
 
 
 class StudentController:
 
-    def __init__(self, student_service: StudentService):
+    def __init__(self, student_service: StudentService, async_diary: bool = False):
         self.student_service = student_service
+        # Асинхронный дневник требует Flask[async]
+        self.async_diary = async_diary
         self.bp = Blueprint('students', __name__)
         self._register_routes()
 
     def _register_routes(self):
 
-        @self.bp.route('/<int:student_id>')
-        @login_required
-        def student_diary(student_id):
-            from flask_login import current_user
-
-            data = self.student_service.get_student_diary_data(student_id, current_user)
-            if data is None:
-                flash('У вас нет прав для просмотра данных этого студента', 'error')
-                return redirect(url_for('main.index'))
-
-                # Обработка фильтров для расписания
-            if request.args.get('tab') == 'schedule':
-                day_filter = request.args.get('day')
-                subject_filter = request.args.get('subject')
-                time_start_filter = request.args.get('time_start')
-
-                # Парсим фильтры
-                subject_id = int(subject_filter) if subject_filter and subject_filter.isdigit() else None
-                day_of_week = int(day_filter) if day_filter and day_filter.isdigit() else None
-                time_start = time.fromisoformat(time_start_filter) if time_start_filter else None
-
-                # Получаем отфильтрованное расписание
-                if any([day_of_week, subject_id, time_start]):
-                    data['schedule'] = self.student_service.get_filtered_schedule(
-                        subject_id, day_of_week, time_start
-                    )
-            return render_template('student_diary.html', **data)
+        if self.async_diary:
+            @self.bp.route('/<int:student_id>')
+            @login_required
+            async def student_diary(student_id):
+                from flask_login import current_user
+
+                data = await self.student_service.get_student_diary_data_async(
+                    student_id, current_user, **self._history_args())
+                return self._render_diary(data)
+        else:
+            @self.bp.route('/<int:student_id>')
+            @login_required
+            def student_diary(student_id):
+                from flask_login import current_user
+
+                data = self.student_service.get_student_diary_data(student_id, current_user,
+                                                                   **self._history_args())
+                return self._render_diary(data)
 
         @self.bp.route('/<int:student_id>/add_grade', methods=['POST'])
         @login_required
@@ -73,5 +67,43 @@ class StudentController:
                 flash('У вас нет прав для отметки посещаемости', 'error')
             return redirect(url_for('students.student_diary', student_id=student_id))
 
+    @staticmethod
+    def _history_args() -> dict:
+        # Период и курсоры страниц истории из параметров запроса; испорченный курсор - первая страница
+        args = {'period': request.args.get('period') or None}
+        for name in ('grades_after', 'attendance_after'):
+            try:
+                args[name] = decode_cursor(request.args.get(name), HISTORY_CURSOR)
+            except ValueError:
+                args[name] = None
+        return args
+
+    def _render_diary(self, data):
+        if data is None:
+            flash('У вас нет прав для просмотра данных этого студента', 'error')
+            return redirect(url_for('main.index'))
+
+        # Обработка фильтров для расписания
+        if request.args.get('tab') == 'schedule':
+            day_filter = request.args.get('day')
+            subject_filter = request.args.get('subject')
+            time_start_filter = request.args.get('time_start')
+
+            # Парсим фильтры
+            subject_id = int(subject_filter) if subject_filter and subject_filter.isdigit() else None
+            day_of_week = int(day_filter) if day_filter and day_filter.isdigit() else None
+            try:
+                time_start = time.fromisoformat(time_start_filter) if time_start_filter else None
+            except ValueError:
+                time_start = None
+
+            # Получаем отфильтрованное расписание (понедельник - день 0, поэтому сравнение с None)
+            if day_of_week is not None or subject_id is not None or time_start is not None:
+                data['schedule'] = self.student_service.get_filtered_schedule(
+                    day_of_week=day_of_week, subject_id=subject_id, time_start=time_start
+                )
+            data['current_lessons'] = self.student_service.get_current_lessons()
+        return render_template('student_diary.html', **data)
+
     def get_blueprint(self):
         return self.bp
@@ -1,10 +1,20 @@
+import time
+
+# Время импорта модулей приложения входит в отчет о запуске (фаза imports)
+_IMPORT_STARTED = time.perf_counter()
+
+import logging
 import os
-from flask import Flask
+from flask import Flask, request
 from flask_login import LoginManager
 
 # Infrastructure
 from infrastructure.database.connection import DatabaseConnection
-from infrastructure.database.schema import CREATE_TABLES_SQL, INDEXES_SQL
+from infrastructure.database.pragmas import resolve_pragmas
+from infrastructure.cache.ttl_cache import TTLCache
+from infrastructure.database.data_versions import DataVersionTracker
+from infrastructure.database.migrations import MigrationRunner
+from infrastructure.startup import LazyRegistry, StartupTimer
 
 # Repositories
 from infrastructure.repositories.user_repository import UserRepository
@@ -13,32 +23,57 @@ from infrastructure.repositories.subject_repository import SubjectRepository
 from infrastructure.repositories.grade_repository import GradeRepository
 from infrastructure.repositories.attendance_repository import AttendanceRepository
 from infrastructure.repositories.schedule_repository import ScheduleRepository
+from infrastructure.repositories.diary_repository import DiaryRepository
+from infrastructure.repositories.report_repository import ReportRepository
+from infrastructure.repositories.cached_reference_repositories import CachedSubjectRepository, CachedScheduleRepository
+from infrastructure.repositories.request_scope import RequestScope, RequestScopedRepository
 
 # Application Services
 from application.services.auth_service import AuthService
 from application.services.student_service import StudentService
-
-# Controllers
-from presentation.web.main_controller import MainController
-from presentation.web.student_controller import StudentController
-from presentation.web.auth_controller import AuthController
-from presentation.web.reports_controller import ReportsController
+from application.services.report_service import ReportService
+from application.services.password_verifier import PasswordVerifier
+from application.services.access_scope_service import AccessScopeService
 
 # Domain entities
-from domain.entities.user import User
+from domain.entities.password_policy import PasswordPolicy
+
+# Контроллеры (вместе с WTForms) и асинхронный слой (asyncio) импортируются при создании:
+# служебным командам без веб-слоя они не нужны
+
+IMPORT_DURATION_MS = (time.perf_counter() - _IMPORT_STARTED) * 1000
+
+startup_logger = logging.getLogger('diary.startup')
 
 
 class CleanArchitectureApp:
+
+    _imports_reported = False
     
     def __init__(self):
         self.app = None
         self.db_connection = None
+        self.data_versions = None
+        self.async_db_connection = None
+        self.password_verifier = None
         self.repositories = {}
+        self.request_scope = RequestScope()
+        self.scoped_repositories = {}
         self.services = {}
         self.controllers = {}
         self.login_manager = LoginManager()
+        self.startup = StartupTimer()
     
-    def create_app(self):
+    def create_app(self, config: dict | None = None, web: bool = True):
+        # web=False - только база, репозитории и сервисы (для manage.py, init_data.py и инструментов):
+        # контроллеры не создаются, маршруты и Flask-Login не настраиваются
+        self.startup = StartupTimer()
+        if not CleanArchitectureApp._imports_reported:
+            # Модули импортируются один раз на процесс - учитываем их только в первом приложении
+            CleanArchitectureApp._imports_reported = True
+            self.startup.add('imports', IMPORT_DURATION_MS)
+        started = time.perf_counter()
+
         # Получаем путь к корневой папке проекта
         basedir = os.path.abspath(os.path.dirname(__file__))
         
@@ -48,71 +83,330 @@ class CleanArchitectureApp:
         
         # Конфигурация
         self.app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'your-secret-key-here'
+        self.app.config['DATABASE_PATH'] = os.environ.get('DATABASE_PATH') or 'instance/diary.db'
+        # Пул соединений: 0 - отключить и открывать соединение на каждый запрос
+        self.app.config['DATABASE_POOL_SIZE'] = int(os.environ.get('DATABASE_POOL_SIZE', 5))
+        self.app.config['DATABASE_POOL_IDLE_TIMEOUT'] = 300.0
+        self.app.config['DATABASE_POOL_HEALTH_CHECK_INTERVAL'] = 30.0
+        self.app.config['DATABASE_POOL_ACQUIRE_TIMEOUT'] = 10.0
+        # Профиль PRAGMA из infrastructure/database/pragmas.py и точечные переопределения
+        self.app.config['DATABASE_PRAGMA_PROFILE'] = os.environ.get('DATABASE_PRAGMA_PROFILE') or 'wal'
+        self.app.config['DATABASE_PRAGMAS'] = {}
+        # Трассировка SQL-выражений (нужна для подсчета запросов в бенчмарке)
+        self.app.config['DATABASE_TRACE_STATEMENTS'] = False
+        # Применять недостающие миграции схемы при старте; в продакшене их можно применять отдельно
+        self.app.config['DATABASE_AUTO_MIGRATE'] = os.environ.get('DATABASE_AUTO_MIGRATE', '1') == '1'
+        # Сбор SQL-запросов каждого HTTP-запроса и заголовок Server-Timing
+        self.app.config['QUERY_INSTRUMENTATION'] = os.environ.get('QUERY_INSTRUMENTATION', '1') == '1'
+        self.app.config['SERVER_TIMING_HEADER'] = True
+        # Порог журнала медленных запросов в миллисекундах (None - отключить) и захват EXPLAIN QUERY PLAN
+        self.app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+        self.app.config['SLOW_QUERY_EXPLAIN'] = os.environ.get('SLOW_QUERY_EXPLAIN') == '1'
+        # Сколько одинаковых запросов за один HTTP-запрос считать подозрением на N+1
+        self.app.config['QUERY_REPEAT_WARNING'] = 10
+        # Политика хеширования паролей в формате werkzeug ('pbkdf2:sha256:<итерации>' или 'scrypt:<n>:<r>:<p>').
+        # Хеши с другой стоимостью пересчитываются при следующем успешном входе
+        self.app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256:600000'
+        self.app.config['PASSWORD_SALT_LENGTH'] = 16
+        # Проверка паролей в отдельном пуле потоков (0 - в потоке запроса). Если в очереди уже
+        # LOGIN_MAX_PENDING проверок, вход сразу отвечает 503 с Retry-After; лимит стоит держать ниже
+        # числа потоков воркера, чтобы всплеск входов не занял их все
+        self.app.config['LOGIN_VERIFY_THREADS'] = int(os.environ.get('LOGIN_VERIFY_THREADS', 2))
+        self.app.config['LOGIN_MAX_PENDING'] = int(os.environ.get('LOGIN_MAX_PENDING', 16))
+        self.app.config['LOGIN_VERIFY_TIMEOUT'] = 10.0
+        self.app.config['LOGIN_RETRY_AFTER'] = 2
+        # Кеш пользователей для user_loader: размер (0 - отключить) и время жизни записи в секундах
+        self.app.config['USER_CACHE_SIZE'] = 1024
+        self.app.config['USER_CACHE_TTL'] = 60.0
+        # Кеш областей доступа (какие ученики видны родителю или школьнику): размер (0 - отключить) и время жизни
+        self.app.config['ACCESS_SCOPE_CACHE_SIZE'] = 4096
+        self.app.config['ACCESS_SCOPE_CACHE_TTL'] = 300.0
+        # Кеш справочников (предметы и расписание) в памяти процесса
+        self.app.config['REFERENCE_CACHE'] = True
+        # Отклонять уроки, занимающие уже занятый в это время кабинет или учителя
+        self.app.config['SCHEDULE_CONFLICT_CHECK'] = True
+        # Запоминать пользователей и учеников, загруженные по id, до конца HTTP-запроса
+        self.app.config['REQUEST_SCOPED_LOADING'] = True
+        # Как часто (в секундах) сверять версии данных в таблице data_versions, чтобы увидеть записи
+        # других процессов; None - кеши видят только изменения своего процесса
+        self.app.config['DATA_VERSION_POLL_INTERVAL'] = 0.2
+        # Асинхронный дневник (нужен Flask[async]): чтения выполняются параллельно в пуле потоков ('thread')
+        # или через aiosqlite ('aiosqlite'); None в ASYNC_DB_THREADS - по размеру пула соединений
+        self.app.config['ASYNC_DIARY'] = os.environ.get('ASYNC_DIARY') == '1'
+        self.app.config['ASYNC_DB_DRIVER'] = os.environ.get('ASYNC_DB_DRIVER') or 'thread'
+        self.app.config['ASYNC_DB_THREADS'] = None
+        if config:
+            self.app.config.update(config)
+        self.startup.add('flask', (time.perf_counter() - started) * 1000)
         
-        # Инициализация базы данных
+        # Инициализация базы данных (фазы database и schema)
         self._init_database()
         
         # Инициализация репозиториев
-        self._init_repositories()
+        with self.startup.phase('repositories'):
+            self._init_repositories()
         
-        # Инициализация сервисов
+        # Сервисы и контроллеры создаются при первом обращении
         self._init_services()
-        
-        # Инициализация контроллеров
         self._init_controllers()
         
-        # Настройка Flask-Login
-        self._init_login_manager()
-        
-        # Регистрация маршрутов
-        self._register_blueprints()
+        if web:
+            with self.startup.phase('blueprints'):
+                # Настройка Flask-Login
+                self._init_login_manager()
+                
+                # Сбор статистики SQL-запросов
+                self._init_query_instrumentation()
+                
+                # Память сущностей на время запроса
+                self._init_request_scope()
+                
+                # Регистрация маршрутов (создает контроллеры и нужные им сервисы)
+                self._register_blueprints()
         
+        startup_logger.info('Запуск приложения: %s', self.startup.format())
         return self.app
     
     def _init_database(self):
-        self.db_connection = DatabaseConnection()
+        config = self.app.config if self.app else {}
+        database_started = time.perf_counter()
+        self.db_connection = DatabaseConnection(
+            config.get('DATABASE_PATH', 'instance/diary.db'),
+            pool_size=config.get('DATABASE_POOL_SIZE', 0),
+            pool_idle_timeout=config.get('DATABASE_POOL_IDLE_TIMEOUT', 300.0),
+            pool_health_check_interval=config.get('DATABASE_POOL_HEALTH_CHECK_INTERVAL', 30.0),
+            pool_acquire_timeout=config.get('DATABASE_POOL_ACQUIRE_TIMEOUT', 10.0),
+            pragmas=resolve_pragmas(config.get('DATABASE_PRAGMA_PROFILE'), config.get('DATABASE_PRAGMAS')),
+            trace_statements=config.get('DATABASE_TRACE_STATEMENTS', False),
+            slow_query_threshold_ms=config.get('SLOW_QUERY_THRESHOLD_MS'),
+            explain_slow_queries=config.get('SLOW_QUERY_EXPLAIN', False)
+        )
         
-        # Создание таблиц
-        with self.db_connection.get_connection() as conn:
-            conn.executescript(CREATE_TABLES_SQL)
-            conn.executescript(INDEXES_SQL)
+        poll_interval = config.get('DATA_VERSION_POLL_INTERVAL')
+        if poll_interval is not None:
+            self.data_versions = DataVersionTracker(self.db_connection, poll_interval)
+        self.startup.add('database', (time.perf_counter() - database_started) * 1000)
+
+        # Схема базы: на старте проверяется только номер версии, DDL выполняется, только если есть
+        # недостающие миграции - автоматически или (DATABASE_AUTO_MIGRATE = False) командой manage.py migrate
+        with self.startup.phase('schema'):
+            migrations = MigrationRunner(self.db_connection)
+            if config.get('DATABASE_AUTO_MIGRATE', True):
+                migrations.migrate()
+            else:
+                pending = migrations.pending()
+                if pending:
+                    raise RuntimeError(f'Схема базы устарела, не применены миграции '
+                                       f'{", ".join(str(migration.version) for migration in pending)}: '
+                                       f'python manage.py migrate')
     
     def _init_repositories(self):
+        subject_repo = SubjectRepository(self.db_connection)
+        schedule_repo = ScheduleRepository(
+            self.db_connection,
+            check_conflicts=self.app.config.get('SCHEDULE_CONFLICT_CHECK', False) if self.app else False
+        )
+        grade_repo = GradeRepository(self.db_connection)
+        reference_cache = self.app.config.get('REFERENCE_CACHE', False) if self.app else False
+        if reference_cache:
+            # Справочники меняются раз в четверть - читаем их из снимка в памяти
+            subject_repo = CachedSubjectRepository(subject_repo, self.data_versions)
+            schedule_repo = CachedScheduleRepository(schedule_repo, subject_repo, self.data_versions)
+
         self.repositories = {
             'user': UserRepository(self.db_connection),
             'student': StudentRepository(self.db_connection),
-            'subject': SubjectRepository(self.db_connection),
-            'grade': GradeRepository(self.db_connection),
+            'subject': subject_repo,
+            'grade': grade_repo,
             'attendance': AttendanceRepository(self.db_connection),
-            'schedule': ScheduleRepository(self.db_connection),
+            'schedule': schedule_repo,
+            'diary': DiaryRepository(
+                self.db_connection,
+                subject_repo if reference_cache else None,
+                schedule_repo if reference_cache else None,
+                grade_repo
+            ),
+            'report': ReportRepository(self.db_connection),
         }
+
+        if self.app and self.app.config.get('REQUEST_SCOPED_LOADING'):
+            # Пользователь и ученик запрашиваются по id из проверки прав, сервиса и контроллера одного запроса
+            self.scoped_repositories = {
+                name: RequestScopedRepository(self.repositories[name], self.request_scope, name)
+                for name in ('user', 'student')
+            }
+
+        if self.app and self.app.config.get('ASYNC_DIARY'):
+            try:
+                import asgiref  # noqa: F401 - без него Flask не выполняет async-обработчики
+            except ImportError:
+                raise RuntimeError('ASYNC_DIARY требует Flask с поддержкой async: pip install "Flask[async]"')
+            from infrastructure.database.async_connection import AsyncDatabaseConnection
+            from infrastructure.repositories.async_repositories import AsyncRepository, AsyncDiaryRepository
+
+            config = self.app.config
+            self.async_db_connection = AsyncDatabaseConnection(
+                self.db_connection,
+                driver=config.get('ASYNC_DB_DRIVER', 'thread'),
+                max_workers=config.get('ASYNC_DB_THREADS') or max(config.get('DATABASE_POOL_SIZE', 0), 4)
+            )
+            self.repositories['async_diary'] = AsyncDiaryRepository(
+                self.async_db_connection,
+                AsyncRepository(grade_repo, self.async_db_connection),
+                AsyncRepository(subject_repo, self.async_db_connection) if reference_cache else None,
+                AsyncRepository(schedule_repo, self.async_db_connection) if reference_cache else None
+            )
     
     def _init_services(self):
-        self.services = {
-            'auth': AuthService(
-                self.repositories['user'],
-                self.repositories['student']
+        self.services = LazyRegistry({
+            'auth': lambda: AuthService(
+                self._service_repository('user'),
+                self._service_repository('student'),
+                self._create_user_cache(),
+                self.create_password_policy(),
+                self._create_password_verifier(),
+                self.services['access_scope']
             ),
-        }
-        
-        # Student service зависит от auth service
-        self.services['student'] = StudentService(
-            self.repositories['student'],
-            self.repositories['grade'],
-            self.repositories['attendance'],
-            self.repositories['schedule'],
-            self.repositories['subject'],
-            self.services['auth']
+            # Какие ученики видны пользователю, с кешем по id пользователя
+            'access_scope': lambda: AccessScopeService(
+                self._service_repository('user'),
+                self._service_repository('student'),
+                self._create_access_scope_cache()
+            ),
+            # Student service зависит от auth service
+            'student': lambda: StudentService(
+                self._service_repository('student'),
+                self.repositories['grade'],
+                self.repositories['attendance'],
+                self.repositories['schedule'],
+                self.repositories['subject'],
+                self.services['auth'],
+                self.repositories['diary'],
+                self.repositories.get('async_diary')
+            ),
+            'report': lambda: ReportService(
+                self.repositories['report'],
+                self.repositories['subject'],
+                self.services['auth']
+            ),
+        })
+    
+    def _service_repository(self, name: str):
+        # Сервисы получают репозиторий с памятью запроса, если она включена
+        if name not in self.scoped_repositories:
+            return self.repositories[name]
+        return self.scoped_repositories[name]
+
+    def create_password_policy(self) -> PasswordPolicy:
+        # Та же политика нужна начальному заполнению и генератору данных, чтобы их хеши не пересчитывались при входе
+        return PasswordPolicy(self.app.config['PASSWORD_HASH_METHOD'], self.app.config['PASSWORD_SALT_LENGTH'])
+
+    def _create_password_verifier(self) -> PasswordVerifier | None:
+        config = self.app.config if self.app else {}
+        threads = config.get('LOGIN_VERIFY_THREADS', 0)
+        if threads <= 0:
+            return None
+        self.password_verifier = PasswordVerifier(
+            max_workers=threads,
+            max_pending=config.get('LOGIN_MAX_PENDING', 16),
+            timeout=config.get('LOGIN_VERIFY_TIMEOUT', 10.0),
+            retry_after=config.get('LOGIN_RETRY_AFTER', 2)
         )
+        return self.password_verifier
+
+    def _create_access_scope_cache(self) -> TTLCache | None:
+        config = self.app.config if self.app else {}
+        size = config.get('ACCESS_SCOPE_CACHE_SIZE', 0)
+        if size <= 0:
+            return None
+        external_version = None
+        if self.data_versions:
+            # Связи родителей, предметы учителей и профили учеников могут меняться в других процессах;
+            # версия сверяется для каждого пользователя отдельно по журналу data_changes
+            external_version = lambda user_id: self.data_versions.row_version(
+                user_id, 'users', 'parent_child', 'teacher_subject', 'students')
+        return TTLCache(max_size=size, ttl=config.get('ACCESS_SCOPE_CACHE_TTL', 300.0),
+                        external_version=external_version)
+
+    def _create_user_cache(self) -> TTLCache | None:
+        config = self.app.config if self.app else {}
+        size = config.get('USER_CACHE_SIZE', 0)
+        if size <= 0:
+            return None
+        external_version = None
+        if self.data_versions:
+            # Профиль в кеше собирается из users и students
+            external_version = lambda user_id: self.data_versions.row_version(user_id, 'users', 'students')
+        return TTLCache(max_size=size, ttl=config.get('USER_CACHE_TTL', 60.0), external_version=external_version)
     
     def _init_controllers(self):
-        self.controllers = {
-            'main': MainController(self.services['student']),
-            'student': StudentController(self.services['student']),
-            'auth': AuthController(self.services['auth']),
-            'reports': ReportsController(self.services['student'])
-        }
+        self.controllers = LazyRegistry({
+            'main': self._create_main_controller,
+            'student': self._create_student_controller,
+            'auth': self._create_auth_controller,
+            'reports': self._create_reports_controller,
+        })
+
+    def _create_main_controller(self):
+        from presentation.web.main_controller import MainController
+        return MainController(self.services['student'])
+
+    def _create_student_controller(self):
+        from presentation.web.student_controller import StudentController
+        return StudentController(self.services['student'], 'async_diary' in self.repositories)
+
+    def _create_auth_controller(self):
+        from presentation.web.auth_controller import AuthController
+        return AuthController(self.services['auth'])
+
+    def _create_reports_controller(self):
+        from presentation.web.reports_controller import ReportsController
+        return ReportsController(self.services['student'], self.services['report'])
     
+    def _init_request_scope(self):
+        if not self.scoped_repositories:
+            return
+
+        @self.app.before_request
+        def start_request_scope():
+            self.request_scope.start()
+
+        @self.app.teardown_request
+        def stop_request_scope(exc):
+            self.request_scope.stop()
+
+    def _init_query_instrumentation(self):
+        if not self.app.config['QUERY_INSTRUMENTATION']:
+            return
+
+        logger = logging.getLogger('diary.sql')
+
+        @self.app.before_request
+        def start_query_collection():
+            self.db_connection.start_collecting()
+
+        @self.app.after_request
+        def finish_query_collection(response):
+            collector = self.db_connection.stop_collecting()
+            if collector is None:
+                return response
+
+            if self.app.config['SERVER_TIMING_HEADER']:
+                response.headers['Server-Timing'] = collector.server_timing()
+
+            repeated = collector.repeated_statements(self.app.config['QUERY_REPEAT_WARNING'])
+            for statement, count in repeated.items():
+                logger.warning('Возможный N+1: %s %s - запрос выполнен %s раз: %s',
+                               request.method, request.path, count, statement)
+            logger.debug('%s %s: %s запросов, %.1f мс в БД', request.method, request.path,
+                         collector.count, collector.total_duration_ms)
+            return response
+
+        @self.app.teardown_request
+        def drop_query_collection(exc):
+            # after_request не вызывается при необработанном исключении
+            self.db_connection.stop_collecting()
+
     def _init_login_manager(self):
         self.login_manager.init_app(self.app)
         self.login_manager.login_view = 'auth.login'
@@ -121,12 +415,8 @@ class CleanArchitectureApp:
         
         @self.login_manager.user_loader
         def load_user(user_id):
-            user = self.repositories['user'].get_by_id(int(user_id))
-            if user and user.is_student():
-                # Загружаем профиль студента для пользователей с ролью student
-                student_profile = self.repositories['student'].get_by_user_id(user.id)
-                user.student_profile = student_profile
-            return user
+            # Пользователь и профиль ученика берутся из кеша AuthService, БД - только при промахе
+            return self.services['auth'].load_user(int(user_id))
     
     def _register_blueprints(self):
         self.app.register_blueprint(self.controllers['main'].get_blueprint())
@@ -135,9 +425,9 @@ class CleanArchitectureApp:
         self.app.register_blueprint(self.controllers['reports'].get_blueprint(), url_prefix='/reports')
 
 
-def create_app():
+def create_app(config: dict | None = None):
     app_factory = CleanArchitectureApp()
-    return app_factory.create_app()
+    return app_factory.create_app(config)
 
 
 if __name__ == '__main__':
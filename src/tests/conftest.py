@@ -0,0 +1,45 @@
+import pytest
+
+from domain.entities.student import Student
+from domain.entities.user import User, UserRole
+from infrastructure.database.connection import DatabaseConnection
+from infrastructure.database.migrations import MigrationRunner
+from infrastructure.repositories.student_repository import StudentRepository
+from infrastructure.repositories.user_repository import UserRepository
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    # Отдельный файл базы на тест со схемой всех миграций
+    path = str(tmp_path / 'diary.db')
+    db = DatabaseConnection(path)
+    MigrationRunner(db).migrate()
+    db.close()
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    connection = DatabaseConnection(db_path)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def make_user(db):
+    repo = UserRepository(db)
+
+    def make(username: str, role: UserRole = UserRole.TEACHER, first_name: str = 'Имя',
+             last_name: str = 'Фамилия') -> User:
+        return repo.create(User(id=None, username=username, email=f'{username}@school.test', password_hash='x',
+                                role=role, first_name=first_name, last_name=last_name))
+    return make
+
+
+@pytest.fixture
+def make_student(db):
+    repo = StudentRepository(db)
+
+    def make(name: str, class_name: str = '5А', user_id: int | None = None) -> Student:
+        return repo.create(Student(id=None, name=name, class_name=class_name, user_id=user_id))
+    return make
@@ -0,0 +1,92 @@
+import pytest
+
+from domain.entities.user import UserRole
+from infrastructure.cache.ttl_cache import TTLCache
+from infrastructure.database.connection import DatabaseConnection
+from infrastructure.database.data_versions import DataVersionTracker
+from infrastructure.repositories.student_repository import StudentRepository
+from infrastructure.repositories.user_repository import UserRepository
+
+
+@pytest.fixture
+def other_db(db_path):
+    # Второй процесс (воркер) с собственным соединением к тому же файлу
+    connection = DatabaseConnection(db_path)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def tracker(other_db):
+    tracker = DataVersionTracker(other_db, poll_interval=0)
+    tracker.refresh()
+    yield tracker
+    tracker.close()
+
+
+@pytest.fixture
+def user_cache(tracker):
+    return TTLCache(max_size=16, ttl=60.0,
+                    external_version=lambda user_id: tracker.row_version(user_id, 'users', 'students'))
+
+
+def cache_user(cache: TTLCache, user_repo: UserRepository, user_id: int):
+    # Как AuthService.load_user: промах, чтение из базы, запись в кеш
+    assert cache.get(user_id) is None
+    cache.set(user_id, user_repo.get_by_id(user_id))
+
+
+def test_write_from_other_connection_drops_only_that_entry(db, other_db, make_user, user_cache):
+    first, second = make_user('first'), make_user('second')
+    other_repo = UserRepository(other_db)
+    cache_user(user_cache, other_repo, first.id)
+    cache_user(user_cache, other_repo, second.id)
+
+    first.first_name = 'Новое'
+    UserRepository(db).update(first)
+
+    assert user_cache.get(first.id) is None
+    assert user_cache.get(second.id).username == 'second'
+
+
+def test_student_profile_change_drops_both_owners(db, other_db, make_user, make_student, user_cache):
+    old_owner, new_owner = make_user('old', UserRole.STUDENT), make_user('new', UserRole.STUDENT)
+    student = make_student('Ученик', user_id=old_owner.id)
+    other_repo = UserRepository(other_db)
+    cache_user(user_cache, other_repo, old_owner.id)
+    cache_user(user_cache, other_repo, new_owner.id)
+
+    student.user_id = new_owner.id
+    StudentRepository(db).update(student)
+
+    assert user_cache.get(old_owner.id) is None
+    assert user_cache.get(new_owner.id) is None
+
+
+def test_value_loaded_before_concurrent_write_is_not_trusted(db, other_db, make_user, user_cache):
+    user = make_user('user')
+    other_repo = UserRepository(other_db)
+
+    # Промах и чтение, затем запись из другого соединения, и только потом значение кладется в кеш
+    assert user_cache.get(user.id) is None
+    stale = other_repo.get_by_id(user.id)
+    user.first_name = 'Новое'
+    UserRepository(db).update(user)
+    user_cache.set(user.id, stale)
+
+    assert user_cache.get(user.id) is None
+
+
+def test_truncated_change_log_invalidates_all_entries(db, other_db, make_user, user_cache):
+    first, second = make_user('first'), make_user('second')
+    other_repo = UserRepository(other_db)
+    cache_user(user_cache, other_repo, first.id)
+    cache_user(user_cache, other_repo, second.id)
+
+    # Журнал обрезан раньше, чем процесс его дочитал: какие пользователи менялись, неизвестно
+    UserRepository(db).update(first)
+    UserRepository(db).update(first)
+    db.execute_update("DELETE FROM data_changes WHERE seq < (SELECT MAX(seq) FROM data_changes)")
+
+    assert user_cache.get(first.id) is None
+    assert user_cache.get(second.id) is None
@@ -0,0 +1,117 @@
+import pytest
+
+from domain.entities.page import (HISTORY_CURSOR, STUDENT_CURSOR, USER_CURSOR, check_cursor, decode_cursor,
+                                  encode_cursor)
+from domain.entities.user import UserRole
+from infrastructure.repositories.student_repository import StudentRepository
+from infrastructure.repositories.user_repository import UserRepository
+
+
+@pytest.mark.parametrize('values, shape', [
+    (('Иванов Иван', 7), STUDENT_CURSOR),
+    (('Иванов', 'Иван', 12), USER_CURSOR),
+    (('2024-09-01', 3), HISTORY_CURSOR),
+])
+def test_cursor_round_trip(values, shape):
+    cursor = encode_cursor(values)
+    assert '=' not in cursor
+    assert decode_cursor(cursor, shape) == values
+
+
+def test_empty_cursor_is_first_page():
+    assert decode_cursor(None, STUDENT_CURSOR) is None
+    assert decode_cursor('', STUDENT_CURSOR) is None
+
+
+@pytest.mark.parametrize('cursor', [
+    '%%%',                                   # не base64
+    encode_cursor(('Иванов', 7))[:-3],       # обрезанный
+    encode_cursor(('Иванов', 7)) + 'x',      # дописанный
+    'bm90IGpzb24',                           # base64, но не JSON
+    'eyJhIjogMX0',                           # JSON-объект вместо списка
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, STUDENT_CURSOR)
+
+
+@pytest.mark.parametrize('values', [
+    [1],
+    ['x', 'y'],
+    [1, 2, 3],
+    ['Иванов'],
+    ['Иванов', 7, 8],
+    ['Иванов', '7'],
+    ['Иванов', True],
+    ['Иванов', 7.5],
+    [['Иванов'], 7],
+    [{'name': 'Иванов'}, 7],
+    [None, 7],
+])
+def test_wrong_shape_student_cursor_is_rejected(values):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(values), STUDENT_CURSOR)
+
+
+@pytest.mark.parametrize('values', [
+    ['Иванов', 'Иван'],
+    ['Иванов', 'Иван', '12'],
+    ['Иванов', 1, 12],
+    ['Иванов', 'Иван', 12, 13],
+])
+def test_wrong_shape_user_cursor_is_rejected(values):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(values), USER_CURSOR)
+
+
+@pytest.mark.parametrize('values', [
+    ['2024-13-01', 1],
+    ['вчера', 1],
+    [20240901, 1],
+    ['2024-09-01', '1'],
+])
+def test_wrong_shape_history_cursor_is_rejected(values):
+    with pytest.raises(ValueError):
+        check_cursor(tuple(values), HISTORY_CURSOR)
+
+
+def test_repositories_reject_malformed_cursor(db):
+    with pytest.raises(ValueError):
+        StudentRepository(db).get_page(10, ('Иванов',))
+    with pytest.raises(ValueError):
+        UserRepository(db).get_page_by_role(UserRole.PARENT, 10, ('Иванов', 'Иван', 'x'))
+
+
+def collect_pages(get_page, limit: int, shape: tuple) -> list:
+    items, after = [], None
+    while True:
+        page = get_page(limit, after)
+        items.extend(page.items)
+        if page.next_cursor is None:
+            return items
+        # Курсор проходит через клиента в виде строки, как в параметре ?after=
+        after = decode_cursor(page.next_cursor, shape)
+
+
+def test_student_pages_stable_for_equal_names(db, make_student):
+    for name in ['Петров', 'Иванов', 'Иванов', 'Иванов', 'Анов', 'Иванов', 'Сидоров']:
+        make_student(name)
+    repo = StudentRepository(db)
+
+    for limit in (1, 2, 3):
+        students = collect_pages(repo.get_page, limit, STUDENT_CURSOR)
+        assert [(student.name, student.id) for student in students] == \
+            sorted((student.name, student.id) for student in repo.get_all())
+        assert len({student.id for student in students}) == 7
+
+
+def test_user_pages_stable_for_equal_names(db, make_user):
+    for number in range(5):
+        make_user(f'parent{number}', UserRole.PARENT, first_name='Иван', last_name='Иванов')
+    make_user('other', UserRole.PARENT, first_name='Анна', last_name='Иванова')
+    make_user('teacher', UserRole.TEACHER, first_name='Иван', last_name='Иванов')
+    repo = UserRepository(db)
+
+    users = collect_pages(lambda limit, after: repo.get_page_by_role(UserRole.PARENT, limit, after), 2,
+                          USER_CURSOR)
+    assert [user.username for user in users] == [f'parent{number}' for number in range(5)] + ['other']
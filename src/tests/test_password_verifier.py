@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+
+from application.services.password_verifier import LoginOverloadedError, PasswordVerifier
+from domain.entities.user import UserRole
+from run import create_app
+
+
+class SlowHasher:
+    # Медленная проверка пароля: каждый вызов ждет, пока тест не откроет gate
+    def __init__(self):
+        self.gate = threading.Event()
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def check(self, password_hash: str, password: str) -> bool:
+        with self._lock:
+            self.calls += 1
+        assert self.gate.wait(5)
+        return password_hash == f'hash:{password}'
+
+
+@pytest.fixture
+def hasher():
+    hasher = SlowHasher()
+    yield hasher
+    hasher.gate.set()
+
+
+@pytest.fixture
+def make_verifier(hasher):
+    verifiers = []
+
+    def make(**kwargs) -> PasswordVerifier:
+        verifier = PasswordVerifier(check=hasher.check, **kwargs)
+        verifiers.append(verifier)
+        return verifier
+    yield make
+    for verifier in verifiers:
+        verifier.close()
+
+
+def in_background(func, *args) -> dict:
+    # Вызов в отдельном потоке; результат или исключение - в словаре после завершения
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = func(*args)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    outcome['thread'] = thread
+    return outcome
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'условие не выполнилось'
+        time.sleep(0.005)
+
+
+def test_rejects_immediately_over_max_pending(hasher, make_verifier):
+    verifier = make_verifier(max_workers=1, max_pending=2, retry_after=7)
+    running = [in_background(verifier.verify, f'user{number}', 'hash:secret', 'secret') for number in range(2)]
+    wait_until(lambda: verifier.get_stats()['pending'] == 2)
+
+    started = time.monotonic()
+    with pytest.raises(LoginOverloadedError) as error:
+        verifier.verify('user3', 'hash:secret', 'secret')
+    assert time.monotonic() - started < 1
+    assert error.value.retry_after == 7
+    assert verifier.get_stats()['rejected'] == 1
+
+    hasher.gate.set()
+    for outcome in running:
+        outcome['thread'].join(5)
+        assert outcome['result'] is True
+    wait_until(lambda: verifier.get_stats()['pending'] == 0)
+    # Места в очереди освобождаются после завершения проверок
+    assert verifier.verify('user3', 'hash:secret', 'secret') is True
+
+
+def test_run_counts_against_the_same_limit(hasher, make_verifier):
+    verifier = make_verifier(max_workers=1, max_pending=1)
+    outcome = in_background(verifier.verify, 'user', 'hash:secret', 'secret')
+    wait_until(lambda: verifier.get_stats()['pending'] == 1)
+
+    with pytest.raises(LoginOverloadedError):
+        verifier.run(lambda: 'rehash')
+
+    hasher.gate.set()
+    outcome['thread'].join(5)
+    wait_until(lambda: verifier.get_stats()['pending'] == 0)
+    assert verifier.run(lambda: 'rehash') == 'rehash'
+
+
+def test_same_login_in_flight_is_checked_once(hasher, make_verifier):
+    verifier = make_verifier(max_workers=2, max_pending=1)
+    first = in_background(verifier.verify, 'user', 'hash:secret', 'secret')
+    wait_until(lambda: hasher.calls == 1)
+    # Повтор того же входа не занимает новое место в очереди (лимит - одно место)
+    second = in_background(verifier.verify, 'user', 'hash:secret', 'secret')
+    wait_until(lambda: verifier.get_stats()['deduplicated'] == 1)
+
+    hasher.gate.set()
+    for outcome in (first, second):
+        outcome['thread'].join(5)
+        assert outcome['result'] is True
+    assert hasher.calls == 1
+    assert verifier.get_stats()['submitted'] == 1
+
+
+def test_different_password_is_not_deduplicated(hasher, make_verifier):
+    verifier = make_verifier(max_workers=2, max_pending=4)
+    hasher.gate.set()
+    results = [in_background(verifier.verify, 'user', 'hash:secret', password) for password in ('secret', 'wrong')]
+    for outcome in results:
+        outcome['thread'].join(5)
+    assert [outcome['result'] for outcome in results] == [True, False]
+    assert verifier.get_stats()['deduplicated'] == 0
+    # Завершенная проверка не переиспользуется следующим входом
+    assert verifier.verify('user', 'hash:secret', 'secret') is True
+    assert hasher.calls == 3
+
+
+def test_slow_check_times_out_with_overload_error(hasher, make_verifier):
+    verifier = make_verifier(max_workers=1, max_pending=4, timeout=0.05, retry_after=3)
+
+    with pytest.raises(LoginOverloadedError) as error:
+        verifier.verify('user', 'hash:secret', 'secret')
+    assert error.value.retry_after == 3
+    assert verifier.get_stats()['timeouts'] == 1
+
+
+def test_login_overload_returns_503_with_retry_after(db_path, make_user):
+    make_user('teacher', UserRole.TEACHER)
+    # Очередь нулевой длины: любая проверка пароля отклоняется сразу
+    app = create_app({
+        'DATABASE_PATH': db_path,
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'LOGIN_VERIFY_THREADS': 1,
+        'LOGIN_MAX_PENDING': 0,
+        'LOGIN_RETRY_AFTER': 5,
+    })
+    response = app.test_client().post('/auth/login', data={'username': 'teacher', 'password': 'secret'})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
@@ -0,0 +1,215 @@
+from datetime import time
+
+import pytest
+
+from domain.entities.schedule import Schedule
+from domain.entities.schedule_conflict import (CLASSROOM, TEACHER, ScheduleConflictDetector, ScheduleConflictError,
+                                               TeacherResource)
+from domain.entities.subject import Subject
+from infrastructure.repositories.schedule_repository import ScheduleRepository
+from infrastructure.repositories.subject_repository import SubjectRepository
+
+MONDAY, TUESDAY = 0, 1
+
+
+def lesson(start: str, end: str, classroom: str | None = '101', subject_id: int = 1, day: int = MONDAY,
+           lesson_id: int | None = None) -> Schedule:
+    return Schedule(id=lesson_id, subject_id=subject_id, day_of_week=day, time_start=time.fromisoformat(start),
+                    time_end=time.fromisoformat(end), classroom=classroom)
+
+
+def pairs(conflicts) -> set[tuple]:
+    # Пересечение без учета порядка уроков в паре
+    return {(conflict.kind, frozenset((conflict.first.time_start, conflict.second.time_start)))
+            for conflict in conflicts}
+
+
+@pytest.fixture
+def make_subject(db):
+    repo = SubjectRepository(db)
+
+    def make(name: str, teacher: str = '', teacher_ids: tuple[int, ...] = ()) -> Subject:
+        subject = repo.create(Subject(id=None, name=name, teacher=teacher))
+        for teacher_id in teacher_ids:
+            db.execute_update("INSERT INTO teacher_subject (teacher_id, subject_id, is_primary) VALUES (?, ?, 1)",
+                              (teacher_id, subject.id))
+        return subject
+    return make
+
+
+@pytest.fixture
+def checked_repo(db):
+    return ScheduleRepository(db, check_conflicts=True)
+
+
+# Детектор
+
+def test_touching_lessons_do_not_conflict():
+    lessons = [lesson('09:00', '09:45'), lesson('09:45', '10:30')]
+    detector = ScheduleConflictDetector(lessons)
+
+    assert detector.find_all() == []
+    assert detector.check(lesson('10:30', '11:15')) == []
+    assert detector.check(lesson('08:15', '09:00')) == []
+
+
+def test_overlap_found_by_check_and_find_all():
+    first, second = lesson('09:00', '09:45'), lesson('09:30', '10:15')
+    detector = ScheduleConflictDetector([first, second])
+
+    [conflict] = detector.find_all()
+    assert (conflict.kind, conflict.resource) == (CLASSROOM, '101')
+    assert {conflict.first.time_start, conflict.second.time_start} == {time(9), time(9, 30)}
+    assert len(detector.check(lesson('09:40', '09:50'))) == 2
+
+
+def test_other_day_or_classroom_does_not_conflict():
+    detector = ScheduleConflictDetector([lesson('09:00', '09:45'), lesson('09:00', '09:45', day=TUESDAY),
+                                         lesson('09:00', '09:45', classroom='102'), lesson('09:00', '09:45', None)])
+
+    assert detector.find_all() == []
+
+
+def test_find_all_reports_each_overlapping_pair_once():
+    # Длинный урок перекрывает все короткие, короткие между собой только касаются,
+    # последний начинается после конца длинного
+    lessons = [lesson('08:00', '12:00'), lesson('08:00', '09:00'), lesson('09:00', '10:00'),
+               lesson('09:30', '09:40'), lesson('12:00', '13:00')]
+
+    conflicts = ScheduleConflictDetector(lessons).find_all()
+
+    assert len(conflicts) == 4
+    assert pairs(conflicts) == {
+        (CLASSROOM, frozenset((time(8), time(8)))),
+        (CLASSROOM, frozenset((time(8), time(9)))),
+        (CLASSROOM, frozenset((time(8), time(9, 30)))),
+        (CLASSROOM, frozenset((time(9), time(9, 30)))),
+    }
+
+
+def test_find_all_matches_pairwise_check():
+    lessons = [lesson(f'{8 + i % 5:02d}:{i * 7 % 60:02d}', f'{9 + i % 4:02d}:{i * 11 % 60:02d}', lesson_id=i)
+               for i in range(30)]
+    lessons = [item for item in lessons if item.time_start < item.time_end]
+
+    found = {frozenset((conflict.first.id, conflict.second.id))
+             for conflict in ScheduleConflictDetector(lessons).find_all()}
+    expected = {frozenset((a.id, b.id)) for i, a in enumerate(lessons) for b in lessons[i + 1:]
+                if a.time_start < b.time_end and b.time_start < a.time_end}
+
+    assert found == expected
+
+
+def test_check_ignores_saved_version_of_same_lesson():
+    saved = lesson('09:00', '09:45', lesson_id=7)
+    detector = ScheduleConflictDetector([saved, lesson('10:00', '10:45', lesson_id=8)])
+
+    assert detector.check(lesson('09:15', '10:00', lesson_id=7)) == []
+    [conflict] = detector.check(lesson('09:15', '10:15', lesson_id=7))
+    assert conflict.first.id == 8
+
+
+def test_every_teacher_of_subject_is_checked():
+    first, second = TeacherResource(('user', 1), 'Первый'), TeacherResource(('user', 2), 'Второй')
+    teachers = {1: (first, second), 2: (second,)}
+    lessons = [lesson('09:00', '09:45', '101', subject_id=1), lesson('09:00', '09:45', '102', subject_id=2)]
+
+    [conflict] = ScheduleConflictDetector(lessons, teachers).find_all()
+
+    assert (conflict.kind, conflict.resource) == (TEACHER, 'Второй')
+
+
+# Репозиторий
+
+def test_create_rejects_conflict_only_when_checking(db, checked_repo):
+    checked_repo.create(lesson('09:00', '09:45'))
+
+    with pytest.raises(ScheduleConflictError) as error:
+        checked_repo.create(lesson('09:30', '10:15'))
+    assert len(error.value.conflicts) == 1
+    assert len(checked_repo.get_all()) == 1
+
+    checked_repo.create(lesson('09:45', '10:30'))
+    ScheduleRepository(db).create(lesson('09:30', '10:15'))
+    assert len(checked_repo.get_all()) == 3
+
+
+def test_update_does_not_conflict_with_itself(checked_repo):
+    saved = checked_repo.create(lesson('09:00', '09:45'))
+    checked_repo.create(lesson('10:00', '10:45'))
+
+    saved.time_end = time(10)
+    checked_repo.update(saved)
+    assert checked_repo.get_by_id(saved.id).time_end == time(10)
+
+    saved.time_end = time(10, 15)
+    with pytest.raises(ScheduleConflictError):
+        checked_repo.update(saved)
+    assert checked_repo.get_by_id(saved.id).time_end == time(10)
+
+
+def test_create_many_rejects_import_conflicting_with_itself(checked_repo):
+    checked_repo.create(lesson('12:00', '12:45'))
+    imported = [lesson('09:00', '09:45'), lesson('09:45', '10:30'), lesson('10:00', '10:45')]
+
+    with pytest.raises(ScheduleConflictError) as error:
+        checked_repo.create_many(imported)
+
+    [conflict] = error.value.conflicts
+    assert {conflict.first.time_start, conflict.second.time_start} == {time(9, 45), time(10)}
+    assert len(checked_repo.get_all()) == 1
+    assert all(item.id is None for item in imported)
+
+
+def test_create_many_ignores_conflicts_between_saved_lessons(db, checked_repo):
+    ScheduleRepository(db).create_many([lesson('09:00', '09:45'), lesson('09:30', '10:15')])
+
+    created = checked_repo.create_many([lesson('11:00', '11:45'), lesson('11:45', '12:30')])
+
+    assert all(item.id is not None for item in created)
+    assert len(checked_repo.get_all()) == 4
+
+
+def test_assigned_and_text_subjects_of_same_teacher_conflict(make_user, make_subject, checked_repo):
+    teacher = make_user('petrova', first_name='Анна', last_name='Петрова')
+    assigned = make_subject('Математика', teacher_ids=(teacher.id,))
+    by_initials = make_subject('Алгебра', teacher='Петрова А.А.')
+    by_name = make_subject('Геометрия', teacher='анна  петрова')
+    checked_repo.create(lesson('09:00', '09:45', '101', subject_id=assigned.id))
+
+    for subject in (by_initials, by_name):
+        with pytest.raises(ScheduleConflictError) as error:
+            checked_repo.create(lesson('09:00', '09:45', '102', subject_id=subject.id))
+        [conflict] = error.value.conflicts
+        assert (conflict.kind, conflict.resource) == (TEACHER, 'Петрова Анна (petrova)')
+
+
+def test_ambiguous_teacher_name_is_compared_as_text(make_user, make_subject, checked_repo):
+    make_user('petrova_a', first_name='Анна', last_name='Петрова')
+    make_user('petrova_al', first_name='Алла', last_name='Петрова')
+    first = make_subject('Алгебра', teacher='Петрова А.')
+    second = make_subject('Геометрия', teacher='петрова а.а.')
+    other = make_subject('Физика', teacher='Иванов И.И.')
+    checked_repo.create(lesson('09:00', '09:45', '101', subject_id=first.id))
+
+    checked_repo.create(lesson('09:00', '09:45', '103', subject_id=other.id))
+    with pytest.raises(ScheduleConflictError) as error:
+        checked_repo.create(lesson('09:00', '09:45', '102', subject_id=second.id))
+    [conflict] = error.value.conflicts
+    assert conflict.kind == TEACHER and conflict.first.subject_id == first.id
+
+
+def test_subject_with_several_primary_teachers(make_user, make_subject, checked_repo):
+    first, second = make_user('first', last_name='Первый'), make_user('second', last_name='Второй')
+    shared = make_subject('Информатика', teacher_ids=(first.id, second.id))
+    own = make_subject('Физика', teacher_ids=(second.id,))
+    checked_repo.create(lesson('09:00', '09:45', '101', subject_id=shared.id))
+
+    with pytest.raises(ScheduleConflictError) as error:
+        checked_repo.create(lesson('09:15', '10:00', '102', subject_id=own.id))
+    [conflict] = error.value.conflicts
+    assert (conflict.kind, conflict.resource) == (TEACHER, 'Второй Имя (second)')
+
+    conflicts = checked_repo.find_all_conflicts(checked_repo.get_all() + [lesson('09:15', '10:00', '102',
+                                                                                 subject_id=own.id)])
+    assert [conflict.resource for conflict in conflicts] == ['Второй Имя (second)']
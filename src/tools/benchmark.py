@@ -0,0 +1,167 @@
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from tools.school_generator import SYNTHETIC_PASSWORD
+
+
+DATA_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+
+def percentile(values: list[float], percent: float) -> float:
+    # Метод ближайшего ранга: результат всегда одно из измеренных значений
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def copy_database(source: str, target: str):
+    # backup API копирует согласованный снимок, в том числе незачекпоинченные страницы WAL
+    if not os.path.exists(source):
+        raise FileNotFoundError(f'База данных не найдена: {source}')
+    source_conn = sqlite3.connect(source)
+    target_conn = sqlite3.connect(target)
+    try:
+        source_conn.backup(target_conn)
+    finally:
+        target_conn.close()
+        source_conn.close()
+
+
+class DiaryBenchmark:
+
+    def __init__(self, db_path: str, iterations: int = 50, seed: int = 42, warmup: int = 3,
+                 config: dict | None = None):
+        self.source_db_path = db_path
+        self.iterations = iterations
+        self.warmup = warmup
+        self.random = random.Random(seed)
+        self.config = config or {}
+        self._statements = 0
+
+    def run(self) -> dict:
+        from run import CleanArchitectureApp
+
+        # Бенчмарк добавляет оценки, поэтому работаем с копией базы
+        work_dir = tempfile.mkdtemp(prefix='diary-bench-')
+        db_path = os.path.join(work_dir, 'diary.db')
+        copy_database(self.source_db_path, db_path)
+
+        try:
+            app_factory = CleanArchitectureApp()
+            config = {
+                'DATABASE_PATH': db_path,
+                'DATABASE_TRACE_STATEMENTS': True,
+                'WTF_CSRF_ENABLED': False,
+                'TESTING': True,
+            }
+            config.update(self.config)
+            app = app_factory.create_app(config)
+            app_factory.db_connection.add_statement_listener(self._count_statement)
+
+            dataset = self._describe_dataset(app_factory.db_connection)
+            scenarios = self._build_scenarios(dataset)
+            results = {}
+            for name, (username, requests) in scenarios.items():
+                results[name] = self._run_scenario(app, username, requests)
+
+            if app_factory.data_versions:
+                app_factory.data_versions.close()
+            app_factory.db_connection.close()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return {
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'iterations': self.iterations,
+            'dataset': {key: value for key, value in dataset.items() if not key.endswith('_ids')},
+            'scenarios': results,
+        }
+
+    def _build_scenarios(self, dataset: dict) -> dict:
+        student_ids = dataset['student_ids']
+        subject_ids = dataset['subject_ids']
+
+        def diary(tab: str):
+            return lambda: ('GET', f'/student/{self.random.choice(student_ids)}?tab={tab}', None)
+
+        return {
+            'login': (None, lambda: ('POST', '/auth/login',
+                                     {'username': 'student1', 'password': SYNTHETIC_PASSWORD})),
+            'main.index[admin]': ('admin1', lambda: ('GET', '/', None)),
+            'main.index[teacher]': ('teacher1', lambda: ('GET', '/', None)),
+            'main.index[parent]': ('parent1', lambda: ('GET', '/', None)),
+            'students.student_diary[grades]': ('admin1', diary('grades')),
+            'students.student_diary[attendance]': ('admin1', diary('attendance')),
+            'students.student_diary[schedule]': ('admin1', diary('schedule')),
+            'students.student_diary[schedule_filtered]': (
+                'admin1', lambda: ('GET', f'/student/{self.random.choice(student_ids)}'
+                                          f'?tab=schedule&day={self.random.randrange(5)}', None)),
+            'students.add_grade': ('teacher1', lambda: (
+                'POST', f'/student/{self.random.choice(student_ids)}/add_grade',
+                {'subject_id': self.random.choice(subject_ids), 'grade': self.random.randint(2, 5),
+                 'comment': 'benchmark'})),
+            'reports.reports': ('teacher1', lambda: (
+                'GET', f'/reports/reports?subject_id={self.random.choice(subject_ids)}', None)),
+        }
+
+    def _run_scenario(self, app, username: str | None, make_request) -> dict:
+        client = app.test_client()
+        if username:
+            response = client.post('/auth/login', data={'username': username, 'password': SYNTHETIC_PASSWORD})
+            if response.status_code != 302:
+                raise RuntimeError(f'Не удалось войти как {username}')
+
+        latencies = []
+        queries = []
+        statuses = {}
+        for iteration in range(self.warmup + self.iterations):
+            method, url, data = make_request()
+            self._statements = 0
+            started = time.perf_counter()
+            response = client.open(url, method=method, data=data)
+            elapsed = time.perf_counter() - started
+            if iteration < self.warmup:
+                continue
+            latencies.append(elapsed * 1000)
+            queries.append(self._statements)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        return {
+            'requests': len(latencies),
+            'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies), 3),
+                'p50': round(percentile(latencies, 50), 3),
+                'p95': round(percentile(latencies, 95), 3),
+                'p99': round(percentile(latencies, 99), 3),
+                'max': round(max(latencies), 3),
+            },
+            'queries_per_request': {
+                'mean': round(sum(queries) / len(queries), 2),
+                'max': max(queries),
+            },
+        }
+
+    def _count_statement(self, statement: str):
+        words = statement.lstrip().split(None, 1)
+        if words and words[0].upper() in DATA_STATEMENTS:
+            self._statements += 1
+
+    def _describe_dataset(self, db) -> dict:
+        dataset = {}
+        for table in ('users', 'students', 'subjects', 'grades', 'attendance', 'schedule'):
+            dataset[table] = db.execute_query(f"SELECT COUNT(*) AS count FROM {table}")[0]['count']
+        dataset['student_ids'] = [row['id'] for row in db.execute_query("SELECT id FROM students")]
+        dataset['subject_ids'] = [row['id'] for row in db.execute_query("SELECT id FROM subjects")]
+        if not dataset['student_ids'] or not dataset['subject_ids']:
+            raise RuntimeError('В базе нет учеников или предметов - сначала выполните generate-school')
+        return dataset
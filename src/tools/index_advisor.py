@@ -0,0 +1,395 @@
+import inspect
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Callable
+
+from domain.entities.access_scope import AccessScope
+from domain.entities.attendance import Attendance
+from domain.entities.grade import Grade
+from domain.entities.schedule import Schedule
+from domain.entities.student import Student
+from domain.entities.subject import Subject
+from domain.entities.user import User, UserRole
+from tools.benchmark import copy_database
+
+
+# Проблемы плана: полный проход по таблице и сортировка/группировка во временном B-дереве
+FULL_SCAN = 'full-scan'
+TEMP_BTREE = 'temp-btree'
+
+PLANNED_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+
+@dataclass
+class WorkloadCall:
+    name: str
+    call: Callable
+    # Проблемы, которые для этого вызова ожидаемы (например, весь справочник целиком)
+    allowed: frozenset = frozenset()
+    reason: str = ''
+    # Другие методы, которые вызываются внутри call (например, create, update и delete одним сценарием)
+    covers: tuple = ()
+
+
+@dataclass
+class StatementReport:
+    method: str
+    statement: str
+    plan: list[str]
+    issues: list[str] = field(default_factory=list)
+    allowed: bool = False
+    reason: str = ''
+
+    @property
+    def flagged(self) -> bool:
+        return bool(self.issues) and not self.allowed
+
+
+def plan_issues(plan: list[str]) -> list[str]:
+    issues = []
+    # Подзапросы, которые SQLite материализует или выполняет сопрограммой: их проход - не чтение таблицы
+    subqueries = set()
+    for line in plan:
+        words = line.split()
+        if words[:1] in (['MATERIALIZE'], ['CO-ROUTINE']) and len(words) > 1:
+            subqueries.add(words[1])
+        # "SCAN t USING INDEX ..." - проход по индексу в нужном порядке, таблица целиком не читается
+        if words[:1] == ['SCAN'] and 'INDEX' not in words:
+            target = words[1] if len(words) > 1 else ''
+            if target != 'CONSTANT' and target not in subqueries and not target.startswith('(subquery'):
+                issues.append(FULL_SCAN)
+        if line.startswith('USE TEMP B-TREE'):
+            issues.append(TEMP_BTREE)
+    return sorted(set(issues))
+
+
+class IndexAdvisor:
+
+    def __init__(self, db_path: str, config: dict | None = None):
+        self.source_db_path = db_path
+        self.config = config or {}
+        self._statements = []
+
+    def run(self) -> dict:
+        from run import CleanArchitectureApp
+
+        # Рабочая нагрузка создает и удаляет записи, поэтому работаем с копией базы
+        work_dir = tempfile.mkdtemp(prefix='diary-advisor-')
+        db_path = os.path.join(work_dir, 'diary.db')
+        copy_database(self.source_db_path, db_path)
+
+        try:
+            app_factory = CleanArchitectureApp()
+            config = {
+                'DATABASE_PATH': db_path,
+                'DATABASE_TRACE_STATEMENTS': True,
+                # Нужны SQL-реализации репозиториев, а не снимки в памяти
+                'REFERENCE_CACHE': False,
+                'USER_CACHE_SIZE': 0,
+            }
+            config.update(self.config)
+            app_factory.create_app(config, web=False)
+            db = app_factory.db_connection
+            db.add_statement_listener(self._statements.append)
+
+            repositories = app_factory.repositories
+            workload = build_workload(repositories, self._sample(db))
+            reports = []
+            for item in workload:
+                self._statements.clear()
+                result = item.call()
+                if inspect.isgenerator(result):
+                    for _ in result:
+                        pass
+                reports.extend(self._explain(db, item))
+
+            uncovered = uncovered_methods(repositories, workload)
+            if app_factory.data_versions:
+                app_factory.data_versions.close()
+            db.close()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return {
+            'statements': len(reports),
+            'flagged': [report.__dict__ for report in reports if report.flagged],
+            'allowed': [report.__dict__ for report in reports if report.allowed],
+            'uncovered_methods': uncovered,
+        }
+
+    def _explain(self, db, item: WorkloadCall) -> list[StatementReport]:
+        reports = []
+        seen = set()
+        for statement in self._statements:
+            statement = ' '.join(statement.split())
+            words = statement.split(None, 1)
+            # Строки вида "-- TRIGGER ..." - выражения триггеров, их планы видны в плане самого запроса
+            if not words or words[0].upper() not in PLANNED_STATEMENTS or statement in seen:
+                continue
+            seen.add(statement)
+            with db.get_connection() as conn:
+                rows = conn.execute("EXPLAIN QUERY PLAN " + statement).fetchall()
+            plan = [row['detail'] for row in rows]
+            issues = plan_issues(plan)
+            allowed = bool(issues) and set(issues) <= item.allowed
+            reports.append(StatementReport(item.name, statement, plan, issues, allowed,
+                                           item.reason if allowed else ''))
+        return reports
+
+    @staticmethod
+    def _sample(db) -> dict:
+        def first(query: str):
+            rows = db.execute_query(query)
+            return rows[0][0] if rows else None
+
+        sample = {
+            'student_id': first("SELECT id FROM students ORDER BY id LIMIT 1"),
+            'subject_id': first("SELECT id FROM subjects ORDER BY id LIMIT 1"),
+            'parent_id': first("SELECT id FROM users WHERE role = 'parent' ORDER BY id LIMIT 1"),
+            'teacher_id': first("SELECT teacher_id FROM teacher_subject ORDER BY teacher_id LIMIT 1"),
+            'class_name': first("SELECT class_name FROM students ORDER BY id LIMIT 1"),
+            'user_id': first("SELECT id FROM users ORDER BY id LIMIT 1"),
+        }
+        missing = [name for name, value in sample.items() if value is None]
+        if missing:
+            raise RuntimeError('В базе не хватает данных для проверки запросов - выполните generate-school')
+        sample['username'] = first(f"SELECT username FROM users WHERE id = {sample['user_id']}")
+        sample['email'] = first(f"SELECT email FROM users WHERE id = {sample['user_id']}")
+        return sample
+
+
+def uncovered_methods(repositories: dict, workload: list[WorkloadCall]) -> list[str]:
+    # Публичные методы репозиториев, которые не вызываются в нагрузке: их запросы не проверены
+    covered = {item.name.split('[')[0] for item in workload}
+    covered.update(name for item in workload for name in item.covers)
+    uncovered = []
+    for key, repository in repositories.items():
+        for name, function in inspect.getmembers(type(repository), inspect.isfunction):
+            if name.startswith('_') or name == 'add_change_listener':
+                continue
+            # Метод унаследован от интерфейса без реализации - запросов у него нет
+            if function.__module__.startswith('domain.'):
+                continue
+            if f'{key}.{name}' not in covered:
+                uncovered.append(f'{key}.{name}')
+    return sorted(uncovered)
+
+
+def build_workload(repositories: dict, sample: dict) -> list[WorkloadCall]:
+    users = repositories['user']
+    students = repositories['student']
+    subjects = repositories['subject']
+    grades = repositories['grade']
+    attendance = repositories['attendance']
+    schedule = repositories['schedule']
+    diary = repositories['diary']
+    report = repositories['report']
+
+    student_id = sample['student_id']
+    parent_id = sample['parent_id']
+    teacher_id = sample['teacher_id']
+    subject_id = sample['subject_id']
+    today = date.today()
+    window = (today - timedelta(days=60), today)
+    whole_table = frozenset({FULL_SCAN, TEMP_BTREE})
+
+    def new_user(suffix: str) -> User:
+        return User(id=None, username=f'advisor_{suffix}', email=f'advisor_{suffix}@example.com',
+                    password_hash='-', role=UserRole.PARENT, first_name='Проверка', last_name='Индексов',
+                    created_at=datetime.utcnow())
+
+    def user_crud():
+        user = users.create(new_user('one'))
+        users.create_many([new_user('two'), new_user('three')])
+        user.first_name = 'Изменено'
+        users.update(user)
+        users.create_parent_child_relationship(user.id, student_id)
+        users.remove_parent_child_relationship(user.id, student_id)
+        users.delete(user.id)
+
+    def student_crud():
+        student = students.create(Student(id=None, name='Проверка Индексов', class_name='0А'))
+        students.create_many([Student(id=None, name='Проверка Индексов 2', class_name='0А')])
+        student.name = 'Изменено'
+        students.update(student)
+        students.delete(student.id)
+
+    def subject_crud():
+        subject = subjects.create(Subject(id=None, name='Проверка индексов', teacher='-'))
+        subjects.create_many([Subject(id=None, name='Проверка индексов 2', teacher='-')])
+        subject.teacher = 'Изменено'
+        subjects.update(subject)
+        subjects.delete(subject.id)
+
+    def grade_crud():
+        grade = grades.create(Grade(id=None, student_id=student_id, subject_id=subject_id, grade=5, date=today))
+        grades.create_many([Grade(id=None, student_id=student_id, subject_id=subject_id, grade=4, date=today)])
+        grade.grade = 3
+        grades.update(grade)
+        grades.delete(grade.id)
+
+    def attendance_crud():
+        record = attendance.create(Attendance(id=None, student_id=student_id, subject_id=subject_id,
+                                              date=today, present=True))
+        attendance.create_many([Attendance(id=None, student_id=student_id, subject_id=subject_id,
+                                           date=today, present=False)])
+        record.present = False
+        attendance.update(record)
+        attendance.delete(record.id)
+
+    def schedule_crud():
+        lesson = schedule.create(Schedule(id=None, subject_id=subject_id, day_of_week=6,
+                                          time_start=time(8, 0), time_end=time(8, 45)))
+        schedule.create_many([Schedule(id=None, subject_id=subject_id, day_of_week=6,
+                                       time_start=time(9, 0), time_end=time(9, 45))])
+        lesson.classroom = '0'
+        schedule.update(lesson)
+        schedule.delete(lesson.id)
+
+    def page_after(page):
+        return page.next_after
+
+    # Области доступа строятся так же, как в AccessScopeService; в SQL идет только id пользователя
+    parent_scope = AccessScope(parent_id, student_ids=frozenset(users.get_accessible_student_ids(parent_id)))
+    teacher_scope = AccessScope(teacher_id, unrestricted=True,
+                                subject_ids=frozenset(users.get_teacher_subject_ids(teacher_id)))
+    teacher_subject_id = min(teacher_scope.subject_ids)
+
+    return [
+        WorkloadCall('user.get_by_id', lambda: users.get_by_id(sample['user_id'])),
+        WorkloadCall('user.exists', lambda: users.exists(sample['user_id'])),
+        WorkloadCall('user.get_by_ids', lambda: users.get_by_ids([sample['user_id'], 1, 2])),
+        WorkloadCall('user.get_accessible_student_ids', lambda: users.get_accessible_student_ids(sample['user_id'])),
+        WorkloadCall('user.get_teacher_subject_ids', lambda: users.get_teacher_subject_ids(teacher_id)),
+        WorkloadCall('user.get_by_username', lambda: users.get_by_username(sample['username'])),
+        WorkloadCall('user.get_by_email', lambda: users.get_by_email(sample['email'])),
+        WorkloadCall('user.get_all', users.get_all, whole_table, 'весь список пользователей'),
+        WorkloadCall('user.get_by_role', lambda: users.get_by_role(UserRole.PARENT)),
+        WorkloadCall('user.get_page_by_role', lambda: users.get_page_by_role(
+            UserRole.PARENT, 20, page_after(users.get_page_by_role(UserRole.PARENT, 20)))),
+        WorkloadCall('user.get_page_by_role[search]',
+                     lambda: users.get_page_by_role(UserRole.PARENT, 20, None, 'ив')),
+        WorkloadCall('user.get_children_ids', lambda: users.get_children_ids(sample['parent_id'])),
+        WorkloadCall('user.is_parent_of', lambda: users.is_parent_of(sample['parent_id'], student_id)),
+        WorkloadCall('user.create', user_crud, covers=(
+            'user.create_many', 'user.update', 'user.delete', 'user.create_parent_child_relationship',
+            'user.remove_parent_child_relationship')),
+
+        WorkloadCall('student.get_by_id', lambda: students.get_by_id(student_id)),
+        WorkloadCall('student.exists', lambda: students.exists(student_id)),
+        WorkloadCall('student.get_by_ids', lambda: students.get_by_ids([student_id, 1, 2])),
+        WorkloadCall('student.get_all', students.get_all),
+        WorkloadCall('student.get_page', lambda: students.get_page(48, page_after(students.get_page(48)))),
+        WorkloadCall('student.get_page[search]', lambda: students.get_page(48, None, 'ив'),
+                     frozenset({FULL_SCAN}), 'поиск по подстроке не может использовать индекс'),
+        WorkloadCall('student.get_page[scope]', lambda: students.get_page(48, None, None, AccessScope(parent_id)),
+                     frozenset({TEMP_BTREE}), 'сортируются только дети одного родителя'),
+        WorkloadCall('student.get_by_class', lambda: students.get_by_class(sample['class_name'])),
+        WorkloadCall('student.get_by_user_id', lambda: students.get_by_user_id(sample['user_id'])),
+        WorkloadCall('student.create', student_crud, covers=(
+            'student.create_many', 'student.update', 'student.delete')),
+
+        WorkloadCall('subject.get_by_id', lambda: subjects.get_by_id(subject_id)),
+        WorkloadCall('subject.get_all', subjects.get_all),
+        WorkloadCall('subject.exists', lambda: subjects.exists(subject_id)),
+        WorkloadCall('subject.get_by_ids', lambda: subjects.get_by_ids([subject_id, 1, 2])),
+        WorkloadCall('subject.get_by_name', lambda: subjects.get_by_name('Математика')),
+        WorkloadCall('subject.create', subject_crud, covers=(
+            'subject.create_many', 'subject.update', 'subject.delete')),
+
+        WorkloadCall('grade.get_by_id', lambda: grades.get_by_id(1)),
+        WorkloadCall('grade.exists', lambda: grades.exists(1)),
+        WorkloadCall('grade.get_by_ids', lambda: grades.get_by_ids([1, 2, 3])),
+        WorkloadCall('grade.get_by_student', lambda: grades.get_by_student(student_id)),
+        WorkloadCall('grade.get_by_student_window', lambda: grades.get_by_student_window(
+            student_id, 50, *window, page_after(grades.get_by_student_window(student_id, 50, *window)))),
+        WorkloadCall('grade.get_scoped_window[parent]', lambda: grades.get_scoped_window(
+            parent_scope, 50, after=page_after(grades.get_scoped_window(parent_scope, 50))),
+                     frozenset({TEMP_BTREE}), 'слияние истории нескольких детей родителя'),
+        WorkloadCall('grade.get_scoped_window[teacher]', lambda: grades.get_scoped_window(
+            teacher_scope, 50, after=page_after(grades.get_scoped_window(teacher_scope, 50)))),
+        WorkloadCall('grade.get_scoped_window[teacher, student]',
+                     lambda: grades.get_scoped_window(teacher_scope, 50, student_id, None, *window)),
+        WorkloadCall('grade.get_by_student_and_subject',
+                     lambda: grades.get_by_student_and_subject(student_id, subject_id)),
+        WorkloadCall('grade.get_by_date_range', lambda: grades.get_by_date_range(*window)),
+        WorkloadCall('grade.get_statistics', lambda: grades.get_statistics(student_id, None, *window),
+                     frozenset({TEMP_BTREE}), 'группировка по пяти значениям оценки'),
+        WorkloadCall('grade.get_statistics[teacher]',
+                     lambda: grades.get_statistics(student_id, None, *window, teacher_scope),
+                     frozenset({TEMP_BTREE}), 'группировка по пяти значениям оценки'),
+        WorkloadCall('grade.get_statistics[subject]',
+                     lambda: grades.get_statistics(student_id, subject_id, *window),
+                     frozenset({TEMP_BTREE}), 'группировка по пяти значениям оценки'),
+        WorkloadCall('grade.get_statistics_by_subject',
+                     lambda: grades.get_statistics_by_subject(student_id, *window),
+                     frozenset({TEMP_BTREE}), 'группировка по предметам за период'),
+        WorkloadCall('grade.get_statistics_by_subject[teacher]',
+                     lambda: grades.get_statistics_by_subject(student_id, *window, teacher_scope),
+                     frozenset({TEMP_BTREE}), 'группировка по предметам за период'),
+        WorkloadCall('grade.get_summary', lambda: grades.get_summary(student_id)),
+        WorkloadCall('grade.rebuild_summary', grades.rebuild_summary, whole_table, 'пересчет по всей таблице'),
+        WorkloadCall('grade.create', grade_crud, covers=(
+            'grade.create_many', 'grade.update', 'grade.delete')),
+
+        WorkloadCall('attendance.get_by_id', lambda: attendance.get_by_id(1)),
+        WorkloadCall('attendance.exists', lambda: attendance.exists(1)),
+        WorkloadCall('attendance.get_by_ids', lambda: attendance.get_by_ids([1, 2, 3])),
+        WorkloadCall('attendance.get_by_student', lambda: attendance.get_by_student(student_id)),
+        WorkloadCall('attendance.get_by_student_window', lambda: attendance.get_by_student_window(
+            student_id, 50, *window, page_after(attendance.get_by_student_window(student_id, 50, *window)))),
+        WorkloadCall('attendance.get_scoped_window[parent]', lambda: attendance.get_scoped_window(
+            parent_scope, 50, after=page_after(attendance.get_scoped_window(parent_scope, 50))),
+                     frozenset({TEMP_BTREE}), 'слияние истории нескольких детей родителя'),
+        WorkloadCall('attendance.get_scoped_window[teacher]', lambda: attendance.get_scoped_window(
+            teacher_scope, 50, after=page_after(attendance.get_scoped_window(teacher_scope, 50)))),
+        WorkloadCall('attendance.get_scoped_window[teacher, student]',
+                     lambda: attendance.get_scoped_window(teacher_scope, 50, student_id, None, *window)),
+        WorkloadCall('attendance.get_by_student_and_subject',
+                     lambda: attendance.get_by_student_and_subject(student_id, subject_id)),
+        WorkloadCall('attendance.get_by_date_range', lambda: attendance.get_by_date_range(*window)),
+        WorkloadCall('attendance.create', attendance_crud, covers=(
+            'attendance.create_many', 'attendance.update', 'attendance.delete')),
+
+        WorkloadCall('schedule.get_by_id', lambda: schedule.get_by_id(1)),
+        WorkloadCall('schedule.exists', lambda: schedule.exists(1)),
+        WorkloadCall('schedule.get_by_ids', lambda: schedule.get_by_ids([1, 2, 3])),
+        WorkloadCall('schedule.get_all', schedule.get_all),
+        WorkloadCall('schedule.get_by_day', lambda: schedule.get_by_day(0)),
+        WorkloadCall('schedule.get_by_subject', lambda: schedule.get_by_subject(subject_id)),
+        WorkloadCall('schedule.get_filtered', lambda: schedule.get_filtered(0, subject_id, None)),
+        WorkloadCall('schedule.get_filtered[day]', lambda: schedule.get_filtered(0, None, None)),
+        WorkloadCall('schedule.get_filtered[all]', schedule.get_filtered),
+        WorkloadCall('schedule.get_filtered[subject]', lambda: schedule.get_filtered(None, subject_id, None)),
+        WorkloadCall('schedule.get_filtered[time]', lambda: schedule.get_filtered(0, None, time(12, 0))),
+        WorkloadCall('schedule.get_overlapping', lambda: schedule.get_overlapping(0, time(10, 0), time(10, 0))),
+        WorkloadCall('schedule.find_conflicts', lambda: schedule.find_conflicts(
+            Schedule(id=None, subject_id=subject_id, day_of_week=0, time_start=time(9, 0), time_end=time(9, 45),
+                     classroom='101'))),
+        WorkloadCall('schedule.find_all_conflicts', schedule.find_all_conflicts),
+        WorkloadCall('schedule.create', schedule_crud, covers=(
+            'schedule.create_many', 'schedule.update', 'schedule.delete')),
+
+        WorkloadCall('diary.get_student_diary', lambda: diary.get_student_diary(student_id, 50, *window),
+                     frozenset({TEMP_BTREE}), 'справочники (предметы и расписание) целиком'),
+        WorkloadCall('diary.get_student_diary[teacher]',
+                     lambda: diary.get_student_diary(student_id, 50, *window, None, None, teacher_scope),
+                     frozenset({TEMP_BTREE}), 'справочники (предметы и расписание) целиком'),
+
+        WorkloadCall('report.get_subject_report_dates', lambda: report.get_subject_report_dates(subject_id, *window),
+                     frozenset({TEMP_BTREE}), 'DISTINCT по объединению оценок и посещаемости'),
+        WorkloadCall('report.iter_subject_report', lambda: report.iter_subject_report(subject_id, *window),
+                     frozenset({TEMP_BTREE}), 'сводная таблица по ученикам и датам'),
+        WorkloadCall('report.get_subject_report_dates[parent]',
+                     lambda: report.get_subject_report_dates(subject_id, *window, parent_scope),
+                     frozenset({TEMP_BTREE}), 'DISTINCT по объединению оценок и посещаемости'),
+        WorkloadCall('report.iter_subject_report[parent]',
+                     lambda: report.iter_subject_report(subject_id, *window, parent_scope),
+                     frozenset({TEMP_BTREE}), 'сводная таблица по ученикам и датам'),
+        WorkloadCall('report.iter_subject_report[teacher]',
+                     lambda: report.iter_subject_report(teacher_subject_id, *window, teacher_scope),
+                     frozenset({TEMP_BTREE}), 'сводная таблица по ученикам и датам'),
+    ]
@@ -0,0 +1,114 @@
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+from domain.entities.password_policy import PasswordPolicy
+from tools.benchmark import copy_database, percentile
+
+BENCHMARK_PASSWORD = 'login-benchmark'
+
+DEFAULT_METHODS = (
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:100000',
+    'scrypt:32768:8:1',
+)
+
+
+class LoginBenchmark:
+
+    def __init__(self, db_path: str, methods: tuple = DEFAULT_METHODS, logins: int = 20, warmup: int = 2):
+        self.source_db_path = db_path
+        self.methods = methods
+        self.logins = logins
+        self.warmup = warmup
+
+    def run(self) -> dict:
+        return {
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'logins': self.logins,
+            'methods': {PasswordPolicy(method).method: self._run_method(method) for method in self.methods},
+        }
+
+    def _run_method(self, method: str) -> dict:
+        from run import CleanArchitectureApp
+
+        policy = PasswordPolicy(method)
+        # Бенчмарк меняет пароль пользователя, поэтому работаем с копией базы
+        work_dir = tempfile.mkdtemp(prefix='diary-login-bench-')
+        db_path = os.path.join(work_dir, 'diary.db')
+        copy_database(self.source_db_path, db_path)
+
+        try:
+            app_factory = CleanArchitectureApp()
+            app = app_factory.create_app({
+                'DATABASE_PATH': db_path,
+                'PASSWORD_HASH_METHOD': policy.method,
+                'WTF_CSRF_ENABLED': False,
+                'TESTING': True,
+            })
+            user = self._prepare_user(app_factory.repositories['user'], policy)
+
+            latencies = []
+            cpu_seconds = 0.0
+            for iteration in range(self.warmup + self.logins):
+                # Каждый вход - новый клиент без сессии, как у отдельного ученика
+                client = app.test_client()
+                started = time.perf_counter()
+                cpu_started = time.process_time()
+                response = client.post('/auth/login', data={'username': user.username,
+                                                            'password': BENCHMARK_PASSWORD})
+                cpu_elapsed = time.process_time() - cpu_started
+                elapsed = time.perf_counter() - started
+                if response.status_code != 302:
+                    raise RuntimeError(f'Не удалось войти как {user.username}')
+                if iteration < self.warmup:
+                    continue
+                latencies.append(elapsed * 1000)
+                cpu_seconds += cpu_elapsed
+
+            stored_hash = app_factory.repositories['user'].get_by_id(user.id).password_hash
+            if app_factory.data_versions:
+                app_factory.data_versions.close()
+            app_factory.db_connection.close()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        verify_ms = self._measure_verify(policy)
+        # Вход занимает одно ядро целиком, поэтому пропускная способность на ядро - обратная к CPU-времени
+        per_core = self.logins / cpu_seconds if cpu_seconds else 0.0
+        return {
+            'verify_ms': round(verify_ms, 3),
+            'login_latency_ms': {
+                'mean': round(sum(latencies) / len(latencies), 3),
+                'p50': round(percentile(latencies, 50), 3),
+                'p95': round(percentile(latencies, 95), 3),
+                'max': round(max(latencies), 3),
+            },
+            'cpu_ms_per_login': round(cpu_seconds * 1000 / self.logins, 3),
+            'logins_per_core_second': round(per_core, 2),
+            'logins_per_second_all_cores': round(per_core * (os.cpu_count() or 1), 2),
+            'hash_kept': not policy.needs_rehash(stored_hash),
+        }
+
+    @staticmethod
+    def _prepare_user(user_repo, policy: PasswordPolicy):
+        user = next((user for user in user_repo.get_all() if user.is_active), None)
+        if user is None:
+            raise RuntimeError('В базе нет активных пользователей')
+        user.set_password(BENCHMARK_PASSWORD, policy)
+        return user_repo.update(user)
+
+    def _measure_verify(self, policy: PasswordPolicy) -> float:
+        # Чистая стоимость проверки пароля без Flask и базы
+        password_hash = policy.hash(BENCHMARK_PASSWORD)
+        timings = []
+        for _ in range(max(self.logins // 2, 3)):
+            started = time.perf_counter()
+            policy.verify(password_hash, BENCHMARK_PASSWORD)
+            timings.append((time.perf_counter() - started) * 1000)
+        return percentile(timings, 50)
@@ -0,0 +1,43 @@
+import json
+from datetime import time
+
+from domain.entities.schedule import Schedule
+from domain.entities.schedule_conflict import ScheduleConflict
+
+
+def load_timetable(path: str, subject_repo) -> list[Schedule]:
+    # Формат как в seed.json: список уроков или объект с ключом "schedule",
+    # предмет урока задается subject_id или subject_name
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    items = data['schedule'] if isinstance(data, dict) else data
+    subjects = {subject.name: subject for subject in subject_repo.get_all()}
+
+    lessons = []
+    for number, item in enumerate(items, 1):
+        subject = subjects.get(item['subject_name']) if 'subject_name' in item else None
+        subject_id = item.get('subject_id') or (subject.id if subject else None)
+        if subject_id is None:
+            raise ValueError(f"Урок {number}: неизвестный предмет {item.get('subject_name')!r}")
+        lesson = Schedule(
+            id=item.get('id'),
+            subject_id=subject_id,
+            day_of_week=item['day_of_week'],
+            time_start=time.fromisoformat(item['time_start']),
+            time_end=time.fromisoformat(item['time_end']),
+            classroom=item.get('classroom')
+        )
+        lesson.subject = subject
+        lessons.append(lesson)
+    return lessons
+
+
+def find_timetable_conflicts(schedule_repo, subject_repo, path: str | None = None,
+                             merge: bool = False) -> list[ScheduleConflict]:
+    # Без файла - сохраненное расписание; с файлом - импортируемое, а с merge - вместе с сохраненным
+    if path is None:
+        return schedule_repo.find_all_conflicts()
+    lessons = load_timetable(path, subject_repo)
+    if merge:
+        lessons = schedule_repo.get_all() + lessons
+    return schedule_repo.find_all_conflicts(lessons)
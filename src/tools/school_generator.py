@@ -0,0 +1,192 @@
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from domain.entities.attendance import Attendance
+from domain.entities.grade import Grade
+from domain.entities.schedule import Schedule
+from domain.entities.student import Student
+from domain.entities.subject import Subject
+from domain.entities.user import User, UserRole
+
+
+# У всех синтетических пользователей один пароль, хеш вычисляется один раз
+SYNTHETIC_PASSWORD = 'synthetic123'
+
+SUBJECT_NAMES = [
+    'Математика', 'Русский язык', 'Литература', 'Физика', 'Химия', 'Биология', 'История',
+    'Обществознание', 'География', 'Английский язык', 'Информатика', 'Физкультура',
+]
+FIRST_NAMES = ['Иван', 'Мария', 'Алексей', 'Елена', 'Дмитрий', 'Анна', 'Сергей', 'Ольга', 'Павел', 'Наталья']
+LAST_NAMES = ['Петров', 'Сидоров', 'Козлов', 'Морозов', 'Волков', 'Соколов', 'Новиков', 'Лебедев', 'Попов',
+              'Смирнов']
+ABSENCE_REASONS = ['Болезнь', 'Семейные обстоятельства', 'Соревнования', None]
+
+
+@dataclass
+class SchoolParameters:
+    classes: int = 4
+    students_per_class: int = 25
+    subjects: int = 8
+    years: int = 1
+    grades_per_week: int = 1  # Оценок в неделю у ученика по каждому предмету
+    attendance_per_week: int = 1  # Отметок посещаемости в неделю у ученика по каждому предмету
+    lessons_per_day: int = 6
+    seed: int = 42
+
+
+class SchoolGenerator:
+
+    def __init__(self, app_factory, params: SchoolParameters):
+        self.repositories = app_factory.repositories
+        # Хеш синтетического пароля - по политике приложения, как у настоящих пользователей
+        self.password_policy = app_factory.create_password_policy()
+        self.db = app_factory.db_connection
+        self.params = params
+        self.random = random.Random(params.seed)
+
+    def generate(self) -> dict[str, int]:
+        params = self.params
+        password_hash = self.password_policy.hash(SYNTHETIC_PASSWORD)
+        counts = {}
+
+        with self.db.transaction():
+            subjects = self._create_subjects()
+            teachers = self._create_users(UserRole.TEACHER, 'teacher', len(subjects), password_hash)
+            self._create_users(UserRole.ADMIN, 'admin', 1, password_hash)
+            self.db.execute_many(
+                "INSERT INTO teacher_subject (teacher_id, subject_id) VALUES (?, ?)",
+                [(teacher.id, subject.id) for teacher, subject in zip(teachers, subjects)]
+            )
+            self._create_schedule(subjects)
+
+            total_students = params.classes * params.students_per_class
+            student_users = self._create_users(UserRole.STUDENT, 'student', total_students, password_hash)
+            students = self._create_students(student_users)
+
+            # Один родитель на двух учеников, у каждого ученика ровно один родитель
+            parents = self._create_users(UserRole.PARENT, 'parent', (total_students + 1) // 2, password_hash)
+            self.db.execute_many(
+                "INSERT INTO parent_child (parent_id, child_id) VALUES (?, ?)",
+                [(parents[index // 2].id, student.id) for index, student in enumerate(students)]
+            )
+
+            counts['grades'], counts['attendance'] = self._create_journal(students, subjects)
+
+        counts.update({
+            'subjects': len(subjects),
+            'teachers': len(teachers),
+            'students': len(students),
+            'parents': len(parents),
+        })
+        return counts
+
+    def _create_subjects(self) -> list[Subject]:
+        subjects = []
+        for index in range(self.params.subjects):
+            name = SUBJECT_NAMES[index % len(SUBJECT_NAMES)]
+            if index >= len(SUBJECT_NAMES):
+                name = f'{name} {index // len(SUBJECT_NAMES) + 1}'
+            subjects.append(Subject(id=None, name=name, teacher=self._random_name()))
+        return self.repositories['subject'].create_many(subjects)
+
+    def _create_users(self, role: UserRole, prefix: str, count: int, password_hash: str) -> list[User]:
+        users = []
+        for index in range(1, count + 1):
+            first_name, last_name = self._random_name().split(' ')
+            users.append(User(
+                id=None,
+                username=f'{prefix}{index}',
+                email=f'{prefix}{index}@synthetic.school',
+                password_hash=password_hash,
+                role=role,
+                first_name=first_name,
+                last_name=last_name,
+                is_active=True,
+                created_at=datetime.utcnow()
+            ))
+        return self.repositories['user'].create_many(users)
+
+    def _create_students(self, student_users: list[User]) -> list[Student]:
+        students = []
+        per_class = self.params.students_per_class
+        for index, user in enumerate(student_users):
+            class_index = index // per_class
+            class_name = f'{5 + class_index % 7}{"АБВГДЕЖ"[class_index // 7 % 7]}'
+            students.append(Student(
+                id=None,
+                name=user.get_full_name(),
+                class_name=class_name,
+                user_id=user.id,
+                created_at=datetime.utcnow()
+            ))
+        return self.repositories['student'].create_many(students)
+
+    def _create_schedule(self, subjects: list[Subject]):
+        schedule = []
+        for day_of_week in range(5):
+            for lesson in range(self.params.lessons_per_day):
+                start = datetime.combine(date.today(), time(8, 30)) + timedelta(minutes=55 * lesson)
+                subject = subjects[(day_of_week * self.params.lessons_per_day + lesson) % len(subjects)]
+                schedule.append(Schedule(
+                    id=None,
+                    subject_id=subject.id,
+                    day_of_week=day_of_week,
+                    time_start=start.time(),
+                    time_end=(start + timedelta(minutes=45)).time(),
+                    classroom=str(101 + self.random.randrange(30))
+                ))
+        self.repositories['schedule'].create_many(schedule)
+
+    def _create_journal(self, students: list[Student], subjects: list[Subject]) -> tuple[int, int]:
+        grade_count = attendance_count = 0
+        school_weeks = self._school_weeks()
+
+        # Журнал пишется порциями по ученику, чтобы не держать годы оценок в памяти
+        for student in students:
+            grades = []
+            attendance = []
+            for week_start in school_weeks:
+                for subject in subjects:
+                    for _ in range(self.params.grades_per_week):
+                        grades.append(Grade(
+                            id=None,
+                            student_id=student.id,
+                            subject_id=subject.id,
+                            grade=self.random.choices([2, 3, 4, 5], weights=[1, 3, 5, 4])[0],
+                            date=week_start + timedelta(days=self.random.randrange(5)),
+                            comment=None
+                        ))
+                    for _ in range(self.params.attendance_per_week):
+                        present = self.random.random() > 0.08
+                        attendance.append(Attendance(
+                            id=None,
+                            student_id=student.id,
+                            subject_id=subject.id,
+                            date=week_start + timedelta(days=self.random.randrange(5)),
+                            present=present,
+                            reason=None if present else self.random.choice(ABSENCE_REASONS)
+                        ))
+            self.repositories['grade'].create_many(grades)
+            self.repositories['attendance'].create_many(attendance)
+            grade_count += len(grades)
+            attendance_count += len(attendance)
+
+        return grade_count, attendance_count
+
+    def _school_weeks(self) -> list[date]:
+        # Учебный год - с 1 сентября по 31 мая, последние years учебных лет до сегодняшнего дня
+        today = date.today()
+        last_year = today.year if today.month >= 9 else today.year - 1
+        weeks = []
+        for year in range(last_year - self.params.years + 1, last_year + 1):
+            week_start = date(year, 9, 1)
+            week_start -= timedelta(days=week_start.weekday())
+            year_end = min(date(year + 1, 5, 31), today)
+            while week_start <= year_end:
+                weeks.append(week_start)
+                week_start += timedelta(days=7)
+        return weeks
+
+    def _random_name(self) -> str:
+        return f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}'